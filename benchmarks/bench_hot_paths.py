@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+
+# Times the parse, score and optimize stages on synthetic slates and reports
+# ops/sec and peak memory for each case. Results can be saved and compared
+# against a baseline saved on an earlier commit.
+#
+#   python benchmarks/bench_hot_paths.py --save base.json
+#   python benchmarks/bench_hot_paths.py --compare base.json
+#   python benchmarks/bench_hot_paths.py --stats ~/Stats --stages parse score
+#
+#   python benchmarks/make_stats.py /tmp/stats10 --scale 10 --years 2013 2014
+#   python benchmarks/bench_hot_paths.py --stats /tmp/stats10 --years 2013 2014
+#
+# The parse and score stages need a stats directory; without --stats only the
+# optimize stage runs.
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from multiprocessing import Process, Queue
+from Queue import Empty
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from slates import COMPOSITIONS, SALARIES, candidate_slate, assign_slate
+
+
+STAGES = ['parse', 'score', 'optimize']
+
+# setup() runs once and returns (run, ops): run() is what gets timed, and does
+# ops units of work, ie players scored or lineups searched
+Case = namedtuple('Case', ['stage', 'name', 'setup'])
+
+
+def load_stats(stats, use_snapshot, years=None):
+    from stat_parsers.player_stats import PlayerStats
+    from stat_parsers.ballpark_stats import BallparkStats
+    from stat_parsers.team_stats import TeamStats
+    from stat_parsers.league_stats import LeagueStats
+    return (PlayerStats(stats, use_snapshot=use_snapshot, years=years),
+            TeamStats(stats, use_snapshot=use_snapshot, years=years),
+            BallparkStats(stats, use_snapshot=use_snapshot),
+            LeagueStats(stats, use_snapshot=use_snapshot, years=years))
+
+
+def parse_cases(args):
+    def parse(use_snapshot):
+        def setup():
+            if use_snapshot:
+                # the first load writes the snapshots the timed loads read
+                load_stats(args.stats, True, args.years)
+            return (lambda: load_stats(args.stats, use_snapshot, args.years)), 1
+        return setup
+    return [Case('parse', 'csv', parse(False)),
+            Case('parse', 'snapshot', parse(True))]
+
+
+def score_cases(args):
+    def score(batch):
+        def setup():
+            from stat_equations import StatEquations
+            player_stats, team_stats, ballpark_stats, league_stats = load_stats(args.stats, True, args.years)
+            players = assign_slate(player_stats, team_stats, seed=args.seed)
+            eq = StatEquations(player_stats, team_stats, ballpark_stats, league_stats)
+            if batch:
+                return (lambda: eq.score_all(players)), len(players)
+            def each():
+                for p in players:
+                    try:
+                        eq.get_score(p)
+                    except Exception:
+                        pass
+            return each, len(players)
+        return setup
+    return [Case('score', 'get_score', score(False)),
+            Case('score', 'score_all', score(True))]
+
+
+def optimize_cases(args):
+    def slate(players, composition, salary):
+        names, classes, values, weights, comp, capacity = candidate_slate(players, composition, salary, args.seed)
+        return names, classes, values, weights, capacity, comp
+
+    def mcmc(players, composition, salary, schedule):
+        def setup():
+            from mcmc import TeamMCMC, SCHEDULES
+            team = TeamMCMC(*slate(players, composition, salary))
+            team.schedule = SCHEDULES[schedule]()
+            return (lambda: team.anneal(args.seed)), 1
+        return setup
+
+    def knapsack(players, composition, salary):
+        def setup():
+            from knapsack import ModifiedKnapsack
+            names, classes, values, weights, capacity, comp = slate(players, composition, salary)
+            return (lambda: ModifiedKnapsack(names, classes, values, weights, capacity, comp).find_solution()), 1
+        return setup
+
+    cases = []
+    for players in args.players:
+        for composition in args.compositions:
+            for salary in args.salaries:
+                label = '%s/%s/%d' % (composition, salary, players)
+                for schedule in args.schedules:
+                    name = 'anneal-%s %s' % (schedule, label)
+                    cases.append(Case('optimize', name, mcmc(players, composition, salary, schedule)))
+                cases.append(Case('optimize', 'knapsack %s' % label, knapsack(players, composition, salary)))
+    return cases
+
+
+def peak_rss_kb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on OS X
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform == 'darwin' else peak
+
+
+def measure(case, repeat):
+    run, ops = case.setup()
+    best = None
+    for r in range(repeat):
+        start = time.time()
+        run()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return {'stage': case.stage,
+            'name': case.name,
+            'seconds': best,
+            'ops': ops,
+            'ops_per_sec': ops / best if best > 0 else float('inf'),
+            'peak_kb': peak_rss_kb()}
+
+
+def _measure_child(case, repeat, queue):
+    try:
+        queue.put(measure(case, repeat))
+    except Exception as e:
+        queue.put({'stage': case.stage, 'name': case.name, 'error': repr(e)})
+
+
+def measure_isolated(case, repeat, timeout=None):
+    # Every case runs in its own process, so its peak memory isn't the peak of
+    # whichever case came before it. A child that dies without a result (ie
+    # killed for running out of memory) or runs past timeout seconds is
+    # reported as an error instead of hanging the harness.
+    queue = Queue()
+    child = Process(target=_measure_child, args=(case, repeat, queue))
+    child.start()
+    deadline = time.time() + timeout if timeout is not None else None
+    error = None
+    try:
+        while True:
+            try:
+                return queue.get(timeout=1.0)
+            except Empty:
+                pass
+            if child.exitcode is not None:
+                # the result may still be on its way from a child that just exited
+                try:
+                    return queue.get(timeout=1.0)
+                except Empty:
+                    error = 'exited with code %d' % child.exitcode
+                    break
+            if deadline is not None and time.time() > deadline:
+                child.terminate()
+                error = 'timed out after %d s' % timeout
+                break
+    finally:
+        child.join()
+    return {'stage': case.stage, 'name': case.name, 'error': error}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results, baseline, threshold):
+    # prints every case, and returns the cases slower than baseline by more
+    # than threshold
+    before = dict(((r['stage'], r['name']), r) for r in baseline['results']) if baseline else {}
+    regressions = []
+    print '%-8s %-36s %12s %12s %10s %s' % ('stage', 'case', 'ops/sec', 'ms/op', 'peak MB', 'vs base' if baseline else '')
+    for r in results:
+        if 'error' in r:
+            print '%-8s %-36s ERROR %s' % (r['stage'], r['name'], r['error'])
+            continue
+        change = ''
+        old = before.get((r['stage'], r['name']))
+        if old is not None and 'error' not in old:
+            ratio = r['ops_per_sec'] / old['ops_per_sec']
+            change = '%+6.1f%%' % (100 * (ratio - 1))
+            if ratio < 1 - threshold:
+                change += '  SLOWER'
+                regressions.append(r)
+        print '%-8s %-36s %12.1f %12.3f %10.1f %s' % (r['stage'], r['name'], r['ops_per_sec'],
+                                                     1000 * r['seconds'] / r['ops'], r['peak_kb'] / 1024.0, change)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the parse, score and optimize stages.')
+    parser.add_argument('--stats', default=None, help='Stats directory for the parse and score stages.')
+    parser.add_argument('--years', type=int, nargs='+', default=[2014], help='Seasons of stats to load.')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help='Stages to run.')
+    parser.add_argument('--players', type=int, nargs='+', default=[60, 300], help='Candidate pool sizes to optimize over.')
+    parser.add_argument('--compositions', nargs='+', choices=sorted(COMPOSITIONS), default=['fanduel'], help='Roster compositions to optimize.')
+    parser.add_argument('--salaries', nargs='+', choices=sorted(SALARIES), default=['uniform', 'skewed'], help='Salary distributions to optimize over.')
+    parser.add_argument('--schedules', nargs='+', choices=['linear', 'geometric', 'adaptive'], default=['geometric'], help='Annealing cooling schedules to time.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs to take the best time of.')
+    parser.add_argument('--timeout', type=float, default=None, help='Seconds a case may run before it is stopped and reported as an error.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic slates.')
+    parser.add_argument('--save', default=None, help='File to save the results to, as JSON.')
+    parser.add_argument('--compare', default=None, help='Results saved by an earlier run to compare against.')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Slowdown versus --compare that counts as a regression.')
+    args = parser.parse_args()
+
+    cases = []
+    for stage in STAGES:
+        if stage not in args.stages:
+            continue
+        if stage in ('parse', 'score') and args.stats is None:
+            print 'WARNING: Skipping %s stage, no --stats directory' % stage
+            continue
+        cases.extend({'parse': parse_cases, 'score': score_cases, 'optimize': optimize_cases}[stage](args))
+
+    results = [measure_isolated(case, args.repeat, args.timeout) for case in cases]
+
+    baseline = json.load(open(args.compare)) if args.compare else None
+    if baseline:
+        print 'Baseline %s' % (baseline.get('revision') or args.compare)
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'revision': git_revision(), 'time': time.time(), 'results': results}, f, indent=2)
+
+    if regressions:
+        print '%d case(s) slower than the baseline' % len(regressions)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
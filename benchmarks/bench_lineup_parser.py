@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+# Times the streaming lineup parser against the BeautifulSoup one on saved
+# lineup pages, and checks both produce the same records.
+#
+#   python benchmarks/bench_lineup_parser.py page.html [page.html ...]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from find_team import _soupGames
+from lineup_parser import parse_lineup_page
+
+
+def best_time(parse, docs, repeat):
+    best = None
+    for r in range(repeat):
+        start = time.time()
+        for doc in docs:
+            parse(doc)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the lineup page parsers.')
+    parser.add_argument('pages', nargs='+', help='Saved lineup pages.')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs to take the best time of.')
+    args = parser.parse_args()
+
+    docs = [open(page).read() for page in args.pages]
+    for page, doc in zip(args.pages, docs):
+        if _soupGames(doc) != parse_lineup_page(doc):
+            print 'ERROR: Parsers disagree on %s' % page
+            sys.exit(1)
+
+    soup = best_time(_soupGames, docs, args.repeat)
+    stream = best_time(parse_lineup_page, docs, args.repeat)
+    kb = sum(len(doc) for doc in docs) / 1024.0
+    print '%d pages, %.0f KB' % (len(docs), kb)
+    print 'soup    %8.2f ms/page' % (1000 * soup / len(docs))
+    print 'stream  %8.2f ms/page' % (1000 * stream / len(docs))
+    print 'speedup %8.1fx' % (soup / stream)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+
+# Writes a synthetic stats directory in the layout the stat parsers read, at any
+# scale and for any seasons, plus a RotoGrinders lineup page for its players,
+# so loading and scoring can be measured offline on slates bigger than today's.
+#
+#   python benchmarks/make_stats.py /tmp/stats --scale 10 --years 2012 2013 2014
+#   python find_team.py /tmp/stats --years 2012 2013 2014 --fixtures /tmp/stats/Lineups --knapsack
+#
+# Players keep their uid, name and (mostly) their team across seasons. Every
+# season has the same files as the Dropbox stats, and the counting stats of a
+# file add up: H = 1B + 2B + 3B + HR, PA = AB + BB, AVG = H / AB, and so on.
+# League totals are the sums of the team stats.
+
+import argparse
+import csv
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fetchers import fixture_name
+from find_team import ROTOGRINDERS_URLS
+from stat_parsers.team_stats import TEAM_NAMES, TEAM_ALIASES
+
+
+# rows per season of a real (2014) FanGraphs export, multiplied by --scale
+BATTERS = 650
+PITCHERS = 500
+CATCHERS = 100
+
+FIRST_NAMES = ['aaron', 'adam', 'alex', 'andrew', 'ben', 'brandon', 'brian', 'carlos', 'chris',
+               'daniel', 'david', 'eric', 'felix', 'greg', 'ian', 'jacob', 'james', 'jason',
+               'jose', 'josh', 'kevin', 'kyle', 'luis', 'mark', 'matt', 'michael', 'nick',
+               'oscar', 'pedro', 'ryan', 'scott', 'tom', 'victor', 'will', 'yadier', 'zack']
+SYLLABLES = ['al', 'bar', 'ber', 'can', 'cor', 'dal', 'den', 'fer', 'gar', 'gon', 'har', 'hen',
+             'kin', 'lee', 'lo', 'man', 'mar', 'mil', 'mor', 'nel', 'ro', 'san', 'sen', 'ter',
+             'tor', 'val', 'wal', 'win', 'ver', 'ton']
+
+ROTOGRINDERS_NAMES = dict((team, name) for name, team in TEAM_ALIASES['rotogrinders'].items())
+
+
+def _name(rng, seen):
+    # a full name whose (first initial, last name) no earlier player has, so
+    # lineup names resolve to exactly one player
+    while True:
+        first = rng.choice(FIRST_NAMES)
+        last = ''.join(rng.choice(SYLLABLES) for i in range(rng.randint(2, 3)))
+        if (first[0], last) not in seen:
+            seen.add((first[0], last))
+            return '%s %s' % (first.title(), last.title())
+
+
+def make_players(rng, scale, years):
+    # {'batters': [...], 'pitchers': [...]}: name, uid, catcher flag and the team
+    # of every season. One player in ten changes teams between seasons.
+    teams = sorted(TEAM_NAMES)
+    seen = set()
+    players = {'batters': [], 'pitchers': []}
+    uid = 1000
+    for kind, count in (('batters', BATTERS * scale), ('pitchers', PITCHERS * scale)):
+        for i in range(count):
+            uid += 1
+            team = teams[i % len(teams)]
+            by_year = {}
+            for year in years:
+                if by_year and rng.random() < 0.1:
+                    team = rng.choice(teams)
+                by_year[year] = team
+            players[kind].append({'name': _name(rng, seen),
+                                  'uid': uid,
+                                  'catcher': kind == 'batters' and i < CATCHERS * scale,
+                                  'teams': by_year})
+    return players
+
+
+def _writer(path):
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    return csv.writer(open(path, 'wb'), quotechar='"', quoting=csv.QUOTE_MINIMAL)
+
+
+def _mascot(team):
+    return TEAM_NAMES[team]['mascot']
+
+
+def write_batters(stats, rng, players, year):
+    total = _writer('%s/Batter/%d/%d Total Batter Stats.csv' % (stats, year, year))
+    total.writerow(['Name', 'Team', '1B', '2B', '3B', 'H', 'BB', 'BB%', 'HR', 'AB', 'PA', 'AVG',
+                    'G', 'SB', 'CS', 'playerid'])
+    vs = {}
+    for hand in ['RHP', 'LHP']:
+        vs[hand] = _writer('%s/Batter/%d/%d Batter Stats vs %s.csv' % (stats, year, year, hand))
+        vs[hand].writerow(['Name', 'Team', 'PA', 'HR', 'SO', 'wOBA', 'playerid'])
+
+    for p in players:
+        mascot = _mascot(p['teams'][year])
+        # regulars, platoon players and call-ups with too few at bats
+        ab = int(rng.choice([rng.randint(350, 650), rng.randint(100, 350), rng.randint(5, 50)]))
+        avg = rng.gauss(0.255, 0.03)
+        hits = int(ab * max(avg, 0.1))
+        hr = int(hits * rng.uniform(0.02, 0.2))
+        triples = int(hits * rng.uniform(0, 0.03))
+        doubles = int(hits * rng.uniform(0.12, 0.25))
+        singles = hits - hr - triples - doubles
+        bb = int(ab * rng.uniform(0.04, 0.14))
+        pa = ab + bb
+        games = max(ab // 4, 1)
+        sb = int(games * rng.uniform(0, 0.25))
+        cs = int(sb * rng.uniform(0.1, 0.4))
+        total.writerow([p['name'], mascot, singles, doubles, triples, hits, bb,
+                        '%.1f%%' % (100.0 * bb / pa),
+                        hr, ab, pa, '%.3f' % (1.0 * hits / ab), games, sb, cs, p['uid']])
+
+        # the split PAs add up to the total, about 70% against righties
+        pa_r = int(pa * rng.uniform(0.6, 0.8))
+        hr_r = int(round(hr * 1.0 * pa_r / pa))
+        for hand, split_pa, split_hr in (('RHP', pa_r, hr_r), ('LHP', pa - pa_r, hr - hr_r)):
+            k = int(split_pa * rng.uniform(0.12, 0.3))
+            woba = max(rng.gauss(0.315, 0.035), 0.15)
+            vs[hand].writerow([p['name'], mascot, split_pa, split_hr, k, '%.3f' % woba, p['uid']])
+
+
+def write_pitchers(stats, rng, players, year):
+    total = _writer('%s/Pitcher/%d/%d Total Pitcher Stats.csv' % (stats, year, year))
+    total.writerow(['Name', 'Team', 'GS', 'SO', 'IP', 'G', 'playerid'])
+    home_away = {}
+    for loc in ['Home', 'Away']:
+        home_away[loc] = _writer('%s/Pitcher/%d/%d %s Pitcher Stats.csv' % (stats, year, year, loc))
+        home_away[loc].writerow(['Name', 'Team', 'xFIP', 'playerid'])
+    vs = {}
+    for hand in ['RHB', 'LHB']:
+        vs[hand] = _writer('%s/Pitcher/%d/%d Pitcher Stats vs %s.csv' % (stats, year, year, hand))
+        vs[hand].writerow(['Name', 'Team', 'HR', 'BB', 'TBF', 'wOBA', 'playerid'])
+
+    for i, p in enumerate(players):
+        mascot = _mascot(p['teams'][year])
+        # one pitcher in three starts, the rest pitch in relief
+        if i % 3 == 0:
+            games = rng.randint(5, 34)
+            starts = games
+            ip = games * rng.uniform(4.5, 7.0)
+        else:
+            games = rng.randint(5, 75)
+            starts = 0
+            ip = games * rng.uniform(0.7, 1.3)
+        k = int(ip * rng.uniform(0.6, 1.2))
+        total.writerow([p['name'], mascot, starts, k, '%.1f' % ip, games, p['uid']])
+
+        xfip = rng.gauss(3.9, 0.5)
+        for loc in ['Home', 'Away']:
+            home_away[loc].writerow([p['name'], mascot, '%.2f' % max(xfip + rng.gauss(0, 0.3), 1.5), p['uid']])
+
+        tbf = int(ip * 4.3)
+        tbf_r = int(tbf * rng.uniform(0.5, 0.65))
+        for hand, split_tbf in (('RHB', tbf_r), ('LHB', tbf - tbf_r)):
+            hr = int(split_tbf * rng.uniform(0.015, 0.035))
+            bb = int(split_tbf * rng.uniform(0.05, 0.11))
+            woba = max(rng.gauss(0.315, 0.03), 0.2)
+            vs[hand].writerow([p['name'], mascot, hr, bb, split_tbf, '%.3f' % woba, p['uid']])
+
+
+def write_catchers(stats, rng, players, year):
+    catchers = _writer('%s/Catcher/%d Catcher Stats.csv' % (stats, year))
+    catchers.writerow(['Name', 'Team', 'SB', 'CS', 'playerid'])
+    for p in players:
+        if p['catcher']:
+            sb = rng.randint(5, 80)
+            catchers.writerow([p['name'], _mascot(p['teams'][year]), sb, int(sb * rng.uniform(0.15, 0.45)), p['uid']])
+
+
+def write_teams_and_league(stats, rng, year):
+    totals = dict((stat, 0) for stat in ['so', 'pa', 'hr', 'bb', 'sb', 'cs', 'r'])
+    team_total = _writer('%s/Team/%d Team Stats.csv' % (stats, year))
+    team_total.writerow(['Team', 'R'])
+    fielding = _writer('%s/Team/%d Team Fielding Stats.csv' % (stats, year))
+    fielding.writerow(['Team', 'SB', 'CS'])
+    vs = {}
+    for hand in ['RHP', 'LHP']:
+        vs[hand] = _writer('%s/Team/%d Team Stats vs %s.csv' % (stats, year, hand))
+        vs[hand].writerow(['Team', 'SO', 'PA', 'wOBA'])
+
+    woba_pa = 0.0
+    for team in sorted(TEAM_NAMES):
+        mascot = _mascot(team)
+        runs = rng.randint(550, 800)
+        team_total.writerow([mascot, runs])
+        sb = rng.randint(50, 150)
+        cs = int(sb * rng.uniform(0.2, 0.4))
+        fielding.writerow([mascot, sb, cs])
+
+        pa = rng.randint(5900, 6300)
+        pa_r = int(pa * rng.uniform(0.65, 0.78))
+        for hand, split_pa in (('RHP', pa_r), ('LHP', pa - pa_r)):
+            so = int(split_pa * rng.uniform(0.17, 0.24))
+            woba = rng.gauss(0.312, 0.012)
+            vs[hand].writerow([mascot, so, split_pa, '%.3f' % woba])
+            totals['so'] += so
+            woba_pa += woba * split_pa
+        totals['pa'] += pa
+        totals['hr'] += int(pa * rng.uniform(0.018, 0.03))
+        totals['bb'] += int(pa * rng.uniform(0.06, 0.09))
+        totals['sb'] += sb
+        totals['cs'] += cs
+        totals['r'] += runs
+
+    league = _writer('%s/League/%d League Stats.csv' % (stats, year))
+    league.writerow(['Season', 'K%', 'OPS', 'SB', 'CS', 'HR', 'PA', 'BB', 'R', 'wOBA'])
+    league.writerow([year, '%.1f%%' % (100.0 * totals['so'] / totals['pa']), '%.3f' % rng.gauss(0.7, 0.01),
+                     totals['sb'], totals['cs'], totals['hr'], totals['pa'], totals['bb'], totals['r'],
+                     '%.3f' % (woba_pa / totals['pa'])])
+
+
+def write_ballparks(stats, rng):
+    parks = _writer('%s/Park Factor/Ball Park Factor.csv' % stats)
+    parks.writerow(['Team', 'Overall', 'AVG LHB', 'AVG RHB', 'HR LHB', 'HR RHB'])
+    for team in sorted(TEAM_NAMES):
+        parks.writerow([team] + ['%.3f' % rng.gauss(1.0, 0.05) for i in range(3)] +
+                       ['%.3f' % rng.gauss(1.0, 0.12) for i in range(2)])
+
+
+def make_games(rng, players, year):
+    # Pairs up the teams into games, each with a starting pitcher (one with starts
+    # that season) and nine batters per team: [(away, home, {team: (pitcher,
+    # batters)}), ...].
+    rosters = {}
+    for p in players['batters']:
+        rosters.setdefault(p['teams'][year], ([], []))[1].append(p)
+    for i, p in enumerate(players['pitchers']):
+        if i % 3 == 0:
+            rosters.setdefault(p['teams'][year], ([], []))[0].append(p)
+
+    teams = sorted(t for t, (pitchers, batters) in rosters.items() if pitchers and len(batters) >= 9)
+    rng.shuffle(teams)
+    games = []
+    for away, home in zip(teams[0::2], teams[1::2]):
+        lineups = {}
+        for team in (away, home):
+            pitchers, batters = rosters[team]
+            lineups[team] = (rng.choice(pitchers), rng.sample(batters, 9))
+        games.append((away, home, lineups))
+    return games
+
+
+def write_daily_matchups(stats, rng, games):
+    # TeamStats still reads the home and away teams from this old FanDuel export
+    salaries = _writer('%s/Test Data/Salaries/2014-06-28-fanduel-salaries.csv' % stats)
+    for away, home, lineups in games:
+        for team in (away, home):
+            pitcher, batters = lineups[team]
+            for p in [pitcher] + batters:
+                salaries.writerow(['P' if p is pitcher else 'OF', p['name'], '%.1f' % rng.uniform(0, 15), 10,
+                                   '%s@%s' % (away, home), '$%s ' % format(rng.randrange(20, 110) * 100, ','), 'Add'])
+
+
+def _salary(dollars):
+    return '$%.1fK' % (dollars / 1000.0)
+
+
+def lineup_page(rng, games):
+    # A RotoGrinders lineup page in the markup parse_lineup_page and
+    # _soupGames read; one game in ten has no away lineup posted yet.
+    positions = ['C', '1B', '2B', 'SS', '3B', 'OF', 'OF', 'OF', 'DH']
+    out = ['<html><head><title>Starting Lineups</title></head><body>',
+           '<div class="container"><ul class="schedule-list">']
+    for away, home, lineups in games:
+        pitchers = []
+        for team in (away, home):
+            pitcher = lineups[team][0]
+            pitchers.append('%s (%s) %s' % (pitcher['name'], rng.choice('RL'), _salary(rng.randrange(60, 115) * 100)))
+        posted = rng.random() >= 0.1
+        out.append('<li class="game"><header><div class="match-teams">%s @ %s</div>'
+                   '<div class="time">7:05 PM ET</div></header>' % tuple(pitchers))
+        out.append('<div class="grid-3-3">')
+        for side, team in (('away', away), ('home', home)):
+            out.append('<div class="%s">' % side)
+            out.append('<div class="team">%s\n<span class="record">81-81</span></div>' % ROTOGRINDERS_NAMES[team].title())
+            if side == 'away' and not posted:
+                out.append('<p>Check Back Soon</p>')
+            else:
+                out.append('<ul class="lineup-list">')
+                for order, batter in enumerate(lineups[team][1], 1):
+                    out.append('<li class="player"><span class="order">%d</span> <a href="#">%s</a> (%s) '
+                               '<span class="salary">%s</span> <span class="pos">%s</span></li>'
+                               % (order, batter['name'], rng.choice('RLS'), _salary(rng.randrange(20, 50) * 100),
+                                  positions[order - 1]))
+                out.append('</ul>')
+            out.append('</div>')
+        out.append('</div></li>')
+    out.append('</ul></div></body></html>')
+    return '\n'.join(out)
+
+
+def make_stats(stats, scale=1, years=(2014,), seed=0):
+    # Writes the whole stats tree under stats, and the lineup page of the latest
+    # season under stats/Lineups. Returns the lineup directory.
+    rng = random.Random(seed)
+    years = sorted(years)
+    players = make_players(rng, scale, years)
+    for year in years:
+        write_batters(stats, rng, players['batters'], year)
+        write_pitchers(stats, rng, players['pitchers'], year)
+        write_catchers(stats, rng, players['batters'], year)
+        write_teams_and_league(stats, rng, year)
+    write_ballparks(stats, rng)
+
+    games = make_games(rng, players, years[-1])
+    write_daily_matchups(stats, rng, games)
+    lineups = os.path.join(stats, 'Lineups')
+    if not os.path.isdir(lineups):
+        os.makedirs(lineups)
+    with open(os.path.join(lineups, fixture_name(ROTOGRINDERS_URLS[0])), 'w') as outfile:
+        outfile.write(lineup_page(rng, games))
+    return lineups
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic stats directory.')
+    parser.add_argument('stats', help='Directory to write the stats to.')
+    parser.add_argument('--scale', type=int, default=1, help='Multiple of the real player counts to write.')
+    parser.add_argument('--years', type=int, nargs='+', default=[2014], help='Seasons to write.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+    args = parser.parse_args()
+
+    lineups = make_stats(args.stats, args.scale, args.years, args.seed)
+    print 'Wrote %d batters and %d pitchers per season for %s' % (BATTERS * args.scale, PITCHERS * args.scale,
+                                                                 ', '.join(str(year) for year in args.years))
+    print 'Lineup page in %s (use --fixtures)' % lineups
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# Synthetic slates for the benchmarks: candidate arrays for the optimizers, and
+# daily lineups (positions, salaries, hands, starting pitchers) for players of a
+# loaded stats directory, so the equations can score them.
+
+import random
+
+
+# roster compositions and salary caps to optimize under
+COMPOSITIONS = {
+    'fanduel': ({'P': 1, 'C': 1, '1B': 1, '2B': 1, 'SS': 1, '3B': 1, 'OF': 3}, 35000),
+    'draftkings': ({'P': 2, 'C': 1, '1B': 1, '2B': 1, 'SS': 1, '3B': 1, 'OF': 3}, 50000),
+    'small': ({'P': 1, '1B': 1, 'OF': 2}, 16000),
+}
+
+# salary samplers, in dollars, multiples of 100 like FanDuel
+SALARIES = {
+    'uniform': lambda rng: rng.randrange(20, 110) * 100.0,
+    # most players near the minimum, a few stars
+    'skewed': lambda rng: min(20 + int(rng.expovariate(1 / 15.0)), 130) * 100.0,
+    # a band of value plays and a band of stars
+    'bimodal': lambda rng: (rng.randrange(20, 40) if rng.random() < 0.7 else rng.randrange(80, 120)) * 100.0,
+}
+
+# share of the candidate pool playing each position
+POSITION_SHARE = {'P': 0.2, 'C': 0.1, '1B': 0.1, '2B': 0.1, 'SS': 0.1, '3B': 0.1, 'OF': 0.3}
+
+
+def candidate_slate(players, composition='fanduel', salary='uniform', seed=0):
+    # names, classes, values, weights for the optimizers. Values grow with
+    # salary plus noise, so cheap players are sometimes the better pick.
+    comp, capacity = COMPOSITIONS[composition]
+    rng = random.Random(seed)
+    positions = sorted(comp)
+    shares = [POSITION_SHARE.get(p, 0.1) for p in positions]
+
+    names, classes, values, weights = [], [], [], []
+    for i in range(players):
+        # every position gets at least as many players as the roster needs
+        if i < sum(comp.values()) * 2:
+            position = positions[i % len(positions)]
+        else:
+            position = _weighted_choice(rng, positions, shares)
+        cost = SALARIES[salary](rng)
+        value = cost / 1000.0 + rng.gauss(0, 2) + (8 if position == 'P' else 0)
+        names.append(('player %d' % i, i))
+        classes.append(position)
+        values.append(value)
+        weights.append(cost)
+    return names, classes, values, weights, comp, capacity
+
+
+def _weighted_choice(rng, items, weights):
+    r = rng.random() * sum(weights)
+    for item, weight in zip(items, weights):
+        if r < weight:
+            return item
+        r -= weight
+    return items[-1]
+
+
+def assign_slate(player_stats, team_stats, seed=0, year=None):
+    # Pairs up the teams into games and sets a nine man batting order and a
+    # starting pitcher for each, from the players that have stats for them, the
+    # way parseRotoGrinders would from the lineup page. Returns the players set.
+    rng = random.Random(seed)
+    year = year if year is not None else max(player_stats.years)
+    player_stats.preload()
+
+    batters, pitchers = {}, {}
+    for key in player_stats.store.keys:
+        teams = player_stats.player_info[key].get('teams')
+        if not teams or teams[-1] is None:
+            continue
+        stats = player_stats.store
+        if stats.get(key, year, 'gs_total', default=None) is not None:
+            pitchers.setdefault(teams[-1], []).append(key)
+        elif stats.get(key, year, 'ab_total', default=None) is not None:
+            batters.setdefault(teams[-1], []).append(key)
+
+    teams = sorted(t for t in batters if len(batters[t]) >= 9 and t in pitchers)
+    rng.shuffle(teams)
+    positions = ['C', '1B', '2B', 'SS', '3B', 'OF', 'OF', 'OF', '1B']
+    active = []
+    for away, home in zip(teams[0::2], teams[1::2]):
+        team_stats.set_team_home_or_away(away, 'away')
+        team_stats.set_team_home_or_away(home, 'home')
+        team_stats.set_team_opponent(away, home)
+        for team in (away, home):
+            for order, key in enumerate(rng.sample(batters[team], 9), 1):
+                player_stats.set_player_batting_hand(key, rng.choice(['right', 'left']))
+                player_stats.set_player_batting_position(key, order)
+                player_stats.set_player_salary(key, rng.randrange(20, 50) * 100.0)
+                player_stats.set_player_fielding_position(key, positions[order - 1])
+                player_stats.set_player_team(key, team)
+                player_stats.set_player_active(key)
+                active.append(key)
+            key = rng.choice(pitchers[team])
+            player_stats.set_player_salary(key, rng.randrange(60, 110) * 100.0)
+            player_stats.set_player_throwing_hand(key, rng.choice(['right', 'left']))
+            player_stats.set_player_fielding_position(key, 'P')
+            player_stats.set_starting_pitcher(team, key)
+            player_stats.set_player_team(key, team)
+            player_stats.set_player_active(key)
+            active.append(key)
+    return active
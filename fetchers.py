@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import re
+import time
+import urllib2
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+from stat_parsers.snapshot import user_cache_dir
+
+
+# body is None when the server answered 304 Not Modified to the etag we sent
+FetchResult = namedtuple('FetchResult', ['body', 'etag'])
+
+
+class UrlFetcher(object):
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+
+    def fetch(self, url, etag=None):
+        request = urllib2.Request(url)
+        if etag is not None:
+            request.add_header('If-None-Match', etag)
+        try:
+            response = urllib2.urlopen(request, timeout=self.timeout)
+        except urllib2.HTTPError as e:
+            if e.code == 304:
+                return FetchResult(None, etag)
+            raise
+        try:
+            return FetchResult(response.read(), response.info().getheader('ETag'))
+        finally:
+            response.close()
+
+
+def default_cache_dir():
+    # lineup pages are cached per user, not in the stats directory, which is
+    # usually a shared, synced folder
+    return user_cache_dir('stadium_grinders', 'lineups')
+
+
+def fixture_name(url):
+    # http://rotogrinders.com/lineups/index/Baseball/FanDuel
+    #   -> rotogrinders.com_lineups_index_Baseball_FanDuel.html
+    return re.sub(r'[^A-Za-z0-9.-]+', '_', re.sub(r'^\w+://', '', url)).strip('_') + '.html'
+
+
+class FixtureFetcher(object):
+
+    # Stand-in for the sites: serves saved pages from a directory, named by
+    # fixture_name(url), so a run can be repeated offline.
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, url, etag=None):
+        path = os.path.join(self.directory, fixture_name(url))
+        with open(path) as infile:
+            return FetchResult(infile.read(), None)
+
+
+class CachedFetcher(object):
+
+    # Keeps every response on disk. A response younger than ttl seconds is used
+    # without asking the server; an older one is revalidated with its etag and
+    # kept if the server answers 304. If the server can't be reached at all the
+    # cached response is used however old it is.
+    def __init__(self, fetcher, directory, ttl=300):
+        self.fetcher = fetcher
+        self.directory = directory
+        self.ttl = ttl
+
+    def _paths(self, url):
+        key = hashlib.sha1(url).hexdigest()
+        return (os.path.join(self.directory, key + '.html'),
+                os.path.join(self.directory, key + '.json'))
+
+    def _read(self, url):
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path) as infile:
+                meta = json.load(infile)
+            with open(body_path) as infile:
+                body = infile.read()
+        except (IOError, ValueError):
+            return None, None
+        return body, meta
+
+    def _write(self, url, body, etag):
+        body_path, meta_path = self._paths(url)
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        if body is not None:
+            with open(body_path + '.tmp', 'wb') as outfile:
+                outfile.write(body)
+            os.rename(body_path + '.tmp', body_path)
+        with open(meta_path + '.tmp', 'w') as outfile:
+            json.dump({'url': url, 'etag': etag, 'fetched': time.time()}, outfile)
+        os.rename(meta_path + '.tmp', meta_path)
+
+    def fetch(self, url, etag=None):
+        body, meta = self._read(url)
+        if body is not None and time.time() - meta['fetched'] < self.ttl:
+            return FetchResult(body, meta['etag'])
+
+        try:
+            result = self.fetcher.fetch(url, meta['etag'] if body is not None else None)
+        except (IOError, urllib2.URLError) as e:
+            if body is None:
+                raise
+            print 'WARNING: Using cached %s (%s)' % (url, e)
+            return FetchResult(body, meta['etag'])
+
+        if result.body is None:
+            self._write(url, None, result.etag)
+            return FetchResult(body, result.etag)
+        self._write(url, result.body, result.etag)
+        return result
+
+
+def fetch_all(fetcher, urls, workers=4):
+    # page bodies in the order of urls, fetched on up to `workers` threads
+    if len(urls) <= 1 or workers <= 1:
+        return [fetcher.fetch(url).body for url in urls]
+    pool = ThreadPool(min(workers, len(urls)))
+    try:
+        return [result.body for result in pool.map(fetcher.fetch, urls)]
+    finally:
+        pool.close()
+        pool.join()
@@ -1,15 +1,23 @@
 #!/usr/bin/env python
 
 import argparse
+import os
 import sys
+from collections import namedtuple
+
+import numpy as np
 
-import urllib2
 from bs4 import BeautifulSoup
 
+from fetchers import UrlFetcher, FixtureFetcher, CachedFetcher, default_cache_dir, fetch_all
+from lineup_parser import GameText, parse_lineup_page
+from profiling import registry, run_profiled
+
 from stat_parsers.player_stats import PlayerStats
 from stat_parsers.ballpark_stats import BallparkStats
-from stat_parsers.team_stats import TeamStats
+from stat_parsers.team_stats import TeamStats, get_team_by_alias
 from stat_parsers.league_stats import LeagueStats
+from stat_parsers.snapshot import set_snapshot_dir
 from stat_equations import StatEquations
 
 
@@ -22,55 +30,32 @@ TEAM_COMP = {'P': 1,
              '3B': 1,
              'OF': 3}
 
+# the scored players the optimizers choose from, as parallel arrays
+Candidates = namedtuple('Candidates', ['names', 'classes', 'values', 'weights', 'errors'])
 
-def parseRotoGrinders(player_stats, team_stats):
-    team_map = {'Arizona Diamondbacks': 'ARI',
-                 'Atlanta Braves': 'ATL',
-                 'Baltimore Orioles': 'BAL',
-                 'Boston Red Sox': 'BOS',
-                 'Chicago Cubs': 'CHC',
-                 'Chicago White Sox': 'CWS',
-                 'Cincinnati Reds': 'CIN',
-                 'Cleveland Indians': 'CLE',
-                 'Colorado Rockies': 'COL',
-                 'Detroit Tigers': 'DET',
-                 'Houston Astros': 'HOU',
-                 'Kansas City Royals': 'KAN',
-                 'Los Angeles Angels': 'LAA',
-                 'Los Angeles Dodgers': 'LOS',
-                 'Miami Marlins': 'MIA',
-                 'Milwaukee Brewers': 'MIL',
-                 'Minnesota Twins': 'MIN',
-                 'New York Mets': 'NYM',
-                 'New York Yankees': 'NYY',
-                 'Oakland Athletics': 'OAK',
-                 'Philadelphia Phillies': 'PHI',
-                 'Pittsburgh Pirates': 'PIT',
-                 'San Diego Padres': 'SDP',
-                 'San Francisco Giants': 'SFG',
-                 'Seattle Mariners': 'SEA',
-                 'St. Louis Cardinals': 'STL',
-                 'Tampa Bay Rays': 'TAM',
-                 'Texas Rangers': 'TEX',
-                 'Toronto Blue Jays': 'TOR',
-                 'Washington Nationals': 'WAS'}
-
-    url = 'http://rotogrinders.com/lineups/index/Baseball/FanDuel'
-    doc = urllib2.urlopen(url).read()
-    soup = BeautifulSoup(doc)
-    headers_and_lineups = []
-    for ul in soup.find_all('ul', class_='schedule-list'):
-        headers = ul.find_all('header')
-        grids = ul.find_all('div', class_='grid-3-3')
-        headers_and_lineups.extend(zip(headers, grids))
 
-    for h,l in headers_and_lineups:
-        pitchers = _parseHeader(h)
-        team_players, teams = _parseLineups(l)
+ROTOGRINDERS_URLS = ['http://rotogrinders.com/lineups/index/Baseball/FanDuel']
+
+
+def parseRotoGrinders(player_stats, team_stats, fetcher, urls=ROTOGRINDERS_URLS, workers=4, html_parser='stream'):
+    games = []
+    for doc in fetch_all(fetcher, urls, workers):
+        if html_parser == 'soup':
+            games.extend(_soupGames(doc))
+        else:
+            games.extend(parse_lineup_page(doc))
+
+    for game in games:
+        pitchers = _parseHeader(game.match_teams)
+        team_players, teams = _parseLineups(game)
 
         teams, pitchers, team_players
 
-        teams = [team_map[t] for t in teams]
+        team_names = teams
+        teams = [get_team_by_alias(t, 'rotogrinders') for t in team_names]
+        if None in teams:
+            print 'WARNING: Skipping game, unknown team in %s' % ' @ '.join(team_names)
+            continue
 
         # update team stats
         team_stats.set_team_home_or_away(teams[0], 'away')
@@ -136,9 +121,27 @@ def parseRotoGrinders(player_stats, team_stats):
             player_stats.set_player_active(name_and_team)
 
 
-def _parseHeader(header):
+def _soupGames(doc):
+    # same GameText records as parse_lineup_page, from a full BeautifulSoup tree
+    def text(node):
+        return None if node is None else node.text
+
+    games = []
+    soup = BeautifulSoup(doc)
+    for ul in soup.find_all('ul', class_='schedule-list'):
+        headers = ul.find_all('header')
+        grids = ul.find_all('div', class_='grid-3-3')
+        for h, l in zip(headers, grids):
+            games.append(GameText(text(h.find('div', class_='match-teams')),
+                                  [t.text for t in l.find_all('div', class_='team')],
+                                  [[p.text for p in ll.find_all('li', class_='player')] for ll in l.find_all('ul', class_='lineup-list')],
+                                  text(l.find('div', class_='away')),
+                                  text(l.find('div', class_='home'))))
+    return games
+
+def _parseHeader(match_teams):
     pitchers = []
-    for h in header.find('div', class_='match-teams').text.split('@'):
+    for h in match_teams.split('@'):
         h = h.replace('(','\t').replace(')','\t')
         items = h.strip().split('\t')
         if len(items)==1:
@@ -161,13 +164,13 @@ def _convertSalary(str):
     str = '0' + str
     return float(''.join(n for n in str if n in '0123456789.'))*1000
 
-def _parseLineups(lineups):
-    teams = [t.text.strip().split('\n')[0] for t in lineups.find_all('div', class_='team')]
+def _parseLineups(game):
+    teams = [t.strip().split('\n')[0] for t in game.teams]
     player_lists = []
-    for i, l in enumerate(lineups.find_all('ul', class_='lineup-list')):
+    for i, l in enumerate(game.lineups):
         newLineup = []
-        for p in l.find_all('li', class_='player'):
-            items = [x.lower().strip() for x in p.text.replace('(', '').replace(')', '').split()]
+        for p in l:
+            items = [x.lower().strip() for x in p.replace('(', '').replace(')', '').split()]
             if len(items) in [6, 7]:
                 if len(items)==5:
                     items.insert(3, 'r')
@@ -199,31 +202,114 @@ def _parseLineups(lineups):
                          }
                 newLineup.append(player)
         player_lists.append(newLineup)
-    if lineups.find('div', class_='away').text.find("Check Back Soon")>=0:
+    if game.away.find("Check Back Soon")>=0:
         player_lists.insert(0, [])
-    if lineups.find('div', class_='home').text.find("Check Back Soon")>=0:
+    if game.home.find("Check Back Soon")>=0:
         player_lists.append([])
 
     return player_lists, teams
 
+def buildCandidates(player_stats, eq):
+    # Scores every active player once. Players whose position, salary or score
+    # can't be found end up in errors as (player, message) instead of the arrays.
+    players = []
+    classes = []
+    weights = []
+    errors = []
+    for p in player_stats.get_active_players():
+        try:
+            position = player_stats.get_player_fielding_position(p)
+            salary = player_stats.get_player_salary(p)
+        except Exception as e:
+            errors.append((p, repr(e)))
+            continue
+        players.append(p)
+        classes.append(position)
+        weights.append(salary)
+
+    values = eq.score_all(players, errors)
+    scored = np.isfinite(values)
+    return Candidates([p for p, ok in zip(players, scored) if ok],
+                      [c for c, ok in zip(classes, scored) if ok],
+                      values[scored],
+                      np.array(weights, dtype=float)[scored],
+                      errors)
+
 def main():
     parser = argparse.ArgumentParser(description='Find dat team.')
     parser.add_argument('stats', help='Directory containing all stats.')
-    parser.add_argument('--knapsack', help='Find a team using the modified knapsack approach.')
+    parser.add_argument('--knapsack', action='store_true', help='Find the optimal team using the modified knapsack approach.')
+    parser.add_argument('--lineups', type=int, default=1, help='Number of distinct lineups to find with --knapsack.')
+    parser.add_argument('--min-diff', type=int, default=1, help='Minimum number of players any two --lineups must differ by.')
     parser.add_argument('--mcmc', action='store_true', help='Find a team using the MCMC approach.')
+    parser.add_argument('--restarts', type=int, default=10, help='Number of simulated annealing restarts.')
+    parser.add_argument('--chains', type=int, default=None, help='Anneal this many chains at once as NumPy arrays instead of --restarts one at a time.')
+    parser.add_argument('--tempering', action='store_true', help='Search with parallel tempering (replica exchange) instead of annealing.')
+    parser.add_argument('--levels', type=int, default=16, help='Temperatures per --tempering ladder.')
+    parser.add_argument('--ladders', type=int, default=8, help='Independent --tempering ladders.')
+    parser.add_argument('--steps', type=int, default=4000, help='Steps of a --tempering search.')
+    parser.add_argument('--split', action='store_true', help='Solve one subproblem per starting pitcher, skipping pitchers that cannot beat the best team found (--restarts per pitcher when annealing).')
+    parser.add_argument('--workers', type=int, default=1, help='Processes to spread annealing restarts over (0 uses every core).')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed that makes a lineup search reproducible.')
+    parser.add_argument('--schedule', choices=['linear', 'geometric', 'adaptive'], default='geometric', help='Cooling schedule of every annealing restart.')
+    parser.add_argument('--reheat', type=int, default=None, help='Restart the cooling schedule after this many steps without a better team (at most 3 times).')
+    parser.add_argument('--patience', type=int, default=None, help='Stop a restart after this many steps without a better team.')
+    parser.add_argument('--time-limit', type=float, default=None, help='Stop a restart after this many seconds.')
+    parser.add_argument('--target', type=float, default=None, help='Stop a restart once it finds a team worth this many points.')
+    parser.add_argument('--years', type=int, nargs='+', default=[2014], help='Seasons of stats to load; the equations use the latest one.')
+    parser.add_argument('--lazy', action='store_true', help='Only read each family of player stats when it is first needed, ie by scoring.')
+    parser.add_argument('--snapshot-dir', default=None, help='Directory to keep the stats snapshots in (default: stadium_grinders/snapshots in $XDG_CACHE_HOME or ~/.cache).')
+    parser.add_argument('--no-snapshot', action='store_true', help='Parse every stats file instead of loading the snapshots of the last parse.')
+    parser.add_argument('--fixtures', default=None, help='Directory of saved lineup pages to read instead of the sites.')
+    parser.add_argument('--cache', default=None, help='Directory to cache lineup pages in (default: stadium_grinders/lineups in $XDG_CACHE_HOME or ~/.cache).')
+    parser.add_argument('--cache-ttl', type=int, default=300, help='Seconds a cached lineup page is used before checking the site again.')
+    parser.add_argument('--no-cache', action='store_true', help='Always fetch lineup pages from the sites.')
+    parser.add_argument('--html-parser', choices=['stream', 'soup'], default='stream', help='Parse lineup pages with the streaming parser or with BeautifulSoup.')
+    parser.add_argument('--profile', default=None, help='Record the time and memory of every stage and equation, print a summary and save it as JSON to this file.')
+    parser.add_argument('--pstats', default=None, help='Run under cProfile and dump the stats to this file for pstats.')
     args = parser.parse_args()
-
+    if args.split and args.lineups > 1:
+        parser.error('--split finds the single best lineup, it cannot be combined with --lineups')
+    if args.split and (args.chains or args.tempering):
+        parser.error('--split anneals --restarts per pitcher, it cannot be combined with --chains or --tempering')
+
+    if args.profile:
+        registry.enable()
+    if args.pstats:
+        run_profiled(args.pstats, findTeam, args)
+    else:
+        findTeam(args)
+    if args.profile:
+        print 'Profile'
+        registry.print_report()
+        registry.write_report(args.profile)
+
+def findTeam(args):
+    set_snapshot_dir(args.snapshot_dir)
     print 'Player Stats...'
-    player_stats = PlayerStats(args.stats)
+    with registry.stage('player stats'):
+        player_stats = PlayerStats(args.stats, use_snapshot=not args.no_snapshot, lazy=args.lazy, years=args.years)
     print 'Ballpark Stats...'
-    ballpark_stats = BallparkStats(args.stats)
+    with registry.stage('ballpark stats'):
+        ballpark_stats = BallparkStats(args.stats, use_snapshot=not args.no_snapshot)
     print 'Team Stats...'
-    team_stats = TeamStats(args.stats)
+    with registry.stage('team stats'):
+        team_stats = TeamStats(args.stats, use_snapshot=not args.no_snapshot, years=args.years)
     print 'League Stats...'
-    league_stats = LeagueStats(args.stats)
+    with registry.stage('league stats'):
+        league_stats = LeagueStats(args.stats, use_snapshot=not args.no_snapshot, years=args.years)
+
+    if args.fixtures:
+        fetcher = FixtureFetcher(args.fixtures)
+    else:
+        fetcher = UrlFetcher()
+        if not args.no_cache:
+            cache = args.cache or default_cache_dir()
+            fetcher = CachedFetcher(fetcher, cache, args.cache_ttl)
 
     print 'Parsing Rotogrinders...'
-    parseRotoGrinders(player_stats, team_stats)
+    with registry.stage('lineups'):
+        parseRotoGrinders(player_stats, team_stats, fetcher, html_parser=args.html_parser)
 
     # start computing some stats here
     print 'Computing Equations...'
@@ -267,42 +353,65 @@ def main():
     # classes = [playerget_player_teams.get_player_fielding_position(n) for n in names]
     # values = [players.get_score(n) for n in names]
     # weights = [players.get_player_salary(n) for n in names]
-    #
-    # if args.knapsack:
-    #     knapsack = ModifiedKnapsack(names, classes, values, weights, CAPACITY, TEAM_COMP)
-    #    #knapsack.find_solution()
-
-    from mcmc import TeamMCMC
-    candidate_players = list(player_stats.get_active_players())
-
-    names = []
-    classes = []
-    values = []
-    weights = []
-
-    for i,p in enumerate(candidate_players,1):
-        #Used to check how far we get through the names
-        try:
-            score = eq.get_score(p)
-        except:
-            print "ERROR: Couldn't get score for ", p
-            continue
-
-        #print '%d/%d %s %s %s' %(i, len(candidate_players), p, player_stats.get_player_team(p), player_stats.get_player_fielding_position(p)), score
-        names.append(p)
-        classes.append(player_stats.get_player_fielding_position(p))
-        values.append(eq.get_score(p))
-        weights.append(player_stats.get_player_salary(p))
 
-        #Print Statements for getting players and scores in csv format
-        #if player_stats.get_player_fielding_position(p) == 'P':
-        #    print p,',',eq.get_score(p),',',eq.pitcher_points_expected_for_win(p),',',eq.pitcher_points_expected_for_er(p),',',eq.pitcher_points_expected_for_k(p),',',eq.pitcher_expected_ip(p), ','
-        #else:
-        #    p,',',eq.get_score(p),',',eq.batter_points_expected_for_hits(p),',',eq.batter_points_expected_for_hr(p),',',eq.batter_points_expected_for_rbi(p),',',eq.batter_points_expected_for_runs(p),',',eq.batter_points_expected_for_sb(p),',',eq.batter_points_expected_for_walks(p),','
+    from mcmc import TeamMCMC, SCHEDULES, ReheatingSchedule, StopCriteria
+    from knapsack import ModifiedKnapsack
+    with registry.stage('scores'):
+        candidates = buildCandidates(player_stats, eq)
+    for p, message in candidates.errors:
+        print "ERROR: Couldn't get score for ", p, message
+    names, classes, values, weights = candidates.names, candidates.classes, candidates.values, candidates.weights
+
+    #Print Statements for getting players and scores in csv format
+    #for p in names:
+    #    if player_stats.get_player_fielding_position(p) == 'P':
+    #        print p,',',eq.get_score(p),',',eq.pitcher_points_expected_for_win(p),',',eq.pitcher_points_expected_for_er(p),',',eq.pitcher_points_expected_for_k(p),',',eq.pitcher_expected_ip(p), ','
+    #    else:
+    #        p,',',eq.get_score(p),',',eq.batter_points_expected_for_hits(p),',',eq.batter_points_expected_for_hr(p),',',eq.batter_points_expected_for_rbi(p),',',eq.batter_points_expected_for_runs(p),',',eq.batter_points_expected_for_sb(p),',',eq.batter_points_expected_for_walks(p),','
+
+    if args.knapsack:
+        knapsack = ModifiedKnapsack(names, classes, values, weights, CAPACITY, TEAM_COMP)
+        if args.lineups > 1:
+            with registry.stage('knapsack'):
+                solutions = knapsack.find_top_solutions(args.lineups, args.min_diff)
+            for i, solution in enumerate(solutions):
+                print 'Lineup ', i
+                print '$%d' % solution.cost, solution.value, solution.team
+        else:
+            with registry.stage('knapsack'):
+                if args.split:
+                    solutions = knapsack.find_split_solutions('P')
+                    solution = solutions[0] if solutions else None
+                else:
+                    solution = knapsack.find_solution()
+            if solution is None:
+                print 'ERROR: No team fits under the salary cap.'
+            else:
+                print 'Optimal Team'
+                print '$%d' % solution.cost, solution.value, solution.team
 
     if args.mcmc:
         mcmc = TeamMCMC(names, classes, values, weights, CAPACITY, TEAM_COMP)
-        mcmc.find_simulated_annealing_solution()
+        schedule = SCHEDULES[args.schedule]()
+        if args.reheat:
+            schedule = ReheatingSchedule(schedule, after=args.reheat)
+        stop = StopCriteria(args.patience, args.time_limit, args.target)
+        if mcmc.min_fill[mcmc.comp_counts] > CAPACITY:
+            print 'ERROR: No team fits under the salary cap.'
+            return
+        with registry.stage('mcmc'):
+            if args.tempering:
+                best = mcmc.find_tempering_solution(levels=args.levels, ladders=args.ladders, steps=args.steps, seed=args.seed, stop=stop)
+            elif args.chains:
+                best = mcmc.find_chain_annealing_solution(chains=args.chains, seed=args.seed, schedule=schedule, stop=stop)
+            elif args.split:
+                best = mcmc.find_split_annealing_solution('P', restarts=args.restarts, workers=args.workers, seed=args.seed,
+                                                          schedule=schedule, stop=stop)
+            else:
+                best = mcmc.find_simulated_annealing_solution(restarts=args.restarts, workers=args.workers, seed=args.seed,
+                                                              schedule=schedule, stop=stop)
+        print 'Best Team'
+        print '$%d' % best.cost, best.value, best.team
 
 
 if __name__ == '__main__':
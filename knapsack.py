@@ -1,11 +1,32 @@
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from fractions import gcd
+import heapq
+import math
+
+import numpy as np
+
+from profiling import registry, timed
+
+
+KnapsackSolution = namedtuple('KnapsackSolution', ['value', 'cost', 'team'])
+
+
+def _common_unit(numbers):
+    # largest unit every salary and the capacity are a whole multiple of
+    unit = 0
+    for n in numbers:
+        if n != int(n):
+            return 1
+        unit = gcd(unit, int(n))
+    return max(unit, 1)
 
 
 class ModifiedKnapsack:
 
-    def __init__(self, names, classes, values, weights, capacity, class_restrictions):
+    def __init__(self, names, classes, values, weights, capacity, class_restrictions, resolution=None):
 
         self.names = names
+        self.classes = classes
         self.all_classes = set(classes)
         self.values = values
         self.weights = weights
@@ -18,11 +39,214 @@ class ModifiedKnapsack:
         for i, n in enumerate(names):
             self.names_by_class[classes[i]].append(n)
 
+        # The DP runs over salary buckets of `resolution` dollars. By default that
+        # is the common unit of all salaries (100 on FanDuel), which keeps the
+        # solution exact; a coarser resolution rounds salaries up, so the lineup
+        # found is always affordable but may no longer be optimal.
+        if resolution is None:
+            resolution = _common_unit(list(weights) + [capacity])
+        self.resolution = resolution
+        self.units = [int(math.ceil(1.0 * w / resolution - 1e-9)) for w in weights]
+        self.capacity_units = int(math.floor(1.0 * capacity / resolution + 1e-9))
+
+        self.members_by_class = defaultdict(list)
+        for i, c in enumerate(classes):
+            if c in class_restrictions:
+                self.members_by_class[c].append(i)
+        self.table_cache = {}
+        self.table_cache_size = 256
+
     def name_ind(self, name):
         return self.name_index[name]
 
+    @timed('ModifiedKnapsack')
+    def _class_table(self, c, count, removed):
+        # Best value of exactly j players of class c (minus `removed`) costing
+        # exactly w units, for j <= count, as a 0/1 knapsack with a cardinality
+        # dimension. took[p][j] marks the w where player p improved dp[j] when it
+        # was added. Tables cover the full capacity and are cached, so solving a
+        # subproblem that only changes one class reuses every other class table.
+        key = (c, count, removed)
+        if key in self.table_cache:
+            registry.count('ModifiedKnapsack.table_cache_hits')
+            return self.table_cache[key]
+        if len(self.table_cache) >= self.table_cache_size:
+            self.table_cache.clear()
+
+        W = self.capacity_units
+        members = [i for i in self.members_by_class[c] if i not in removed]
+        dp = np.full((count + 1, W + 1), -np.inf)
+        dp[0, 0] = 0.0
+        took = []
+        for i in members:
+            u = self.units[i]
+            took_i = np.zeros((count + 1, W + 1), dtype=bool)
+            if u <= W:
+                for j in range(count, 0, -1):
+                    candidate = dp[j - 1, :W + 1 - u] + self.values[i]
+                    better = candidate > dp[j, u:]
+                    dp[j, u:][better] = candidate[better]
+                    took_i[j, u:] = better
+            took.append(took_i)
+
+        self.table_cache[key] = (dp[count], members, took)
+        return self.table_cache[key]
+
+    def _class_players(self, members, took, count, w):
+        chosen = []
+        j = count
+        for p in range(len(members) - 1, -1, -1):
+            if j == 0:
+                break
+            if took[p][j, w]:
+                chosen.append(members[p])
+                j -= 1
+                w -= self.units[members[p]]
+        return chosen
+
+    def _convolve(self, forced, excluded, class_restrictions):
+        # Best value of the classes in class_restrictions for every total salary
+        # w, with every player in `forced` and none in `excluded`, as (best,
+        # steps) for _team_at, or None if a class can't be filled.
+        # Exact multiple-choice DP: a table per class of the best value for each
+        # total salary, then a max-plus convolution of the class tables.
+        W = self.capacity_units - sum(self.units[i] for i in forced)
+        if W < 0:
+            return None
+
+        best = np.full(W + 1, -np.inf)
+        best[0] = 0.0
+        steps = []
+        for c, count in class_restrictions.items():
+            in_class = [i for i in forced if self.classes[i] == c]
+            removed = frozenset(i for i in excluded | forced if self.classes[i] == c)
+            remaining = count - len(in_class)
+            if remaining < 0 or len(self.members_by_class[c]) - len(removed) < remaining:
+                return None
+            table, members, took = self._class_table(c, remaining, removed)
+            table = table[:W + 1]
+
+            # convolve over whichever of the two tables has fewer reachable costs
+            combined = np.full(W + 1, -np.inf)
+            split = np.zeros(W + 1, dtype=int)
+            best_support = np.flatnonzero(best > -np.inf)
+            table_support = np.flatnonzero(table > -np.inf)
+            if len(best_support) <= len(table_support):
+                for a in best_support:
+                    candidate = best[a] + table[:W + 1 - a]
+                    better = candidate > combined[a:]
+                    combined[a:][better] = candidate[better]
+                    split[a:][better] = a
+            else:
+                for b in table_support:
+                    candidate = best[:W + 1 - b] + table[b]
+                    better = candidate > combined[b:]
+                    combined[b:][better] = candidate[better]
+                    split[b:][better] = np.flatnonzero(better)
+            best = combined
+            steps.append((members, took, remaining, split))
+        return best, steps
+
+    def _team_at(self, forced, steps, w):
+        # the players of the convolved classes that make up best[w], plus forced
+        team = list(forced)
+        for members, took, remaining, split in reversed(steps):
+            a = split[w]
+            team.extend(self._class_players(members, took, remaining, w - a))
+            w = a
+        return sorted(team)
+
+    @timed('ModifiedKnapsack')
+    def _solve(self, forced, excluded):
+        # Best lineup containing every player in `forced` and none in `excluded`,
+        # as a sorted list of player indices, or None if nothing fits.
+        convolved = self._convolve(forced, excluded, self.class_restrictions)
+        if convolved is None:
+            return None
+        best, steps = convolved
+        if not np.isfinite(best).any():
+            return None
+        return self._team_at(forced, steps, int(np.argmax(best)))
+
+    def _solution(self, team):
+        return KnapsackSolution(sum(self.values[i] for i in team),
+                                sum(self.weights[i] for i in team),
+                                sorted(self.names[i] for i in team))
+
+    @timed('ModifiedKnapsack')
     def find_solution(self):
-        start = min(self.values)
+        team = self._solve(frozenset(), frozenset())
+        if team is None:
+            return None
+        return self._solution(team)
+
+    @timed('ModifiedKnapsack')
+    def find_split_solutions(self, split_class='P'):
+        # The best lineup for every player of split_class, a class the lineup
+        # holds exactly one of (the starting pitcher), best first. Each is that
+        # player plus the best lineup of the other classes under the cap minus
+        # their salary. Those subproblems only differ in the cap, so the other
+        # classes are convolved once, and a running max over the table solves
+        # every player's subproblem, rather than running one DP per player.
+        if self.class_restrictions.get(split_class) != 1:
+            raise ValueError('The lineup must hold exactly one %s to split on it' % split_class)
+        rest = dict((c, count) for c, count in self.class_restrictions.items() if c != split_class)
+        convolved = self._convolve(frozenset(), frozenset(), rest)
+        if convolved is None:
+            return []
+        best, steps = convolved
+
+        # reach[w] is the best value costing at most w, found at best[at[w]]
+        reach = np.maximum.accumulate(best)
+        at = np.maximum.accumulate(np.where(best == reach, np.arange(len(best)), 0))
+        solutions = []
+        for i in self.members_by_class[split_class]:
+            w = self.capacity_units - self.units[i]
+            if w >= 0 and reach[w] > -np.inf:
+                solutions.append(self._solution(self._team_at([i], steps, at[w])))
+        return sorted(solutions, key=lambda s: -s.value)
+
+    @timed('ModifiedKnapsack')
+    def find_top_solutions(self, k, min_diff=1):
+        # The k best lineups that each differ from every better lineup in at least
+        # min_diff players, best first. Uses Lawler's partitioning: once a
+        # subproblem's optimum S = s_1..s_n is popped, the rest of that subproblem
+        # splits into disjoint children that force s_1..s_i-1 in and s_i out, each
+        # solved exactly. Children whose forced players already overlap an
+        # accepted lineup too much can never yield an acceptable lineup and are
+        # dropped without solving.
+        size = sum(self.class_restrictions.values())
+        max_overlap = size - min_diff
+        accepted = []
+
+        def too_close(players):
+            return any(len(players & lineup) > max_overlap for lineup in accepted)
+
+        heap = []
+        counter = 0
+        root = self._solve(frozenset(), frozenset())
+        if root is not None:
+            heapq.heappush(heap, (-self._team_value(root), counter, root, frozenset(), frozenset()))
+
+        while heap and len(accepted) < k:
+            neg_value, _, team, forced, excluded = heapq.heappop(heap)
+            if too_close(forced):
+                continue
+            if not too_close(set(team)):
+                accepted.append(set(team))
+
+            free = [i for i in team if i not in forced]
+            for n, i in enumerate(free):
+                child_forced = forced | frozenset(free[:n])
+                child_excluded = excluded | frozenset([i])
+                if too_close(child_forced):
+                    continue
+                child = self._solve(child_forced, child_excluded)
+                if child is not None:
+                    counter += 1
+                    heapq.heappush(heap, (-self._team_value(child), counter, child, child_forced, child_excluded))
+
+        return [self._solution(sorted(lineup)) for lineup in accepted]
 
-        for c, names in self.names_by_class.items():
-            print c, len(names), names
\ No newline at end of file
+    def _team_value(self, team):
+        return sum(self.values[i] for i in team)
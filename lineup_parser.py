@@ -0,0 +1,133 @@
+from HTMLParser import HTMLParser
+from collections import namedtuple
+
+
+# The text of the RotoGrinders lineup nodes parseRotoGrinders reads for one
+# game: the header's match-teams div, every div.team, the li.player items of
+# each ul.lineup-list, and the first div.away and div.home (None when missing).
+GameText = namedtuple('GameText', ['match_teams', 'teams', 'lineups', 'away', 'home'])
+
+# elements that never have an end tag
+VOID_ELEMENTS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                           'keygen', 'link', 'meta', 'param', 'source', 'track', 'wbr'])
+
+
+class LineupPageParser(HTMLParser):
+
+    # Streams a lineup page once and only keeps the text of the nodes above,
+    # instead of building the whole tree. Text goes to every open capture, so a
+    # capture holds the same text as the node's .text in BeautifulSoup.
+    def __init__(self):
+        HTMLParser.__init__(self)
+        self.stack = []         # (tag, captures the element opened, scope it opened)
+        self.captures = []      # text buffers of the open captured nodes
+        self.schedules = []     # headers and grids of every ul.schedule-list
+        self.in_schedule = 0
+        self.header = None
+        self.grid = None
+        self.lineup = None
+
+    def handle_starttag(self, tag, attrs):
+        classes = set()
+        for name, value in attrs:
+            if name == 'class' and value:
+                classes.update(value.split())
+
+        opened = []
+        scope = None
+        if tag == 'ul' and 'schedule-list' in classes:
+            self.in_schedule += 1
+            self.schedules.append({'headers': [], 'grids': []})
+            scope = 'schedule'
+        elif self.in_schedule:
+            if tag == 'header':
+                self.header = {'match_teams': None}
+                self.schedules[-1]['headers'].append(self.header)
+                scope = 'header'
+            elif tag == 'div' and 'grid-3-3' in classes:
+                self.grid = {'teams': [], 'lineups': [], 'away': None, 'home': None}
+                self.schedules[-1]['grids'].append(self.grid)
+                scope = 'grid'
+
+            if self.header is not None and tag == 'div' and 'match-teams' in classes and self.header['match_teams'] is None:
+                self.header['match_teams'] = []
+                opened.append(self.header['match_teams'])
+            if self.grid is not None:
+                if tag == 'div' and 'team' in classes:
+                    self.grid['teams'].append([])
+                    opened.append(self.grid['teams'][-1])
+                if tag == 'ul' and 'lineup-list' in classes:
+                    self.lineup = []
+                    self.grid['lineups'].append(self.lineup)
+                    scope = 'lineup'
+                if tag == 'li' and 'player' in classes and self.lineup is not None:
+                    self.lineup.append([])
+                    opened.append(self.lineup[-1])
+                for side in ('away', 'home'):
+                    if tag == 'div' and side in classes and self.grid[side] is None:
+                        self.grid[side] = []
+                        opened.append(self.grid[side])
+
+        self.captures.extend(opened)
+        self.stack.append((tag, opened, scope))
+        if tag in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        # close every element left open inside this one, as a browser would
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                while len(self.stack) > i:
+                    name, opened, scope = self.stack.pop()
+                    self._close(opened, scope)
+                return
+
+    def _close(self, opened, scope):
+        # elements close in reverse order, so their captures are the last ones
+        if opened:
+            del self.captures[-len(opened):]
+        if scope == 'schedule':
+            self.in_schedule -= 1
+        elif scope == 'header':
+            self.header = None
+        elif scope == 'grid':
+            self.grid = None
+            self.lineup = None
+        elif scope == 'lineup':
+            self.lineup = None
+
+    def handle_data(self, data):
+        for buf in self.captures:
+            buf.append(data)
+
+    def handle_entityref(self, name):
+        self.handle_data(self.unescape('&%s;' % name))
+
+    def handle_charref(self, name):
+        self.handle_data(self.unescape('&#%s;' % name))
+
+    def games(self):
+        # headers and grids of a schedule list pair up in page order, like zip()
+        # in parseRotoGrinders
+        def text(buf):
+            return None if buf is None else u''.join(buf)
+
+        games = []
+        for schedule in self.schedules:
+            for header, grid in zip(schedule['headers'], schedule['grids']):
+                games.append(GameText(text(header['match_teams']),
+                                      [text(t) for t in grid['teams']],
+                                      [[text(p) for p in lineup] for lineup in grid['lineups']],
+                                      text(grid['away']),
+                                      text(grid['home'])))
+        return games
+
+
+def parse_lineup_page(doc):
+    # GameText of every game on a lineup page
+    if isinstance(doc, str):
+        doc = doc.decode('utf-8', 'replace')
+    parser = LineupPageParser()
+    parser.feed(doc)
+    parser.close()
+    return parser.games()
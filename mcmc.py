@@ -1,15 +1,156 @@
-from random import choice, shuffle, random
-from collections import defaultdict
-from math import exp
-from numpy import arange
+from random import Random
+from collections import defaultdict, deque, namedtuple
+from multiprocessing import Pool, cpu_count
+from bisect import bisect_right
+from itertools import product
+from math import log
+import time
+import numpy as np
 from stat_parsers.player_stats import PlayerStats
+from profiling import registry, timed
 
 import argparse
 
-class TeamMCMC:
 
-    def __init__(self, names, classes, values, costs, capacity, object_composition):
+# outcome of one annealing restart; seed reproduces it exactly
+AnnealingResult = namedtuple('AnnealingResult', ['value', 'cost', 'team', 'seed', 'steps'])
 
+# when a restart stops before its schedule runs out: after `patience` steps
+# without a better team, after `time_limit` seconds, or once a team is worth
+# `target`. None turns a criterion off.
+StopCriteria = namedtuple('StopCriteria', ['patience', 'time_limit', 'target'])
+NO_STOP = StopCriteria(None, None, None)
+
+# uniforms TeamMCMC draws from numpy at a time
+RNG_BLOCK = 4096
+
+# how the replicas at one parallel tempering temperature did: the share of
+# proposals they accepted, the share of swaps with the next hotter temperature
+# accepted (None for the hottest), and the mean and best team values seen there.
+# Everything but temp is None when no step was taken.
+TemperingStats = namedtuple('TemperingStats', ['temp', 'acceptance', 'swap_acceptance', 'mean_value', 'best_value'])
+
+
+class AnnealingProgress(object):
+
+    # What a restart has done so far. Schedules read it while they hand out
+    # temperatures, which is how the adaptive and reheating schedules react.
+    def __init__(self):
+        self.steps = 0
+        self.accepted = 0
+        self.since_improvement = 0
+
+
+class LinearSchedule(object):
+
+    # start, start - step, ... down to (not including) end: the original
+    # schedule, 4000 steps from 1000 by default. It stays hot for almost all
+    # of them, so it only did well while should_transition never accepted a
+    # worse team; the default is now GeometricSchedule.
+    def __init__(self, start=1000.0, end=0.0, step=0.25):
+        self.start = start
+        self.end = end
+        self.step = step
+
+    def temperatures(self, progress):
+        k = 0
+        while self.start - k * self.step > self.end:
+            yield self.start - k * self.step
+            k += 1
+
+
+class GeometricSchedule(object):
+
+    # start, start * alpha, start * alpha^2, ... while above end. Spends most of
+    # its steps at low temperatures, where swaps are mostly improvements.
+    def __init__(self, start=1000.0, end=0.05, alpha=0.9975):
+        self.start = start
+        self.end = end
+        self.alpha = alpha
+
+    def temperatures(self, progress):
+        temp = self.start
+        while temp > self.end:
+            yield temp
+            temp *= self.alpha
+
+
+class AdaptiveSchedule(object):
+
+    # Cools geometrically, but every `window` steps compares the share of
+    # accepted swaps with a target acceptance rate that falls from
+    # target_start to target_end over max_steps: cooling speeds up while too
+    # many swaps are accepted and slows down while too few are. Ends after max_steps
+    # or once the temperature falls below end.
+    def __init__(self, start=1000.0, end=0.05, max_steps=4000, window=50, target_start=0.5, target_end=0.01, alpha=0.99):
+        self.start = start
+        self.end = end
+        self.max_steps = max_steps
+        self.window = window
+        self.target_start = target_start
+        self.target_end = target_end
+        self.alpha = alpha
+
+    def temperatures(self, progress):
+        temp = self.start
+        accepted = progress.accepted
+        for k in range(self.max_steps):
+            if temp <= self.end:
+                return
+            yield temp
+            if (k + 1) % self.window == 0:
+                rate = 1.0 * (progress.accepted - accepted) / self.window
+                accepted = progress.accepted
+                target = self.target_start * (self.target_end / self.target_start) ** (1.0 * k / self.max_steps)
+                if rate > target:
+                    temp *= self.alpha ** self.window
+                else:
+                    temp *= self.alpha ** (self.window / 4)
+
+
+class ReheatingSchedule(object):
+
+    # Runs `schedule`, and starts it over from the top whenever `after` steps
+    # pass without a better team, at most `times` times.
+    def __init__(self, schedule, after=500, times=3):
+        self.schedule = schedule
+        self.after = after
+        self.times = times
+
+    def temperatures(self, progress):
+        reheats = 0
+        while True:
+            for temp in self.schedule.temperatures(progress):
+                yield temp
+                if progress.since_improvement >= self.after and reheats < self.times:
+                    break
+            else:
+                return
+            reheats += 1
+            progress.since_improvement = 0
+
+
+SCHEDULES = {'linear': LinearSchedule,
+             'geometric': GeometricSchedule,
+             'adaptive': AdaptiveSchedule}
+
+# the TeamMCMC each pool worker anneals with, set once per worker process
+_worker_mcmc = None
+
+def _init_worker(mcmc):
+    global _worker_mcmc
+    _worker_mcmc = mcmc
+
+def _run_restart(seed):
+    return _worker_mcmc.anneal(seed)
+
+def _run_subproblem(job):
+    return _worker_mcmc.anneal_under(*job)
+
+
+class TeamMCMC(object):
+
+    def __init__(self, names, classes, values, costs, capacity, object_composition, seed=None):
 
         self.names = names
         self.values = dict(zip(names, values))
@@ -20,92 +161,657 @@ class TeamMCMC:
         for c, count in object_composition.items():
             self.valid_comp.extend([c]*count)
 
-        self.available_names_by_class = defaultdict(list)
-        for i, n in enumerate(names):
-            self.available_names_by_class[classes[i]].append(n)
+        # internally every player is an integer index into these lists
+        self.index = dict((n, i) for i, n in enumerate(names))
+        self.value_of = list(values)
+        self.cost_of = list(costs)
+        self.class_of = list(classes)
+
+        # per-class arrays of the players not on the team. position[i] is where
+        # player i sits in its class array (or in self.team when on_team[i]),
+        # which makes removal a swap with the last element instead of a search.
+        self.available_by_class = defaultdict(list)
+        self.position = [0] * len(names)
+        for i, c in enumerate(classes):
+            self.position[i] = len(self.available_by_class[c])
+            self.available_by_class[c].append(i)
+        self.on_team = [False] * len(names)
+
+        # every candidate of a class ordered by cost, so the candidates that fit
+        # under a given budget are always a prefix found by binary search
+        self.sorted_by_class = {}
+        self.sorted_costs_by_class = {}
+        for c, members in self.available_by_class.items():
+            ordered = sorted(members, key=lambda i: self.cost_of[i])
+            self.sorted_by_class[c] = ordered
+            self.sorted_costs_by_class[c] = [self.cost_of[i] for i in ordered]
+
+        # The least the players still missing can cost, for every multiset of
+        # roster slots that can be missing, keyed by the count missing of each
+        # class in self.comp_classes. A class's cheapest n players cost the same
+        # whatever the other classes hold, so each entry is a sum of per-class
+        # prefix sums; inf when a class has fewer than n players.
+        self.comp_classes = sorted(object_composition)
+        cheapest = {}
+        for c in self.comp_classes:
+            costs = self.sorted_costs_by_class.get(c, [])
+            cheapest[c] = [sum(costs[:n]) if n <= len(costs) else float('inf')
+                           for n in range(object_composition[c] + 1)]
+        self.min_fill = {}
+        for missing in product(*[range(object_composition[c] + 1) for c in self.comp_classes]):
+            self.min_fill[missing] = sum(cheapest[c][n] for c, n in zip(self.comp_classes, missing))
+        self.comp_counts = tuple(object_composition[c] for c in self.comp_classes)
+
+        self.rng = Random(seed)
+
+        # Swap proposals and acceptance tests draw their uniforms from numpy in
+        # blocks of RNG_BLOCK, instead of one Python-level call per draw, see
+        # uniform(). Seeded together with self.rng by anneal.
+        self.np_rng = np.random.RandomState(seed)
+        self.uniforms = []
+        self.next_uniform = 0
+
+        # how anneal cools and when it stops early, see find_simulated_annealing_solution
+        self.schedule = GeometricSchedule()
+        self.stop = NO_STOP
+
+        # (prices, totals) of upper_bound, computed on first use
+        self.relaxation = None
 
         # current team status to be updated during MCMC
-        self.current_team = []
+        self.team = []
         self.current_value = None
         self.current_cost = None
 
+    @property
+    def current_team(self):
+        return [self.names[i] for i in self.team]
+
     def get_available(self, object_class):
-        return self.available_names_by_class[object_class]
+        return [self.names[i] for i in self.available_by_class[object_class]]
+
+    def _take(self, i):
+        # move player i from its class array to the end of the team
+        available = self.available_by_class[self.class_of[i]]
+        last = available.pop()
+        if last != i:
+            available[self.position[i]] = last
+            self.position[last] = self.position[i]
+        self.position[i] = len(self.team)
+        self.team.append(i)
+        self.on_team[i] = True
+        self.current_value += self.value_of[i]
+        self.current_cost += self.cost_of[i]
+
+    def _release(self, i):
+        # move player i from the team to the end of its class array
+        last = self.team.pop()
+        if last != i:
+            self.team[self.position[i]] = last
+            self.position[last] = self.position[i]
+        available = self.available_by_class[self.class_of[i]]
+        self.position[i] = len(available)
+        available.append(i)
+        self.on_team[i] = False
+        self.current_value -= self.value_of[i]
+        self.current_cost -= self.cost_of[i]
+
+    def _swap(self, old, new):
+        # old and new trade places between the team and their shared class array
+        slot = self.position[old]
+        self.team[slot] = new
+        self.available_by_class[self.class_of[new]][self.position[new]] = old
+        self.position[old] = self.position[new]
+        self.position[new] = slot
+        self.on_team[old] = False
+        self.on_team[new] = True
+        self.current_value += self.value_of[new] - self.value_of[old]
+        self.current_cost += self.cost_of[new] - self.cost_of[old]
 
     def add_player(self, name):
-        self.current_team.append(name)
-        self.available_names_by_class[self.classes[name]].remove(name)
-        self.current_value += self.values[name]
-        self.current_cost += self.costs[name]
+        self._take(self.index[name])
 
     def remove_player(self, name):
-        self.current_team.remove(name)
-        self.available_names_by_class[self.classes[name]].append(name)
-        self.current_value -= self.values[name]
-        self.current_cost -= self.costs[name]
+        self._release(self.index[name])
 
+    @timed('TeamMCMC')
     def make_random_team(self):
-        team_found = False
+        # Fills the classes in random order, one class at a time, and only ever
+        # picks a player that leaves the lineup completable: one pass, no retries.
+        # While class c is filled, every later class is untouched, so the cheapest
+        # way to finish them is exactly self.min_fill. Within c, a candidate fits
+        # if it plus the cheapest free players for c's other open slots fit in
+        # what is left for c; those candidates are a prefix of c's cost order.
         self.clear_team()
-        while len(self.current_team) < len(self.valid_comp):
-            self.clear_team()
-            random_comp = list(self.valid_comp)
-            shuffle(random_comp)
-            for new_class in random_comp:
-                candidates = [name for name in self.get_available(new_class) if (self.costs[name] + self.current_cost) <= self.capacity]
-                if len(candidates) > 0:
-                    self.add_player(choice(candidates))
+        # min_fill is inf when a class has too few players, whatever the cap
+        if self.min_fill[self.comp_counts] > self.capacity or self.min_fill[self.comp_counts] == float('inf'):
+            raise ValueError('No team fits under the salary cap')
+
+        missing = dict(zip(self.comp_classes, self.comp_counts))
+        order = list(self.comp_classes)
+        self.rng.shuffle(order)
+        for c in order:
+            count, missing[c] = missing[c], 0
+            budget = self.capacity - self.current_cost - self.min_fill[tuple(missing[x] for x in self.comp_classes)]
+            for n in range(count - 1, -1, -1):
+                free = [i for i in self.sorted_by_class[c] if not self.on_team[i]]
+                costs = [self.cost_of[i] for i in free]
+                fits = max(bisect_right(costs, budget - sum(costs[:n])), n + 1)
+                i = free[self.rng.randrange(fits)]
+                budget -= self.cost_of[i]
+                self._take(i)
 
     def clear_team(self):
-        for name in self.current_team:
-            self.available_names_by_class[self.classes[name]].append(name)
-        self.current_team = []
+        while self.team:
+            self._release(self.team[-1])
         self.current_value = 0
         self.current_cost = 0
 
-    def get_neighbor(self):
+    def sample_swap(self, max_rejections=100):
+        # Draws a uniformly random (old, new) swap that fits under the cap without
+        # enumerating the pool. For each roster spot, the affordable candidates of
+        # its class are a prefix of the cost-sorted class list, so a draw over the
+        # combined prefix lengths picks a pair uniformly; pairs whose candidate is
+        # already on the team are rejected and redrawn. None when no swap fits.
+        affordable = []
+        total = 0
+        for i in self.team:
+            budget = self.capacity - self.current_cost + self.cost_of[i]
+            count = bisect_right(self.sorted_costs_by_class[self.class_of[i]], budget)
+            affordable.append(count)
+            total += count
+
+        if total > 0:
+            for attempt in range(max_rejections):
+                r = int(self.uniform() * total)
+                for old, count in zip(self.team, affordable):
+                    if r < count:
+                        break
+                    r -= count
+                new = self.sorted_by_class[self.class_of[old]][r]
+                if not self.on_team[new]:
+                    return old, new
+
+        # almost every affordable candidate is already on the team
+        return self.enumerate_swap()
+
+    def enumerate_swap(self):
+        # every affordable swap, one drawn uniformly; None when the team has no
+        # neighbor at all, which happens on slates that barely fit the cap
         neighbors = []
-        for name in self.current_team:
-            for candidate in self.get_available(self.classes[name]):
-                if (self.current_cost - self.costs[name] + self.costs[candidate]) <= self.capacity:
-                    neighbors.append( (name, candidate) )
-        old, new = choice(neighbors)
-        return old, new
+        for old in self.team:
+            for new in self.sorted_by_class[self.class_of[old]]:
+                if not self.on_team[new] and (self.current_cost - self.cost_of[old] + self.cost_of[new]) <= self.capacity:
+                    neighbors.append( (old, new) )
+        if not neighbors:
+            return None
+        return neighbors[int(self.uniform() * len(neighbors))]
+
+    def get_neighbor(self):
+        swap = self.sample_swap()
+        if swap is None:
+            return None
+        old, new = swap
+        return self.names[old], self.names[new]
+
+    def enumerate_neighbor(self):
+        swap = self.enumerate_swap()
+        if swap is None:
+            return None
+        old, new = swap
+        return self.names[old], self.names[new]
 
     def transition_to_neighbor(self, old_name, new_name):
-        # remove old_name from the team
-        self.current_team.remove(old_name)
-        self.available_names_by_class[self.classes[old_name]].append(old_name)
-        self.current_cost -= self.costs[old_name]
-        self.current_value -= self.values[old_name]
-
-        # add new_name to the team
-        self.current_team.append(new_name)
-        self.available_names_by_class[self.classes[new_name]].remove(new_name)
-        self.current_cost += self.costs[new_name]
-        self.current_value += self.values[new_name]
+        self._swap(self.index[old_name], self.index[new_name])
 
     def print_team(self):
         print '$%d' % self.current_cost, self.current_value, sorted(self.current_team)
 
+    def uniform(self):
+        # next uniform in [0, 1) of the current block, drawing a new block when
+        # this one runs out
+        if self.next_uniform == len(self.uniforms):
+            self.uniforms = self.np_rng.random_sample(RNG_BLOCK).tolist()
+            self.next_uniform = 0
+        self.next_uniform += 1
+        return self.uniforms[self.next_uniform - 1]
+
     def should_transition(self, old_val, new_val, temp):
+        # Metropolis test, in log space: accept a worse team with probability
+        # exp((new_val - old_val) / temp), ie when log(u) * temp < new_val - old_val
         if old_val < new_val:
             return True
-        delta = old_val - new_val
-        if random < exp(1.0*delta/temp):
-            return True
+        return log(1.0 - self.uniform()) * temp < new_val - old_val
+
+    @timed('TeamMCMC')
+    def anneal(self, seed=None):
+        # One restart: a random team, then swaps under self.schedule until it runs
+        # out or self.stop says so. Returns the best team seen on the way.
+        # The acceptance thresholds log(u) come a block at a time, one per step
+        # whether or not the step needs it, so a seed always replays the same run.
+        self.rng.seed(seed)
+        self.np_rng.seed(seed)
+        self.uniforms, self.next_uniform = [], 0
+        self.make_random_team()
+        progress = AnnealingProgress()
+        best_value, best_team = self.current_value, list(self.team)
+        patience, time_limit, target = self.stop
+        deadline = time.time() + time_limit if time_limit is not None else None
+        thresholds, t = [], 0
+
+        for temp in self.schedule.temperatures(progress):
+            if t == len(thresholds):
+                thresholds = np.log1p(-self.np_rng.random_sample(RNG_BLOCK)).tolist()
+                t = 0
+            swap = self.sample_swap()
+            if swap is None:
+                # no swap fits, and none ever will since the team can't change
+                break
+            old, new = swap
+            delta = self.value_of[new] - self.value_of[old]
+            progress.steps += 1
+            progress.since_improvement += 1
+            accept = delta > 0 or thresholds[t] * temp < delta
+            t += 1
+            if accept:
+                self._swap(old, new)
+                progress.accepted += 1
+                if self.current_value > best_value:
+                    best_value, best_team = self.current_value, list(self.team)
+                    progress.since_improvement = 0
+                    if target is not None and best_value >= target:
+                        break
+            if patience is not None and progress.since_improvement >= patience:
+                break
+            if deadline is not None and progress.steps % 64 == 0 and time.time() > deadline:
+                break
+
+        registry.count('TeamMCMC.steps', progress.steps)
+        registry.count('TeamMCMC.accepted', progress.accepted)
+        return AnnealingResult(best_value,
+                               sum(self.cost_of[i] for i in best_team),
+                               sorted(self.names[i] for i in best_team),
+                               seed,
+                               progress.steps)
+
+    @timed('TeamMCMC')
+    def find_simulated_annealing_solution(self, restarts=10, workers=1, seed=None, schedule=None, stop=None):
+        # Every restart gets its own seed drawn from `seed`, so a run is
+        # reproducible no matter how many workers share the restarts (as long as
+        # no restart is cut short by stop.time_limit).
+        self.schedule = schedule or GeometricSchedule()
+        self.stop = stop or NO_STOP
+        seed_rng = Random(seed)
+        seeds = [seed_rng.getrandbits(32) for i in range(restarts)]
+
+        if workers is None or workers < 1:
+            workers = cpu_count()
+        if workers > 1:
+            pool = Pool(min(workers, restarts), initializer=_init_worker, initargs=(self,))
+            try:
+                results = pool.map(_run_restart, seeds)
+            finally:
+                pool.close()
+                pool.join()
         else:
-            return False
+            results = [self.anneal(s) for s in seeds]
 
-    def find_simulated_annealing_solution(self):
-        for i in range(10):
+        for i, result in enumerate(results):
             print 'Stadium Grinders Team ',i
-            self.make_random_team()
-            for temp in arange(1000, 0, -0.25):
-                old_name, new_name = self.get_neighbor()
-                new_team_value = self.current_value - self.values[old_name] + self.values[new_name]
-                if self.should_transition(self.current_value, new_team_value, temp):
-                    self.transition_to_neighbor(old_name, new_name)
-                else:
-                    continue
-            self.print_team()
\ No newline at end of file
+            print '$%d' % result.cost, result.value, result.team
+
+        return max(results, key=lambda r: r.value)
+
+    def split_rest(self, split_class):
+        # a TeamMCMC over the players of every class but split_class
+        rest = [i for i in range(len(self.names)) if self.class_of[i] != split_class]
+        composition = dict((c, count) for c, count in zip(self.comp_classes, self.comp_counts) if c != split_class)
+        return TeamMCMC([self.names[i] for i in rest],
+                        [self.class_of[i] for i in rest],
+                        [self.value_of[i] for i in rest],
+                        [self.cost_of[i] for i in rest],
+                        self.capacity, composition)
+
+    def upper_bound(self, capacity):
+        # At least the value of the best team under capacity, or -inf if no team
+        # fits, from the Lagrangian relaxation of the cap: for any price lam >= 0
+        # of a dollar of salary, lam * capacity plus the sum over classes of
+        # their best players by value - lam * cost is an upper bound. Takes the
+        # least over a grid of prices, which is within a point or so of the
+        # best team on the benchmark slates.
+        if self.min_fill[self.comp_counts] > capacity:
+            return float('-inf')
+        if self.relaxation is None:
+            values = np.array(self.value_of, dtype=float)
+            costs = np.array(self.cost_of, dtype=float)
+            paid = costs > 0
+            top_price = max((values[paid] / costs[paid]).max(), 0.0) if paid.any() else 0.0
+            prices = np.linspace(0.0, top_price, 128)
+            totals = np.zeros(len(prices))
+            for c, count in zip(self.comp_classes, self.comp_counts):
+                members = self.sorted_by_class[c]
+                priced = values[members][None, :] - prices[:, None] * costs[members][None, :]
+                totals += np.sort(priced, axis=1)[:, -count:].sum(axis=1)
+            self.relaxation = prices, totals
+        prices, totals = self.relaxation
+        return float((prices * capacity + totals).min())
+
+    def anneal_under(self, capacity, seeds):
+        # the best of one restart per seed with the cap lowered to capacity
+        full, self.capacity = self.capacity, capacity
+        try:
+            return max([self.anneal(s) for s in seeds], key=lambda r: r.value)
+        finally:
+            self.capacity = full
+
+    @timed('TeamMCMC')
+    def find_split_annealing_solution(self, split_class='P', restarts=2, workers=1, seed=None, schedule=None, stop=None, margin=0.5, rounds=4):
+        # Splits the search on split_class, a class the team holds exactly one
+        # of (the starting pitcher): for each of its players, `restarts` restarts
+        # over the other classes (split_rest) under the cap minus that player's
+        # salary. Subproblems start best upper bound first, as soon as one of
+        # `workers` processes is free.
+        #
+        # A subproblem's bound, the player's value plus the rest's upper_bound,
+        # is a proven ceiling on its teams, so one whose bound is no more than
+        # the value of a team already found can't hold a better team and is
+        # skipped, along with every later one. The teams annealing finds are not
+        # proven best though: a subproblem can hold a team well above the best
+        # found. So the search runs in up to `rounds` rounds, and each round after
+        # the first gives `restarts` more restarts to every subproblem whose bound
+        # is still more than `margin` above the best team found; it ends early
+        # once none is. Which subproblems run depends on how many run at once, so
+        # a run is reproducible from its seed and number of workers.
+        if dict(zip(self.comp_classes, self.comp_counts)).get(split_class) != 1:
+            raise ValueError('The team must hold exactly one %s to split on it' % split_class)
+        rest = self.split_rest(split_class)
+        rest.schedule = schedule or GeometricSchedule()
+        rest.stop = stop or NO_STOP
+
+        subproblems = []
+        for i in self.sorted_by_class.get(split_class, []):
+            capacity = self.capacity - self.cost_of[i]
+            bound = self.value_of[i] + rest.upper_bound(capacity)
+            if bound > float('-inf'):
+                subproblems.append((bound, i, capacity))
+        if not subproblems:
+            raise ValueError('No team fits under the salary cap')
+        subproblems.sort(reverse=True)
+        seed_rng = Random(seed)
+
+        if workers is None or workers < 1:
+            workers = cpu_count()
+        workers = min(workers, len(subproblems))
+        pool = Pool(workers, initializer=_init_worker, initargs=(rest,)) if workers > 1 else None
+        best = None
+        searched = set()
+        runs = 0
+        running = deque()     # (player, result) oldest first; pool results are AsyncResults
+        try:
+            for r in range(rounds):
+                slack = margin if r else 0.0
+                started = 0
+                for bound, i, capacity in subproblems:
+                    while len(running) >= workers:
+                        best = self._best_with(best, *running.popleft())
+                    if best is not None and bound <= best.value + slack:
+                        # bounds only fall from here on
+                        break
+                    subproblem_seeds = [seed_rng.getrandbits(32) for k in range(restarts)]
+                    if pool:
+                        running.append((i, pool.apply_async(_run_subproblem, ((capacity, subproblem_seeds),))))
+                    else:
+                        running.append((i, rest.anneal_under(capacity, subproblem_seeds)))
+                    searched.add(i)
+                    started += 1
+                while running:
+                    best = self._best_with(best, *running.popleft())
+                runs += started
+                if not started:
+                    break
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        registry.count('TeamMCMC.subproblems_pruned', len(subproblems) - len(searched))
+        print 'Stadium Grinders Teams: %d of %d %s subproblems searched, %d runs' % (len(searched), len(subproblems), split_class, runs)
+        return best
+
+    def _best_with(self, best, i, result):
+        # the better of best and the team of player i plus a split_rest result
+        if not isinstance(result, AnnealingResult):
+            result = result.get()
+        if best is not None and result.value + self.value_of[i] <= best.value:
+            return best
+        return AnnealingResult(result.value + self.value_of[i],
+                               result.cost + self.cost_of[i],
+                               sorted(result.team + [self.names[i]]),
+                               result.seed,
+                               result.steps)
+
+    @timed('TeamMCMC')
+    def find_chain_annealing_solution(self, chains=256, seed=None, schedule=None, stop=None):
+        # Anneals `chains` restarts at once with a ChainBatch, and returns the best
+        # team any of them found. Only the best team is printed.
+        batch = ChainBatch(self, chains, seed)
+        results = batch.anneal(schedule or GeometricSchedule(), stop or NO_STOP)
+        best = max(results, key=lambda r: r.value)
+        print 'Stadium Grinders Teams: %d chains, %d steps' % (chains, best.steps)
+        return best
+
+    @timed('TeamMCMC')
+    def find_tempering_solution(self, levels=16, ladders=8, t_min=0.05, t_max=20.0, steps=4000, swap_every=10, seed=None, stop=None):
+        # Parallel tempering over `ladders` independent ladders of `levels`
+        # temperatures spaced geometrically from t_min to t_max (see
+        # ChainBatch.temper). Prints how every temperature did and returns the
+        # best team found.
+        ladder = [t_min * (1.0 * t_max / t_min) ** (1.0 * l / max(levels - 1, 1)) for l in range(levels)]
+        batch = ChainBatch(self, levels * ladders, seed)
+        results, stats = batch.temper(ladder, steps, swap_every, stop or NO_STOP)
+        best = max(results, key=lambda r: r.value)
+        print 'Stadium Grinders Teams: %d ladders of %d temperatures, %d steps' % (ladders, levels, best.steps)
+        print '%10s %10s %10s %10s %10s' % ('temp', 'accepted', 'swapped', 'mean', 'best')
+        for t in stats:
+            cells = [('%10.3f', t.acceptance), ('%10.3f', t.swap_acceptance), ('%10.2f', t.mean_value), ('%10.2f', t.best_value)]
+            print '%10.3f %s' % (t.temp, ' '.join(form % x if x is not None else '%10s' % '-' for form, x in cells))
+        return best
+
+
+class ChainBatch(object):
+
+    # Many independent annealing chains over the candidates of a TeamMCMC,
+    # advanced in lockstep as NumPy arrays: one row of roster[c] per chain, one
+    # column per roster slot, so each step is a handful of array operations for
+    # every chain instead of a Python-level step per chain.
+    #
+    # A step proposes, for every chain, a random slot and a random replacement of
+    # that slot's class among the players that fit under the cap, drawn from the
+    # cost-sorted prefix like TeamMCMC.sample_swap. Proposals of players already
+    # on the roster are skipped for that step. Every chain follows the same
+    # temperature schedule. The whole batch is reproducible from its seed.
+    def __init__(self, mcmc, chains, seed=None):
+        self.mcmc = mcmc
+        self.chains = chains
+        self.seed = seed
+        self.value_of = np.array(mcmc.value_of, dtype=float)
+        self.cost_of = np.array(mcmc.cost_of, dtype=float)
+        self.capacity = mcmc.capacity
+
+        # slots in a fixed class order, and the candidates of every class in one
+        # flat array sorted by (class, cost). Shifting each class's costs by
+        # class * shift keeps the flat keys sorted, so one searchsorted call
+        # finds every chain's affordable prefix whatever the class of its slot.
+        classes = sorted(set(mcmc.valid_comp))
+        self.slot_names = sorted(mcmc.valid_comp)
+        self.slot_class = np.array([classes.index(c) for c in self.slot_names])
+        self.shift = 2.0 * (self.cost_of.max() + abs(self.capacity)) + 1
+        players, keys, offsets = [], [], []
+        for k, c in enumerate(classes):
+            offsets.append(len(players))
+            players.extend(mcmc.sorted_by_class.get(c, []))
+            keys.extend(k * self.shift + cost for cost in mcmc.sorted_costs_by_class.get(c, []))
+        self.flat_players = np.array(players, dtype=int)
+        self.flat_keys = np.array(keys, dtype=float)
+        self.class_offset = np.array(offsets, dtype=int)
+
+    def random_rosters(self, rng):
+        # a random affordable team per chain, from TeamMCMC.make_random_team,
+        # with each player moved to a slot of its class
+        rosters = np.empty((self.chains, len(self.slot_names)), dtype=int)
+        for c in range(self.chains):
+            self.mcmc.rng.seed(rng.randint(2 ** 31))
+            self.mcmc.make_random_team()
+            by_class = defaultdict(list)
+            for i in self.mcmc.team:
+                by_class[self.mcmc.class_of[i]].append(i)
+            for slot, cls in enumerate(self.slot_names):
+                rosters[c, slot] = by_class[cls].pop()
+        self.mcmc.clear_team()
+        return rosters
+
+    def reset(self, rng):
+        # a fresh random team in every chain
+        self.roster = self.random_rosters(rng)
+        self.chain = np.arange(self.chains)
+        self.on_team = np.zeros((self.chains, len(self.value_of)), dtype=bool)
+        self.on_team[self.chain[:, None], self.roster] = True
+        self.value = self.value_of[self.roster].sum(axis=1)
+        self.cost = self.cost_of[self.roster].sum(axis=1)
+        self.best_value = self.value.copy()
+        self.best_roster = self.roster.copy()
+
+    def step(self, rng, temp):
+        # One proposal per chain at temperature temp, a number or one per chain.
+        # Returns the mask of the chains that moved.
+        slot = rng.randint(len(self.slot_names), size=self.chains)
+        old = self.roster[self.chain, slot]
+        k = self.slot_class[slot]
+        budget = self.capacity - self.cost + self.cost_of[old]
+        count = np.searchsorted(self.flat_keys, k * self.shift + budget, side='right') - self.class_offset[k]
+        new = self.flat_players[self.class_offset[k] + (rng.random_sample(self.chains) * count).astype(int)]
+
+        delta = self.value_of[new] - self.value_of[old]
+        accept = ~self.on_team[self.chain, new] & ((delta > 0) | (np.log1p(-rng.random_sample(self.chains)) * temp < delta))
+        moved = self.chain[accept]
+        if len(moved):
+            old, new = old[accept], new[accept]
+            self.on_team[moved, old] = False
+            self.on_team[moved, new] = True
+            self.roster[moved, slot[accept]] = new
+            self.value[moved] += self.value_of[new] - self.value_of[old]
+            self.cost[moved] += self.cost_of[new] - self.cost_of[old]
+        return accept
+
+    def update_best(self):
+        # keeps the best team of every chain; True if any chain improved
+        improved = self.value > self.best_value
+        if not improved.any():
+            return False
+        self.best_value[improved] = self.value[improved]
+        self.best_roster[improved] = self.roster[improved]
+        return True
+
+    def results(self, steps):
+        names = self.mcmc.names
+        return [AnnealingResult(self.best_value[c],
+                                self.cost_of[self.best_roster[c]].sum(),
+                                sorted(names[i] for i in self.best_roster[c]),
+                                self.seed,
+                                steps) for c in range(self.chains)]
+
+    def anneal(self, schedule, stop):
+        # every chain cools under the same schedule
+        rng = np.random.RandomState(self.seed)
+        self.reset(rng)
+        progress = AnnealingProgress()
+        patience, time_limit, target = stop
+        deadline = time.time() + time_limit if time_limit is not None else None
+        accepted = 0
+
+        for temp in schedule.temperatures(progress):
+            accepted += self.step(rng, temp).sum()
+            progress.steps += 1
+            progress.accepted = 1.0 * accepted / self.chains
+            if self.update_best():
+                progress.since_improvement = 0
+                if target is not None and self.best_value.max() >= target:
+                    break
+            else:
+                progress.since_improvement += 1
+            if patience is not None and progress.since_improvement >= patience:
+                break
+            if deadline is not None and progress.steps % 64 == 0 and time.time() > deadline:
+                break
+
+        registry.count('TeamMCMC.steps', progress.steps * self.chains)
+        registry.count('TeamMCMC.accepted', accepted)
+        return self.results(progress.steps)
+
+    def temper(self, ladder, steps, swap_every, stop):
+        # Parallel tempering: the chains form ladders of len(ladder) replicas, one
+        # per temperature, that never cool. Every swap_every steps neighbouring
+        # replicas of a ladder trade temperatures with the replica exchange
+        # probability min(1, exp((1/T_i - 1/T_j) * (value_j - value_i))),
+        # alternating between the even and the odd pairs, so good teams found hot
+        # sink to the cold end. Returns the results of every chain and a
+        # TemperingStats per temperature.
+        ladder = np.asarray(ladder, dtype=float)
+        levels = len(ladder)
+        beta = 1.0 / ladder
+        rng = np.random.RandomState(self.seed)
+        self.reset(rng)
+        level = self.chain % levels
+        position = self.chain - level       # first chain of the chain's ladder
+
+        moves = np.zeros(levels)
+        value_sum = np.zeros(levels)
+        swaps_tried = np.zeros(levels)
+        swaps_accepted = np.zeros(levels)
+        best_at = np.full(levels, -np.inf)
+        patience, time_limit, target = stop
+        deadline = time.time() + time_limit if time_limit is not None else None
+        since_improvement = 0
+        done = 0
+
+        for n in range(steps):
+            moved = self.step(rng, ladder[level])
+            done += 1
+            moves += np.bincount(level[moved], minlength=levels)
+            value_sum += np.bincount(level, weights=self.value, minlength=levels)
+            np.maximum.at(best_at, level, self.value)
+
+            if (n + 1) % swap_every == 0 and levels > 1:
+                at = np.argsort(position + level).reshape(-1, levels)
+                pairs = np.arange((n // swap_every) % 2, levels - 1, 2)
+                a = at[:, pairs].ravel()
+                b = at[:, pairs + 1].ravel()
+                lower = np.tile(pairs, at.shape[0])
+                swap = np.log1p(-rng.random_sample(len(a))) < (beta[lower] - beta[lower + 1]) * (self.value[b] - self.value[a])
+                swaps_tried += np.bincount(lower, minlength=levels)
+                swaps_accepted += np.bincount(lower[swap], minlength=levels)
+                level[a[swap]] += 1
+                level[b[swap]] -= 1
+
+            if self.update_best():
+                since_improvement = 0
+                if target is not None and self.best_value.max() >= target:
+                    break
+            else:
+                since_improvement += 1
+            if patience is not None and since_improvement >= patience:
+                break
+            if deadline is not None and done % 64 == 0 and time.time() > deadline:
+                break
+
+        registry.count('TeamMCMC.steps', done * self.chains)
+        registry.count('TeamMCMC.accepted', int(moves.sum()))
+        if not done:
+            return self.results(done), [TemperingStats(t, None, None, None, None) for t in ladder]
+        replicas = self.chains / levels
+        stats = [TemperingStats(ladder[l],
+                                moves[l] / (done * replicas),
+                                swaps_accepted[l] / swaps_tried[l] if swaps_tried[l] else None,
+                                value_sum[l] / (done * replicas),
+                                best_at[l]) for l in range(levels)]
+        return self.results(done), stats
@@ -0,0 +1,178 @@
+import cProfile
+import json
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+def _rss_kb():
+    # current resident set size, from /proc where there is one
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 1024
+    except (IOError, OSError):
+        return _peak_rss_kb()
+
+
+def _peak_rss_kb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on OS X
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform == 'darwin' else peak
+
+
+# every @timed function, as (function, owner, timer name); see Registry.enable
+_timed_functions = []
+
+
+def _holder(func, owner):
+    # the class called owner in func's module if it holds func, else the module
+    # if it does, else None
+    module = sys.modules.get(func.__module__)
+    for holder in (getattr(module, owner, None), module):
+        if holder is not None and vars(holder).get(func.__name__) is func:
+            return holder
+    return None
+
+
+class Registry(object):
+
+    # Wall time and call counts of named timers, named counters, and the wall
+    # time and memory growth of the stages of a run. Nothing is recorded until
+    # enable() is called, so the hooks cost one attribute check otherwise, and
+    # @timed functions aren't wrapped at all until then.
+    # Timers are inclusive: get_score's time includes the equations it calls.
+    # Only the calling process is recorded, not pool workers.
+    def __init__(self):
+        self.enabled = False
+        self.installed = []     # (holder, attribute, function) enable() wrapped
+        self.reset()
+
+    def reset(self):
+        self.timers = {}        # name -> [calls, seconds]
+        self.counters = {}      # name -> count
+        self.stages = []        # stage records, in the order they ran
+
+    def enable(self):
+        # puts a timer around every @timed function of the modules imported so far
+        if self.enabled:
+            return
+        self.enabled = True
+        for func, owner, name in _timed_functions:
+            holder = _holder(func, owner)
+            if holder is not None:
+                self.installed.append((holder, func.__name__, func))
+                setattr(holder, func.__name__, self._timer(func, name))
+
+    def disable(self):
+        self.enabled = False
+        while self.installed:
+            holder, attribute, func = self.installed.pop()
+            setattr(holder, attribute, func)
+
+    def _timer(self, func, name):
+        @wraps(func)
+        def timed_func(*args, **kwargs):
+            start = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add_time(name, time.time() - start)
+        return timed_func
+
+    def add_time(self, name, seconds, calls=1):
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = [0, 0.0]
+        timer[0] += calls
+        timer[1] += seconds
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def timer(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.time() - start)
+
+    @contextmanager
+    def stage(self, name):
+        # A step of a run, ie parsing the player stats. Besides the wall time,
+        # records how much the process grew (memory the stage allocated and kept)
+        # and the peak size of the process by the end of the stage.
+        if not self.enabled:
+            yield
+            return
+        rss = _rss_kb()
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.stages.append({'name': name,
+                                'seconds': time.time() - start,
+                                'rss_growth_kb': _rss_kb() - rss,
+                                'peak_rss_kb': _peak_rss_kb()})
+
+    def report(self):
+        timers = {}
+        for name, (calls, seconds) in self.timers.items():
+            timers[name] = {'calls': calls,
+                            'seconds': seconds,
+                            'mean_ms': 1000.0 * seconds / calls if calls else 0.0}
+        return {'stages': self.stages, 'timers': timers, 'counters': dict(self.counters)}
+
+    def write_report(self, path):
+        with open(path, 'w') as outfile:
+            json.dump(self.report(), outfile, indent=2, sort_keys=True)
+
+    def print_report(self, top=20):
+        for stage in self.stages:
+            print '%-24s %9.3f s %+9.1f MB' % (stage['name'], stage['seconds'], stage['rss_growth_kb'] / 1024.0)
+        ranked = sorted(self.timers.items(), key=lambda item: -item[1][1])[:top]
+        for name, (calls, seconds) in ranked:
+            print '%-48s %9d calls %9.3f s' % (name, calls, seconds)
+        for name in sorted(self.counters):
+            print '%-48s %9d' % (name, self.counters[name])
+
+
+# the registry every instrumented module records to
+registry = Registry()
+
+
+def timed(owner):
+    """
+    Function: timed
+    -----------------
+    Decorator that times every call of a function into the registry, as
+    'owner.function' (ie 'StatEquations.get_score'), while the registry is
+    enabled. It returns the function itself: registry.enable() wraps it in its
+    class (or module) then, so the function costs nothing extra otherwise. It
+    must be the outermost decorator, and owner the name of the class holding
+    the function (or of its module).
+
+    Parameters:
+        :param owner: the class or module name to prefix the timer with
+
+    :return the decorator
+    """
+    def decorate(func):
+        _timed_functions.append((func, owner, '%s.%s' % (owner, func.__name__)))
+        return func
+    return decorate
+
+
+def run_profiled(path, func, *args):
+    # runs func(*args) under cProfile and dumps the stats to path for pstats
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(func, *args)
+    finally:
+        profile.dump_stats(path)
@@ -16,8 +16,15 @@ This class computes the following stats:
     batter_points_expected_for_runs
     batter_points_expected_for_rbi
 
+and the overall player score, one player at a time (get_score) or for a whole
+slate at once (score_all).
+
 Source of stats: internal classes
 """
+import numpy as np
+
+from profiling import registry, timed
+
 RUN_MULTIPLIER = [0, 1.164, 1.122, 0.979, 0.946, 0.971, 0.921, 0.899, 0.927, 0.973]
 RBI_MULTIPLIER = [0, 0.726, 0.839, 1.017, 1.114, 1.038, 0.985, 0.954, 0.904, 0.879]
 EXPECTED_PA = [0, 4.67, 4.56, 4.46, 4.35, 4.25, 4.14, 4.03, 3.91, 3.79]
@@ -25,7 +32,7 @@ EXPECTED_PA = [0, 4.67, 4.56, 4.46, 4.35, 4.25, 4.14, 4.03, 3.91, 3.79]
 class StatEquations:
 
 
-    def __init__(self, player_stats, team_stats, ballpark_stats, league_stats):
+    def __init__(self, player_stats, team_stats, ballpark_stats, league_stats, year=None):
         self.player_stats = player_stats
         ''':type: PlayerStats'''
         self.ballpark_stats = ballpark_stats
@@ -37,12 +44,149 @@ class StatEquations:
         #self.daily_stats = daily_stats
         #''':type: DailyStats'''
 
-        self.year = 2014
+        # the season the equations use, the latest loaded one by default
+        self.year = year if year is not None else max(player_stats.years)
+
+        # per-slate caches, see get_matchup_context and get_league_constants
+        self.matchup_cache = {}
+        self.league_cache = {}
+        self.matchup_cache_version = None
+
+    ###########
+    # CONTEXT #
+    ###########
+
+    def get_league_constants(self, year):
+        """
+        Function: get_league_constants
+        -----------------
+        League wide ratios shared by every equation. League stats never change after
+        loading, so these are computed once per year.
+
+        Parameters
+            :param year: the year of the league stats
+
+        :return dict of league ratios
+        """
+        if year not in self.league_cache:
+            league_sb = self.league_stats.get_league_stolen_bases(year)
+            league_cs = self.league_stats.get_league_caught_stealing(year)
+            self.league_cache[year] = {
+                'woba': self.league_stats.get_league_woba(year),
+                'k_percentage': self.league_stats.get_league_k_percentage(year),
+                'bb_percentage': 1.0 * self.league_stats.get_league_bb(year) /
+                                 self.league_stats.get_league_plate_appearance(year),
+                'hr_percentage': 1.0 * self.league_stats.get_league_homerun(year) /
+                                 self.league_stats.get_league_plate_appearance(year),
+                'sb_allowed_percentage': 1.0 * league_sb / (league_sb + league_cs),
+                'sb_attempts_against_avg': 1.0 * (league_sb + league_cs) / 30,
+                'runs_per_team': self.league_stats.get_league_runs(year) / 30.0
+            }
+        return self.league_cache[year]
+
+    def _check_matchup_cache(self):
+        # drops the matchup cache when a matchup, pitcher or hand has changed
+        version = (self.player_stats.matchup_version, self.team_stats.matchup_version)
+        if version != self.matchup_cache_version:
+            self.matchup_cache = {}
+            self.matchup_cache_version = version
+
+    def get_matchup_context(self, batter_team, batter_hand):
+        """
+        Function: get_matchup_context
+        -----------------
+        Everything about a batter's matchup that depends only on his team and batting
+        hand: the opponent, the opposing starting pitcher and his splits against that
+        hand, the park and the team factors. Every batter equation needs some of it,
+        so it is computed once per (team, hand) and shared. The opponent's stolen
+        base stats are left to get_sb_context, only the sb equation uses them.
+
+        The cache is dropped whenever a team's opponent or home/away status, a
+        starting pitcher or a throwing hand changes.
+
+        Parameters
+            :param batter_team: the batter's team
+            :param batter_hand: the batter's hand (left or right)
+
+        :return dict of matchup values
+        """
+        self._check_matchup_cache()
+
+        key = (batter_team, batter_hand)
+        if key in self.matchup_cache:
+            registry.count('StatEquations.matchup_cache_hits')
+            return self.matchup_cache[key]
+        registry.count('StatEquations.matchup_cache_misses')
+
+        league = self.get_league_constants(self.year)
+        opp_team = self.team_stats.get_team_opponent(batter_team)
+        opp_pitcher = self.player_stats.get_starting_pitcher(opp_team)
+
+        #Accounts for pitchers without stats by defaulting to league average and a RHP
+        if self.player_stats.get_pitcher_total_innings_pitched(self.year, opp_pitcher) > 0:
+            opp_pitcher_has_stats = True
+            opp_pitcher_woba = self.player_stats.get_pitcher_woba_allowed_vs_RHB_LHB(self.year, opp_pitcher, batter_hand)
+            opp_pitcher_hand = self.player_stats.get_player_throwing_hand(opp_pitcher)
+            opp_pitcher_bb_percentage = 1.0 * self.player_stats.get_pitcher_bb_allowed_vs_RHB_LHB(self.year, opp_pitcher, batter_hand) /\
+                                        self.player_stats.get_pitcher_total_batters_faced_vs_RHB_LHB(self.year, opp_pitcher, batter_hand)
+            opp_pitcher_hr_percentage = 1.0 * self.player_stats.get_pitcher_hr_allowed_vs_RHB_LHB(self.year, opp_pitcher, batter_hand) /\
+                                        self.player_stats.get_pitcher_total_batters_faced_vs_RHB_LHB(self.year, opp_pitcher, batter_hand)
+        else:
+            opp_pitcher_has_stats = False
+            opp_pitcher_woba = league['woba']
+            opp_pitcher_hand = 'right'
+            opp_pitcher_bb_percentage = league['bb_percentage']
+            opp_pitcher_hr_percentage = league['hr_percentage']
+
+        if self.team_stats.get_team_home_or_away(batter_team) == 'home':
+            park = batter_team
+        else:
+            park = opp_team
+
+        self.matchup_cache[key] = {
+            'opp_team': opp_team,
+            'opp_pitcher': opp_pitcher,
+            'opp_pitcher_has_stats': opp_pitcher_has_stats,
+            'opp_pitcher_woba': opp_pitcher_woba,
+            'opp_pitcher_hand': opp_pitcher_hand,
+            'opp_pitcher_bb_percentage': opp_pitcher_bb_percentage,
+            'opp_pitcher_hr_percentage': opp_pitcher_hr_percentage,
+            'park': park,
+            'team_factor': self.team_stats.get_team_runs_total(self.year, batter_team) / league['runs_per_team']
+        }
+        return self.matchup_cache[key]
+
+    def get_sb_context(self, opp_team):
+        """
+        Function: get_sb_context
+        -----------------
+        The opposing team's stolen base values for batter_points_expected_for_sb,
+        cached alongside get_matchup_context. They come from the team's fielding
+        stats, which not every team has, so they are only looked up for the sb
+        equation.
+
+        Parameters
+            :param opp_team: the batter's opponent
+
+        :return dict of stolen base values
+        """
+        self._check_matchup_cache()
+
+        key = ('sb', opp_team)
+        if key not in self.matchup_cache:
+            opp_sb_allowed = self.team_stats.get_team_sb_allowed(self.year, opp_team)
+            opp_cs_fielding = self.team_stats.get_team_cs_fielding(self.year, opp_team)
+            self.matchup_cache[key] = {
+                'opp_sb_allowed_percentage': 1.0 * opp_sb_allowed / (opp_sb_allowed + opp_cs_fielding),
+                'opp_sb_attempts_against': 1.0 * (opp_sb_allowed + opp_cs_fielding)
+            }
+        return self.matchup_cache[key]
 
     ############
     # PITCHERS #
     ############
 
+    @timed('StatEquations')
     def pitcher_points_expected_for_k(self, pitcher):
         """
         Function: pitcher_points_expected_for_k
@@ -81,11 +225,12 @@ class StatEquations:
 
             opp_team_k_percent_mult = 1.0 * ((self.team_stats.get_team_k_vs_RHP_LHP(self.year, oppTeam, pitcherPitchHand) /
                                 self.team_stats.get_team_pa_vs_RHP_LHP(self.year, oppTeam, pitcherPitchHand)) /
-                               self.league_stats.get_league_k_percentage(self.year))
+                               self.get_league_constants(self.year)['k_percentage'])
             expected_ip = self.pitcher_expected_ip(pitcher)
 
         return k_per_ip * expected_ip * opp_team_k_percent_mult
 
+    @timed('StatEquations')
     def pitcher_expected_ip(self, pitcher):
         """
         Function: pitcher_expected_ip
@@ -116,10 +261,12 @@ class StatEquations:
 
         return expected_ip
 
+    @timed('StatEquations')
     def pitcher_points_expected_for_win(self, pitcher):
         # TODO: need vegas lines
         return 2
 
+    @timed('StatEquations')
     def pitcher_points_expected_for_er(self, pitcher):
         """
         Function: pitcher_points_expected_for_er
@@ -167,7 +314,7 @@ class StatEquations:
             park_factor = self.ballpark_stats.get_ballpark_factor_overall(park_team)
 
             pitcher_hand_hits_mult = 1.0 * self.team_stats.get_team_woba_vs_RHP_LHP(self.year, opp_team, pitcher_hand) / \
-                                self.league_stats.get_league_woba(self.year)
+                                self.get_league_constants(self.year)['woba']
 
             expected_ip = self.pitcher_expected_ip(pitcher)
 
@@ -177,6 +324,7 @@ class StatEquations:
     # BATTERS #
     ###########
 
+    @timed('StatEquations')
     def batter_expected_ab_per_game(self, batter):
         """
         Function: batter_expected_ab_per_game
@@ -204,6 +352,7 @@ class StatEquations:
 
         return ex_pa - ex_bb
 
+    @timed('StatEquations')
     def batter_points_expected_for_hits(self, batter):
         """
         Function: batter_points_expected_for_hits
@@ -239,24 +388,11 @@ class StatEquations:
             #Helper Variables
             batter_outs = (self.player_stats.get_batter_ab_total(self.year, batter) -
                            self.player_stats.get_batter_hits_total(self.year, batter))
-            batter_team = self.player_stats.get_player_team(batter)
             batter_hand = self.player_stats.get_player_batting_hand(batter)
-            opp_team = self.team_stats.get_team_opponent(batter_team)
-            opp_pitcher = self.player_stats.get_starting_pitcher(opp_team)
-
-            #Accounts for pitchers without stats by defaulting to league average and a RHP
-            if self.player_stats.get_pitcher_total_innings_pitched(self.year, opp_pitcher) > 0:
-                opp_pitcher_woba = self.player_stats.get_pitcher_woba_allowed_vs_RHB_LHB(self.year, opp_pitcher, batter_hand)
-                opp_pitcher_hand = self.player_stats.get_player_throwing_hand(opp_pitcher)
-            else:
+            matchup = self.get_matchup_context(self.player_stats.get_player_team(batter), batter_hand)
+            league = self.get_league_constants(self.year)
+            if not matchup['opp_pitcher_has_stats']:
                 print 'Here in pts for hits for ', batter
-                opp_pitcher_woba = self.league_stats.get_league_woba(self.year)
-                opp_pitcher_hand = 'right'
-
-            if self.team_stats.get_team_home_or_away(batter_team) == 'home':
-                park = batter_team
-            else:
-                park = opp_team
 
             #Equations
             adj_slg = (1.0 * self.player_stats.get_batter_1b_total(self.year, batter) +
@@ -268,15 +404,16 @@ class StatEquations:
 
             exp_ab = self.batter_expected_ab_per_game(batter)
 
-            pitcher_eff = 1.0 * opp_pitcher_woba / self.league_stats.get_league_woba(self.year)
+            pitcher_eff = 1.0 * matchup['opp_pitcher_woba'] / league['woba']
 
-            batter_eff = 1.0 * self.player_stats.get_batter_woba_vs_RHP_LHP(self.year, batter, opp_pitcher_hand) / \
-                             self.league_stats.get_league_woba(self.year)
+            batter_eff = 1.0 * self.player_stats.get_batter_woba_vs_RHP_LHP(self.year, batter, matchup['opp_pitcher_hand']) / \
+                             league['woba']
 
-            park_factor = self.ballpark_stats.get_ballpark_factor_batting_average(park, batter_hand)
+            park_factor = self.ballpark_stats.get_ballpark_factor_batting_average(matchup['park'], batter_hand)
 
         return adj_slg * exp_ab * ((1.5 * pitcher_eff + 1.5 * batter_eff + park_factor) / 4)
 
+    @timed('StatEquations')
     def batter_points_expected_for_walks(self, batter):
         """
         Function: batter_points_expected_for_walks
@@ -306,20 +443,12 @@ class StatEquations:
         if self.player_stats.get_batter_ab_total(self.year,batter) > 0:
 
             #Helper Variables
-            batter_team = self.player_stats.get_player_team(batter)
             batter_hand = self.player_stats.get_player_batting_hand(batter)
-            opp_team = self.team_stats.get_team_opponent(batter_team)
-            opp_pitcher = self.player_stats.get_starting_pitcher(opp_team)
-            league_bb_perc = 1.0 * self.league_stats.get_league_bb(self.year) /\
-                     self.league_stats.get_league_plate_appearance(self.year)
-
-            #Accounts for pitchers without stats by defaulting to league average
-            if self.player_stats.get_pitcher_total_innings_pitched(self.year, opp_pitcher) > 0:
-                pitcher_bb_perc = 1.0 * self.player_stats.get_pitcher_bb_allowed_vs_RHB_LHB(self.year, opp_pitcher, batter_hand) /\
-                                  self.player_stats.get_pitcher_total_batters_faced_vs_RHB_LHB(self.year, opp_pitcher, batter_hand)
-            else:
+            matchup = self.get_matchup_context(self.player_stats.get_player_team(batter), batter_hand)
+            league_bb_perc = self.get_league_constants(self.year)['bb_percentage']
+            if not matchup['opp_pitcher_has_stats']:
                 print 'Here in pts for BBs for ', batter
-                pitcher_bb_perc = league_bb_perc
+            pitcher_bb_perc = matchup['opp_pitcher_bb_percentage']
 
             #Equations
             exp_pa = 1.0 * EXPECTED_PA[self.player_stats.get_player_batting_position(batter)]
@@ -332,6 +461,7 @@ class StatEquations:
 
         return batter_walk_percentage * exp_pa * ((pitcher_eff + batter_eff) / 2)
 
+    @timed('StatEquations')
     def batter_points_expected_for_hr(self, batter):
         """
         Function: batter_points_expected_for_hrs
@@ -365,29 +495,16 @@ class StatEquations:
         if self.player_stats.get_batter_ab_total(self.year,batter) > 0:
 
             #Helper Variables
-            batter_team = self.player_stats.get_player_team(batter)
             batter_hand = self.player_stats.get_player_batting_hand(batter)
-            opp_team = self.team_stats.get_team_opponent(batter_team)
-            opp_pitcher = self.player_stats.get_starting_pitcher(opp_team)
-            league_hr_percentage = 1.0 * self.league_stats.get_league_homerun(self.year) /\
-                                       self.league_stats.get_league_plate_appearance(self.year)
-
-            #Accounts for pitchers without stats by defaulting to league average and RHP
-            if self.player_stats.get_pitcher_total_innings_pitched(self.year, opp_pitcher) > 0:
-                opp_pitcher_hr_percentage = 1.0 * self.player_stats.get_pitcher_hr_allowed_vs_RHB_LHB(self.year, opp_pitcher, batter_hand) /\
-                                        self.player_stats.get_pitcher_total_batters_faced_vs_RHB_LHB(self.year, opp_pitcher, batter_hand)
-                opp_pitcher_hand = self.player_stats.get_player_throwing_hand(opp_pitcher)
-            else:
+            matchup = self.get_matchup_context(self.player_stats.get_player_team(batter), batter_hand)
+            league_hr_percentage = self.get_league_constants(self.year)['hr_percentage']
+            if not matchup['opp_pitcher_has_stats']:
                 print 'Here in pts for HRs for ', batter
-                opp_pitcher_hr_percentage = league_hr_percentage
-                opp_pitcher_hand = 'right'
+            opp_pitcher_hr_percentage = matchup['opp_pitcher_hr_percentage']
+            opp_pitcher_hand = matchup['opp_pitcher_hand']
 
             batter_hr_vs_hand_percentage = self.player_stats.get_batter_hr_vs_RHP_LHP(self.year, batter, opp_pitcher_hand) /\
                                            self.player_stats.get_batter_plate_appearances_vs_RHP_LHP(self.year, batter, opp_pitcher_hand)
-            if self.team_stats.get_team_home_or_away(batter_team) == 'home':
-                park = batter_team
-            else:
-                park = opp_team
 
             #Equations
             batter_hr_percentage = 1.0 * self.player_stats.get_batter_hr_total(self.year, batter) /\
@@ -399,7 +516,7 @@ class StatEquations:
 
             batter_eff = batter_hr_vs_hand_percentage / league_hr_percentage
 
-            park_factor = self.ballpark_stats.get_ballpark_factor_homerun(park, batter_hand)
+            park_factor = self.ballpark_stats.get_ballpark_factor_homerun(matchup['park'], batter_hand)
 
         if pitcher_eff > 2:
             pitcher_eff = 2
@@ -409,6 +526,7 @@ class StatEquations:
 
         return 4.0 * batter_hr_percentage * exp_pa * ((1.5 * pitcher_eff + 1.5 * batter_eff + park_factor) / 4)
 
+    @timed('StatEquations')
     def batter_points_expected_for_sb(self, batter):
         """
         Function: batter_points_expected_for_sbs
@@ -438,14 +556,14 @@ class StatEquations:
         if self.player_stats.get_batter_ab_total(self.year,batter) > 0:
 
             #Helper Variables
-            batter_team = self.player_stats.get_player_team(batter)
-            opp_team = self.team_stats.get_team_opponent(batter_team)
-            oppTeam_sb_allowed_percentage = 1.0 * self.team_stats.get_team_sb_allowed(self.year, opp_team) /\
-                                 (self.team_stats.get_team_sb_allowed(self.year, opp_team) + self.team_stats.get_team_cs_fielding(self.year, opp_team))
-            league_sb_allowed_percentage =  1.0 * self.league_stats.get_league_stolen_bases(self.year) /\
-                                    (self.league_stats.get_league_stolen_bases(self.year) + self.league_stats.get_league_caught_stealing(self.year))
-            oppTeam_sb_attempts_against = 1.0 * (self.team_stats.get_team_sb_allowed(self.year, opp_team) + self.team_stats.get_team_cs_fielding(self.year,opp_team))
-            league_sb_attempts_against_avg = 1.0 * (self.league_stats.get_league_stolen_bases(self.year) + self.league_stats.get_league_caught_stealing(self.year)) / 30
+            matchup = self.get_matchup_context(self.player_stats.get_player_team(batter),
+                                               self.player_stats.get_player_batting_hand(batter))
+            sb_context = self.get_sb_context(matchup['opp_team'])
+            league = self.get_league_constants(self.year)
+            oppTeam_sb_allowed_percentage = sb_context['opp_sb_allowed_percentage']
+            league_sb_allowed_percentage = league['sb_allowed_percentage']
+            oppTeam_sb_attempts_against = sb_context['opp_sb_attempts_against']
+            league_sb_attempts_against_avg = league['sb_attempts_against_avg']
 
             #Equations
             batter_sb_per_game = 1.0 * self.player_stats.get_batter_sb_total(self.year, batter) /\
@@ -457,6 +575,7 @@ class StatEquations:
 
         return 2.0 * batter_sb_per_game * ((oppTeam_sb_allowed_eff + oppTeam_sb_attempts_allowed_eff) / 2)
 
+    @timed('StatEquations')
     def batter_points_expected_for_runs(self, batter):
         """
         Function: batter_points_expected_for_runs
@@ -494,24 +613,11 @@ class StatEquations:
         if self.player_stats.get_batter_ab_total(self.year,batter) > 0:
 
             #Helper Variables
-            batter_team = self.player_stats.get_player_team(batter)
             batter_hand = self.player_stats.get_player_batting_hand(batter)
-            opp_team = self.team_stats.get_team_opponent(batter_team)
-            opp_pitcher = self.player_stats.get_starting_pitcher(opp_team)
-
-            #Accounts for pitchers without stats by defaulting to league average and RHP
-            if self.player_stats.get_pitcher_total_innings_pitched(self.year, opp_pitcher) > 0:
-                opp_pitcher_woba = self.player_stats.get_pitcher_woba_allowed_vs_RHB_LHB(self.year, opp_pitcher, batter_hand)
-                opp_pitcher_hand = self.player_stats.get_player_throwing_hand(opp_pitcher)
-            else:
+            matchup = self.get_matchup_context(self.player_stats.get_player_team(batter), batter_hand)
+            league = self.get_league_constants(self.year)
+            if not matchup['opp_pitcher_has_stats']:
                 print 'Here in pts for runs for ', batter
-                opp_pitcher_woba = self.league_stats.get_league_woba(self.year)
-                opp_pitcher_hand = 'right'
-
-            if self.team_stats.get_team_home_or_away(batter_team) == 'home':
-                park = batter_team
-            else:
-                park = opp_team
 
             #Equations
             batter_runs_per_pa = 0.330 * self.player_stats.get_batter_ba_total(self.year, batter) + \
@@ -521,20 +627,20 @@ class StatEquations:
 
             exp_pa = 1.0 * EXPECTED_PA[self.player_stats.get_player_batting_position(batter)]
 
-            pitcher_eff = 1.0 * opp_pitcher_woba / self.league_stats.get_league_woba(self.year)
+            pitcher_eff = 1.0 * matchup['opp_pitcher_woba'] / league['woba']
 
-            batter_eff = 1.0 * self.player_stats.get_batter_woba_vs_RHP_LHP(self.year, batter, opp_pitcher_hand) /\
-                         self.league_stats.get_league_woba(self.year)
+            batter_eff = 1.0 * self.player_stats.get_batter_woba_vs_RHP_LHP(self.year, batter, matchup['opp_pitcher_hand']) /\
+                         league['woba']
 
-            park_factor = self.ballpark_stats.get_ballpark_factor_overall(park)
+            park_factor = self.ballpark_stats.get_ballpark_factor_overall(matchup['park'])
 
             batting_order_factor = RUN_MULTIPLIER[self.player_stats.get_player_batting_position(batter)]
 
-            team_factor = self.team_stats.get_team_runs_total(self.year, batter_team) /\
-                          (self.league_stats.get_league_runs(self.year) / 30.0)
+            team_factor = matchup['team_factor']
 
         return batter_runs_per_pa * exp_pa * batting_order_factor * ((1.5 * pitcher_eff + 1.5 * batter_eff + park_factor + team_factor) / 5)
 
+    @timed('StatEquations')
     def batter_points_expected_for_rbi(self, batter):
         """
         Function: batter_points_expected_for_rbi
@@ -572,24 +678,11 @@ class StatEquations:
         if self.player_stats.get_batter_ab_total(self.year,batter) > 0:
 
             #Helper Variables
-            batter_team = self.player_stats.get_player_team(batter)
             batter_hand = self.player_stats.get_player_batting_hand(batter)
-            opp_team = self.team_stats.get_team_opponent(batter_team)
-            opp_pitcher = self.player_stats.get_starting_pitcher(opp_team)
-
-            #Accounts for pitchers without stats by defaulting to league average and RHP
-            if self.player_stats.get_pitcher_total_innings_pitched(self.year, opp_pitcher) > 0:
-                opp_pitcher_woba = self.player_stats.get_pitcher_woba_allowed_vs_RHB_LHB(self.year, opp_pitcher, batter_hand)
-                opp_pitcher_hand = self.player_stats.get_player_throwing_hand(opp_pitcher)
-            else:
+            matchup = self.get_matchup_context(self.player_stats.get_player_team(batter), batter_hand)
+            league = self.get_league_constants(self.year)
+            if not matchup['opp_pitcher_has_stats']:
                 print 'Here in pts for rbis for ', batter
-                opp_pitcher_woba = self.league_stats.get_league_woba(self.year)
-                opp_pitcher_hand = 'right'
-
-            if self.team_stats.get_team_home_or_away(batter_team) == 'home':
-                park = batter_team
-            else:
-                park = opp_team
 
             #Equations
             batter_runs_per_pa = 0.330 * self.player_stats.get_batter_ba_total(self.year, batter) + \
@@ -599,17 +692,16 @@ class StatEquations:
 
             exp_pa = 1.0 * EXPECTED_PA[self.player_stats.get_player_batting_position(batter)]
 
-            pitcher_eff = 1.0 * opp_pitcher_woba / self.league_stats.get_league_woba(self.year)
+            pitcher_eff = 1.0 * matchup['opp_pitcher_woba'] / league['woba']
 
-            batter_eff = 1.0 * self.player_stats.get_batter_woba_vs_RHP_LHP(self.year, batter, opp_pitcher_hand) /\
-                         self.league_stats.get_league_woba(self.year)
+            batter_eff = 1.0 * self.player_stats.get_batter_woba_vs_RHP_LHP(self.year, batter, matchup['opp_pitcher_hand']) /\
+                         league['woba']
 
-            park_factor = self.ballpark_stats.get_ballpark_factor_overall(park)
+            park_factor = self.ballpark_stats.get_ballpark_factor_overall(matchup['park'])
 
             batting_order_factor = RBI_MULTIPLIER[self.player_stats.get_player_batting_position(batter)]
 
-            team_factor = self.team_stats.get_team_runs_total(self.year, batter_team) /\
-                          (self.league_stats.get_league_runs(self.year) / 30.0)
+            team_factor = matchup['team_factor']
 
         return batter_runs_per_pa * exp_pa * batting_order_factor * (((1.5 * pitcher_eff) + (1.5 * batter_eff) + park_factor + team_factor) / 5)
 
@@ -617,6 +709,7 @@ class StatEquations:
     # Overall #
     ###########
 
+    @timed('StatEquations')
     def get_score(self, player):
         position = self.player_stats.get_player_fielding_position(player)
         if position == 'P':
@@ -631,3 +724,309 @@ class StatEquations:
                    self.batter_points_expected_for_hr(player) + \
                    self.batter_points_expected_for_sb(player) + \
                    self.batter_points_expected_for_walks(player)
+
+    #########
+    # Batch #
+    #########
+
+    @timed('StatEquations')
+    def score_all(self, players, errors=None):
+        """
+        Function: score_all
+        -----------------
+        Computes get_score for a whole slate at once. Each stat the equations need
+        is taken for every player in one column read from the stat store, the
+        matchup values once per (team, hand), and then every pitcher and batter
+        component is evaluated as a vectorized expression.
+
+        Batters without at bats get no score, like get_score, which can't
+        compute one for them.
+
+        Parameters
+            :param players: the players whose scores we are trying to determine
+            :param errors: optional list; (player, message) is appended for each
+                           player whose score couldn't be computed
+
+        :return float array aligned with players, NaN where a score couldn't be computed
+        """
+        errors = errors if errors is not None else []
+        scores = np.full(len(players), np.nan)
+        pitcher_idx, pitchers = [], []
+        batter_idx, batters = [], []
+
+        for i, player in enumerate(players):
+            try:
+                position = self.player_stats.get_player_fielding_position(player)
+            except Exception as e:
+                errors.append((player, repr(e)))
+                continue
+            if position == 'P':
+                pitcher_idx.append(i)
+                pitchers.append(player)
+            else:
+                batter_idx.append(i)
+                batters.append(player)
+
+        gathered = np.zeros(len(players), dtype=bool)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if pitchers:
+                columns, ok = self._gather_pitchers(pitchers, errors)
+                scores[pitcher_idx] = np.where(ok, self._pitcher_scores(columns), np.nan)
+                gathered[pitcher_idx] = ok
+            if batters:
+                columns, ok = self._gather_batters(batters, errors)
+                scores[batter_idx] = np.where(ok, self._batter_scores(columns), np.nan)
+                gathered[batter_idx] = ok
+
+        invalid = ~np.isfinite(scores)
+        for i in np.flatnonzero(gathered & invalid):
+            errors.append((players[i], 'score is not a finite number'))
+        scores[invalid] = np.nan
+        return scores
+
+    @timed('StatEquations')
+    def _gather_pitchers(self, pitchers, errors):
+        """
+        Function: _gather_pitchers
+        -----------------
+        Gathers every input of the pitcher equations as one array per input, in the
+        column order used by _pitcher_scores. The pitchers' own stats are whole
+        columns of the stat store; the opponent and park values are looked up per
+        pitcher, and only for pitchers with games started.
+
+        Parameters
+            :param pitchers: the pitchers whose inputs we are gathering
+            :param errors: list; (pitcher, message) is appended for each pitcher
+                           whose inputs couldn't be found
+
+        :return (list of float arrays aligned with pitchers, bool array of the
+                 pitchers whose inputs were all found)
+        """
+        self.player_stats.preload(['pitcher_total', 'pitcher_home_away'])
+        store = self.player_stats.store
+        rows = store.rows(pitchers)
+        gs = store.take(rows, self.year, 'gs_total')
+        k = store.take(rows, self.year, 'k_pitched_total')
+        ip = store.take(rows, self.year, 'ip_total')
+        xfip_home = store.take(rows, self.year, 'xfip', 'home')
+        xfip_away = store.take(rows, self.year, 'xfip', 'away')
+
+        # home, opponent k, pa and wOBA vs the pitcher's hand, park factor
+        context = np.zeros((len(pitchers), 5))
+        ok = np.ones(len(pitchers), dtype=bool)
+        for p, pitcher in enumerate(pitchers):
+            if gs[p] != gs[p]:
+                ok[p] = False
+                errors.append((pitcher, repr(KeyError((pitcher, self.year, 'gs_total', None)))))
+            elif gs[p] > 0:
+                try:
+                    context[p] = self._pitcher_context(pitcher)
+                except Exception as e:
+                    ok[p] = False
+                    errors.append((pitcher, repr(e)))
+
+        league = self.get_league_constants(self.year)
+        home, team_k, team_pa, team_woba, park_factor = context.T
+        return [gs, k, ip, np.where(home > 0, xfip_home, xfip_away), team_k, team_pa, team_woba, park_factor,
+                float(league['k_percentage']), float(league['woba'])], ok
+
+    def _pitcher_context(self, pitcher):
+        pitcher_team = self.player_stats.get_player_team(pitcher)
+        pitcher_hand = self.player_stats.get_player_throwing_hand(pitcher)
+        opp_team = self.team_stats.get_team_opponent(pitcher_team)
+        if self.team_stats.get_team_home_or_away(pitcher_team) == 'home':
+            home, park_team = 1.0, pitcher_team
+        else:
+            home, park_team = 0.0, opp_team
+        return (home,
+                float(self.team_stats.get_team_k_vs_RHP_LHP(self.year, opp_team, pitcher_hand)),
+                float(self.team_stats.get_team_pa_vs_RHP_LHP(self.year, opp_team, pitcher_hand)),
+                float(self.team_stats.get_team_woba_vs_RHP_LHP(self.year, opp_team, pitcher_hand)),
+                float(self.ballpark_stats.get_ballpark_factor_overall(park_team)))
+
+    @timed('StatEquations')
+    def _pitcher_scores(self, columns):
+        """
+        Function: _pitcher_scores
+        -----------------
+        Vectorized get_score for pitchers. Matches pitcher_expected_ip,
+        pitcher_points_expected_for_er, pitcher_points_expected_for_k and
+        pitcher_points_expected_for_win.
+
+        Parameters
+            :param columns: the input arrays from _gather_pitchers
+
+        :return array of pitcher scores
+        """
+        gs, k, ip, xfip, team_k, team_pa, team_woba, park_factor, league_k, league_woba = columns
+        started = gs > 0
+
+        expected_ip = np.where(started, ip / gs, 0.0)
+        k_points = np.where(started, (k / ip) * expected_ip * ((team_k / team_pa) / league_k), 0.0)
+        pitcher_hand_hits_mult = team_woba / league_woba
+        er_points = np.where(started, -1.0 * xfip * expected_ip / 9 * ((park_factor + 2 * pitcher_hand_hits_mult) / 3), 0.0)
+
+        return expected_ip + er_points + k_points + self.pitcher_points_expected_for_win(None)
+
+    @timed('StatEquations')
+    def _gather_batters(self, batters, errors):
+        """
+        Function: _gather_batters
+        -----------------
+        Gathers every input of the batter equations as one array per input, in the
+        column order used by _batter_scores. The batters' own stats are whole
+        columns of the stat store, the splits vs the opposing pitcher's hand taken
+        from both hand columns. Batting order, team and hand are looked up per
+        batter, and the matchup values once per (team, hand).
+
+        Batters without at bats are reported in errors and left out: get_score
+        fails on them.
+
+        Parameters
+            :param batters: the batters whose inputs we are gathering
+            :param errors: list; (batter, message) is appended for each batter
+                           whose inputs couldn't be found
+
+        :return (list of float arrays aligned with batters, bool array of the
+                 batters whose inputs were all found)
+        """
+        self.player_stats.preload(['batter_total', 'batter_vs_hand'])
+        store = self.player_stats.store
+        rows = store.rows(batters)
+
+        def column(stat, split=None):
+            return store.take(rows, self.year, stat, split)
+
+        def vs_hand(stat, left):
+            # the split vs the opposing pitcher's hand, NaN when it is neither
+            return np.where(left == 1, column(stat, 'LHP'), np.where(left == 0, column(stat, 'RHP'), np.nan))
+
+        ab = column('ab_total')
+        ab[ab != ab] = 0.0
+
+        # batting order multipliers, then _batter_context
+        missing = (np.nan,) * 13
+        context = [missing] * len(batters)
+        matchups = {}
+        ok = ab > 0
+        for b, batter in enumerate(batters):
+            if not ok[b]:
+                errors.append((batter, 'no at bats in %d' % self.year))
+                continue
+            try:
+                batter_hand = self.player_stats.get_player_batting_hand(batter)
+                batting_position = self.player_stats.get_player_batting_position(batter)
+                key = (self.player_stats.get_player_team(batter), batter_hand)
+                if key not in matchups:
+                    matchups[key] = self._batter_context(*key)
+                context[b] = (EXPECTED_PA[batting_position],
+                              RUN_MULTIPLIER[batting_position],
+                              RBI_MULTIPLIER[batting_position]) + matchups[key]
+            except Exception as e:
+                ok[b] = False
+                errors.append((batter, repr(e)))
+
+        (exp_pa, run_mult, rbi_mult, left, opp_pitcher_woba, opp_pitcher_bb_percentage, opp_pitcher_hr_percentage,
+         park_avg, park_hr, park_overall, opp_sb_allowed_percentage, opp_sb_attempts_against, team_factor) = np.array(context).T
+        league = self.get_league_constants(self.year)
+
+        return [ab,
+                column('1b_total'),
+                column('2b_total'),
+                column('3b_total'),
+                column('h_total'),
+                column('hr_total'),
+                column('bb_total'),
+                column('bb_percent_total'),
+                column('pa_total'),
+                column('ba_total'),
+                column('g_total'),
+                column('sb_total'),
+                vs_hand('woba', left),
+                vs_hand('hr', left),
+                vs_hand('pa', left),
+                exp_pa,
+                run_mult,
+                rbi_mult,
+                opp_pitcher_woba,
+                opp_pitcher_bb_percentage,
+                opp_pitcher_hr_percentage,
+                park_avg,
+                park_hr,
+                park_overall,
+                opp_sb_allowed_percentage,
+                opp_sb_attempts_against,
+                team_factor,
+                float(league['woba']),
+                league['bb_percentage'],
+                league['hr_percentage'],
+                league['sb_allowed_percentage'],
+                league['sb_attempts_against_avg']], ok
+
+    def _batter_context(self, batter_team, batter_hand):
+        # the inputs shared by every batter of a team and hand, in the order of
+        # the context columns of _gather_batters; left is 1 vs a LHP, 0 vs a RHP
+        matchup = self.get_matchup_context(batter_team, batter_hand)
+        sb_context = self.get_sb_context(matchup['opp_team'])
+        park = matchup['park']
+        return ({'left': 1.0, 'right': 0.0}.get(matchup['opp_pitcher_hand'].lower(), np.nan),
+                float(matchup['opp_pitcher_woba']),
+                float(matchup['opp_pitcher_bb_percentage']),
+                float(matchup['opp_pitcher_hr_percentage']),
+                float(self.ballpark_stats.get_ballpark_factor_batting_average(park, batter_hand)),
+                float(self.ballpark_stats.get_ballpark_factor_homerun(park, batter_hand)),
+                float(self.ballpark_stats.get_ballpark_factor_overall(park)),
+                sb_context['opp_sb_allowed_percentage'],
+                sb_context['opp_sb_attempts_against'],
+                float(matchup['team_factor']))
+
+    @timed('StatEquations')
+    def _batter_scores(self, columns):
+        """
+        Function: _batter_scores
+        -----------------
+        Vectorized get_score for batters. Matches batter_points_expected_for_runs,
+        _hits, _rbi, _hr, _sb and _walks, including the cap on the HR multipliers.
+
+        Parameters
+            :param columns: the input arrays from _gather_batters
+
+        :return array of batter scores
+        """
+        (ab, singles, doubles, triples, hits, hr, bb, bb_percent, pa, ba, g, sb,
+         woba_vs_hand, hr_vs_hand, pa_vs_hand, exp_pa, run_mult, rbi_mult,
+         opp_pitcher_woba, opp_pitcher_bb_percentage, opp_pitcher_hr_percentage,
+         park_avg, park_hr, park_overall, opp_sb_allowed_percentage, opp_sb_attempts_against, team_factor,
+         league_woba, league_bb_percentage, league_hr_percentage,
+         league_sb_allowed_percentage, league_sb_attempts_against_avg) = columns
+
+        pitcher_woba_eff = opp_pitcher_woba / league_woba
+        batter_woba_eff = woba_vs_hand / league_woba
+
+        # hits
+        adj_slg = (singles + 2.0 * doubles + 3.0 * triples - 0.25 * (ab - hits)) / (ab - hr)
+        exp_ab = exp_pa - bb / g
+        hits_points = adj_slg * exp_ab * ((1.5 * pitcher_woba_eff + 1.5 * batter_woba_eff + park_avg) / 4)
+
+        # walks
+        walk_pitcher_eff = opp_pitcher_bb_percentage / league_bb_percentage
+        walk_batter_eff = bb_percent / league_bb_percentage
+        walks_points = bb_percent * exp_pa * ((walk_pitcher_eff + walk_batter_eff) / 2)
+
+        # home runs
+        hr_pitcher_eff = np.minimum(opp_pitcher_hr_percentage / league_hr_percentage, 2)
+        hr_batter_eff = np.minimum((hr_vs_hand / pa_vs_hand) / league_hr_percentage, 2)
+        hr_points = 4.0 * (hr / pa) * exp_pa * ((1.5 * hr_pitcher_eff + 1.5 * hr_batter_eff + park_hr) / 4)
+
+        # stolen bases
+        sb_allowed_eff = opp_sb_allowed_percentage / league_sb_allowed_percentage
+        sb_attempts_eff = opp_sb_attempts_against / league_sb_attempts_against_avg
+        sb_points = 2.0 * (sb / g) * ((sb_allowed_eff + sb_attempts_eff) / 2)
+
+        # runs and rbis
+        batter_runs_per_pa = 0.330 * ba + 0.187 * bb_percent + 0.560 * (hr / pa)
+        run_eff = (1.5 * pitcher_woba_eff + 1.5 * batter_woba_eff + park_overall + team_factor) / 5
+        runs_points = batter_runs_per_pa * exp_pa * run_mult * run_eff
+        rbi_points = batter_runs_per_pa * exp_pa * rbi_mult * run_eff
+
+        return runs_points + hits_points + rbi_points + hr_points + sb_points + walks_points
@@ -19,10 +19,12 @@ Source of stats: Rotowire Ball Park Factors
 from collections import defaultdict
 import csv
 import json
+from snapshot import open_source, snapshot_path, load_snapshot, save_snapshot, flatten_stats, unflatten_stats
+from profiling import timed
 
 class BallparkStats:
 
-    def __init__(self, statsDir):
+    def __init__(self, statsDir, use_snapshot=True):
         """
         Function: _init_
         -----------------
@@ -33,6 +35,7 @@ class BallparkStats:
         Parameters:
             :param statsDir: Directory in Dropbox with all Stats. Should always be:
                         /Dropbox/MDI Fantasy Sports/Stats
+            :param use_snapshot: load and save a snapshot of the parsed stats
 
         :return none
         """
@@ -40,8 +43,18 @@ class BallparkStats:
 
         self.stats = defaultdict(dict)
 
-        self.read_ballpark_factors()
+        # every stats file the read_* functions opened
+        self.sources = []
 
+        snapshot = snapshot_path(self.statsDir, 'BallparkStats') if use_snapshot else None
+        loaded = load_snapshot(snapshot)
+        if loaded is not None:
+            unflatten_stats(loaded['header']['stats'], self.stats)
+        else:
+            self.read_ballpark_factors()
+            save_snapshot(snapshot, self.sources, {'stats': flatten_stats(self.stats)})
+
+    @timed('BallparkStats')
     def read_ballpark_factors(self):
         """
         Function: read_ballpark_factors
@@ -57,7 +70,7 @@ class BallparkStats:
         """
         stats = ['overall', 'avg_lhb', 'avg_rhb', 'hr_lhb', 'hr_rhb']
         infile = '%s/Park Factor/Ball Park Factor.csv' %(self.statsDir)
-        reader = csv.reader(open(infile), quotechar='"')
+        reader = csv.reader(open_source(infile, self.sources), quotechar='"')
         header = reader.next()
         for items in reader:
             team = items[0].upper()
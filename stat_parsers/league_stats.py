@@ -23,10 +23,12 @@ Source of stats: Fangraphs
 from collections import defaultdict
 import csv
 import json
+from snapshot import open_source, snapshot_path, load_or_parse
+from profiling import registry, timed
 
 class LeagueStats:
 
-    def __init__(self, statsDir):
+    def __init__(self, statsDir, use_snapshot=True, years=None):
         """
         Function: _init_
         -----------------
@@ -37,16 +39,43 @@ class LeagueStats:
         Parameters:
             :param statsDir: Directory in Dropbox with all Stats. Should always be:
                         /Dropbox/MDI Fantasy Sports/Stats
+            :param use_snapshot: load and save a snapshot of every season of the
+                                 parsed stats
+            :param years: the seasons to read (default: 2014)
 
         :return nothing
         """
         self.statsDir = statsDir.rstrip('/')
+        self.years = list(years) if years else [2014]
+        self.use_snapshot = use_snapshot
 
         self.stats = defaultdict(dict)
 
-        self.read_league_stats()
+        # every stats file the read_* functions opened
+        self.sources = []
 
-    def read_league_stats(self):
+        for year in self.years:
+            self.load_season(year)
+
+    def load_season(self, year):
+        """
+        Function: load_season
+        -----------------
+        Reads one season of league stats from its snapshot, or parses it and writes
+        the snapshot, so adding a season to self.years only parses that season.
+
+        Parameters:
+            :param year: the season
+
+        :return nothing
+        """
+        path = snapshot_path(self.statsDir, 'LeagueStats-%d' % year) if self.use_snapshot else None
+        loaded = load_or_parse(path, self.stats, self.sources, lambda: self.read_league_stats([year]),
+                               lambda record: record[0] == year)
+        registry.count('LeagueStats.snapshot_loads' if loaded else 'LeagueStats.csv_parses')
+
+    @timed('LeagueStats')
+    def read_league_stats(self, years=None):
         """
         Function: read_league_stats
         -----------------
@@ -55,15 +84,15 @@ class LeagueStats:
             (statsDir from _init_)/League/(YEAR) League Stats.csv
 
         Parameters:
-            :param none
+            :param years: the seasons to read, every season in self.years by default
 
         :return nothing
         """
         stats = ['k_percent', 'ops', 'sb', 'cs', 'hr', 'pa', 'bb', 'r', 'woba']
-        years = [2014]
+        years = self.years if years is None else years
         for year in years:
             infile = '%s/League/%d League Stats.csv' %(self.statsDir, year)
-            reader = csv.reader(open(infile), quotechar='"')
+            reader = csv.reader(open_source(infile, self.sources), quotechar='"')
             header = reader.next()
             for items in reader:
                 for i, stat_val in enumerate([float(x.rstrip('%')) for x in items[1:10]]):
@@ -58,7 +58,11 @@ Source of stats: Fangraphs & FanDuel salary scrape
 """
 
 from team_stats import *
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from functools import wraps
+from stat_store import ColumnarStatStore
+from snapshot import open_source, snapshot_path, load_snapshot, save_snapshot
+from profiling import registry, timed
 import csv
 import json
 import urllib2
@@ -67,41 +71,206 @@ from bs4 import BeautifulSoup
 import sys
 import math
 
+import numpy as np
 
-from team_stats import get_team_by_mascot
+
+from team_stats import get_team_by_alias
+
+# The stat families PlayerStats reads, in reading order, and their read_* functions
+STAT_FAMILIES = OrderedDict([('batter_total', 'read_batter_stats_total'),
+                             ('pitcher_total', 'read_pitcher_stats_total'),
+                             ('pitcher_home_away', 'read_pitcher_stats_home_away'),
+                             ('pitcher_vs_hand', 'read_pitcher_stats_vs_RHB_LHB'),
+                             ('catcher', 'read_catcher_fielding_stats'),
+                             ('batter_vs_hand', 'read_batter_stats_vs_RHP_LHP')])
+
+def uses_families(*families):
+    """
+    Function: uses_families
+    -----------------
+    Decorator for the getters of PlayerStats: reads the stat families the getter
+    needs before it runs, if they haven't been read yet (lazy PlayerStats only).
+
+    Parameters:
+        :param families: names of the families (see STAT_FAMILIES)
+
+    :return the decorator
+    """
+    def decorate(getter):
+        @wraps(getter)
+        def lazy_getter(self, *args):
+            if self.unloaded:
+                self.preload(families)
+            return getter(self, *args)
+        return lazy_getter
+    return decorate
 
 class PlayerStats:
 
-    def __init__(self, statsDir):
+    def __init__(self, statsDir, use_snapshot=True, lazy=False, years=None):
         """
         Function: _init_
         -----------------
 
         This is the initial function. It takes in the stats directory as a parameter,
-        and calls the 'read_*' functions.
+        and reads every stat family (see STAT_FAMILIES). Each family is loaded from its
+        snapshot when none of its files changed since the snapshot was written, and
+        parsed with its 'read_*' function otherwise.
 
         Parameters:
             :param statsDir: Directory in Dropbox with all Stats. Should always be:
                         /Dropbox/MDI Fantasy Sports/Stats
+            :param use_snapshot: load and save snapshots of the parsed stats
+            :param lazy: only read a stat family when one of its getters is first
+                         called (or on preload). Resolving lineup names only reads
+                         the names of the families, see load_names
+            :param years: the seasons to read (default: 2014). Every season is kept
+                          in the same store, and has its own snapshots
 
         :return nothing
         """
         self.statsDir = statsDir.rstrip('/')
+        self.use_snapshot = use_snapshot
+        self.years = list(years) if years else [2014]
+
+        # numeric stats live in a columnar store keyed by (name, uid); the
+        # per-player info (teams, salary, hands, ...) stays in plain dicts
+        self.store = ColumnarStatStore()
+        self.player_info = defaultdict(dict)
 
-        self.stats = defaultdict(lambda: defaultdict( lambda: defaultdict( lambda: defaultdict (dict))))
+        # (first initial, last name) -> {(name, uid): {year: set of teams}}, in the
+        # order players were first read, so lineup names resolve without a scan
+        self.name_index = defaultdict(OrderedDict)
         self.starting_pitchers = {}
 
-        self.read_batter_stats_total()
-        self.read_pitcher_stats_total()
-        self.read_pitcher_stats_home_away()
-        self.read_pitcher_stats_vs_RHB_LHB()
-        self.read_catcher_fielding_stats()
-        self.read_batter_stats_vs_RHP_LHP()
+        # bumped whenever a starting pitcher or throwing hand changes, so cached
+        # matchups can be dropped
+        self.matchup_version = 0
+
+        # every stats file the read_* functions opened
+        self.sources = []
+        # (player, team) of every add_player_team while a family is parsed
+        self.team_log = None
+
+        self.unloaded = set(STAT_FAMILIES)
+        # families whose players aren't in name_index yet
+        self.unnamed = set(STAT_FAMILIES)
+        if not lazy:
+            self.preload()
         #self.read_batter_stats_7_day()
 
 
-        #print len(self.stats.items())
-        #print len([name for name, stats in self.stats.items() if '7_day' in stats])
+        #print len(self.store)
+        #print len([key for key in self.store.keys if '7_day' in self.store.entity_stats(key)])
+
+    def preload(self, families=None):
+        """
+        Function: preload
+        -----------------
+        Reads stat families now instead of on first use, ie before a latency critical
+        step of a lazy PlayerStats.
+
+        Parameters:
+            :param families: names of the families to read (see STAT_FAMILIES), or
+                             None for all of them
+
+        :return nothing
+        """
+        for family in STAT_FAMILIES:
+            if family in self.unloaded and (families is None or family in families):
+                self.load_family(family)
+
+    def load_family(self, family):
+        """
+        Function: load_family
+        -----------------
+        Reads every season of one stat family.
+
+        Parameters:
+            :param family: name of the family (see STAT_FAMILIES)
+
+        :return nothing
+        """
+        for year in self.years:
+            self.load_season(family, year)
+        self.unloaded.discard(family)
+        self.unnamed.discard(family)
+
+    def load_names(self):
+        """
+        Function: load_names
+        -----------------
+        Fills the name index get_player_full_name resolves lineup names with, from
+        every stat family. A family whose snapshots are current only has the names
+        and teams read from them, without its stats; any other family is read in
+        full (which writes its snapshots).
+
+        Parameters:
+            :param none
+
+        :return nothing
+        """
+        for family in STAT_FAMILIES:
+            if family not in self.unnamed:
+                continue
+            snapshots = []
+            for year in self.years:
+                path = snapshot_path(self.statsDir, 'PlayerStats-%s-%d' % (family, year)) if self.use_snapshot else None
+                snapshots.append(load_snapshot(path, ['names', 'uids', 'team_keys', 'teams']))
+            if None in snapshots:
+                self.load_family(family)
+                continue
+            for year, snapshot in zip(self.years, snapshots):
+                keys = zip([intern(name) for name in snapshot['names'].tolist()], snapshot['uids'].tolist())
+                for r, team in zip(snapshot['team_keys'].tolist(), snapshot['teams'].tolist()):
+                    self.index_name(keys[r], team or None, year)
+            self.unnamed.discard(family)
+
+    def load_season(self, family, year):
+        """
+        Function: load_season
+        -----------------
+        Reads one season of a stat family from its snapshot, or parses it and writes
+        the snapshot. Past seasons don't change, so adding a season to self.years
+        only parses that season.
+
+        Parameters:
+            :param family: name of the family (see STAT_FAMILIES)
+            :param year: the season
+
+        :return nothing
+        """
+        with registry.timer('PlayerStats.load_season.%s' % family):
+            self._load_season(family, year)
+
+    def _load_season(self, family, year):
+        path = snapshot_path(self.statsDir, 'PlayerStats-%s-%d' % (family, year)) if self.use_snapshot else None
+        snapshot = load_snapshot(path)
+        if snapshot is not None:
+            registry.count('PlayerStats.snapshot_loads')
+            header = snapshot['header']
+            keys = zip([intern(name) for name in snapshot['names'].tolist()], snapshot['uids'].tolist())
+            self.store.merge(keys, [tuple(name) for name in header['columns']], snapshot['values'])
+            for r, team in zip(snapshot['team_keys'].tolist(), snapshot['teams'].tolist()):
+                self.add_player_team(keys[r], team or None, year)
+            self.sources.extend(source for source, mtime, size in header['sources'])
+        else:
+            registry.count('PlayerStats.csv_parses')
+            start = len(self.sources)
+            columns = set(self.store.columns)
+            self.team_log = []
+            getattr(self, STAT_FAMILIES[family])([year])
+            teams, self.team_log = self.team_log, None
+
+            keys = list(OrderedDict.fromkeys(key for key, team in teams))
+            rows = dict((key, r) for r, key in enumerate(keys))
+            names = [name for name in self.store.columns if name not in columns]
+            save_snapshot(path, self.sources[start:], {'columns': names},
+                          names=np.array([key[0] for key in keys], dtype=str),
+                          uids=np.array([key[1] for key in keys], dtype=int),
+                          team_keys=np.array([rows[key] for key, team in teams], dtype=int),
+                          teams=np.array([team or '' for key, team in teams], dtype=str),
+                          values=self.store.dump(keys, names))
 
     def printStats(self):
         """
@@ -114,7 +283,22 @@ class PlayerStats:
 
         :return none
         """
-        print json.dumps(self.stats, indent=4)
+        self.preload()
+        print json.dumps(dict((str(key), self.store.entity_stats(key)) for key in self.store.keys), indent=4)
+
+    def add_player_team(self, player, team, year):
+        self.player_info[player].setdefault('teams', []).append(team)
+        self.index_name(player, team, year)
+        if self.team_log is not None:
+            self.team_log.append((player, team))
+
+    def index_name(self, player, team, year):
+        # adds a player's team in a season to name_index; adding one twice
+        # changes nothing
+        name = player[0]
+        if name:
+            candidates = self.name_index[(name[0], name.split()[-1])]
+            candidates.setdefault(player, {}).setdefault(year, set()).add(team)
 
     def printPitchers(self):
         """
@@ -129,7 +313,8 @@ class PlayerStats:
         """
         print json.dumps(self.starting_pitchers, indent=4)
 
-    def read_pitcher_stats_home_away(self):
+    @timed('PlayerStats')
+    def read_pitcher_stats_home_away(self, years=None):
         """
         Function: read_pitcher_stats_home_away
         -----------------
@@ -138,24 +323,25 @@ class PlayerStats:
             (statsDir from _init_)/Pitcher/(YEAR)/(YEAR) (HOME/AWAY) Pitcher Stats.csv
 
         Parameters:
-            :param none
+            :param years: the seasons to read, every season in self.years by default
 
         :return nothing
         """
         stat = 'xfip'
-        years = [2014]
+        years = self.years if years is None else years
         for year in years:
             for loc in ['Home', 'Away']:
                 infile = '%s/Pitcher/%d/%d %s Pitcher Stats.csv' %(self.statsDir, year, year, loc)
-                reader = csv.reader(open(infile), quotechar='"')
+                reader = csv.reader(open_source(infile, self.sources), quotechar='"')
                 header = reader.next()
                 for items in reader:
-                    player = items[0].lower()
+                    player = intern(items[0].lower())
                     uid = int(items[3])
-                    team = get_team_by_mascot(items[1])
-                    self.stats[(player, uid)]['teams'] = self.stats[(player, uid)].get('teams', []) + [team]
-                    self.stats[(player, uid)][year][stat][loc.lower()] = float(items[2])
+                    team = get_team_by_alias(items[1], 'fangraphs')
+                    self.add_player_team((player, uid), team, year)
+                    self.store.set((player, uid), year, stat, float(items[2]), loc.lower())
 
+    @uses_families('pitcher_home_away')
     def get_pitcher_xfip_allowed(self, year, player, homeOrAway):
         """
         Function: get_pitcher_xfip_allowed
@@ -172,9 +358,10 @@ class PlayerStats:
         equations used in:
             pitcher_points_expected_for_er
         """
-        return self.stats[player][year]['xfip'][homeOrAway]
+        return self.store.get(player, year, 'xfip', homeOrAway)
 
-    def read_pitcher_stats_vs_RHB_LHB(self):
+    @timed('PlayerStats')
+    def read_pitcher_stats_vs_RHB_LHB(self, years=None):
         """
         Function: read_pitcher_stats_vs_RHB_LHB
         -----------------
@@ -183,32 +370,33 @@ class PlayerStats:
             (statsDir from _init_)/Pitcher/(YEAR)/(YEAR) Pitcher Stats vs (RHB/LHB).csv
 
         Parameters:
-            :param none
+            :param years: the seasons to read, every season in self.years by default
 
         :return nothing
         """
         stats = ['hr_allowed', 'bb_allowed', 'tbf', 'woba_allowed']
-        years = [2014]
+        years = self.years if years is None else years
         for year in years:
             for hand in ['RHB', 'LHB']:
                 infile = '%s/Pitcher/%d/%d Pitcher Stats vs %s.csv' %(self.statsDir, year, year, hand)
-                reader = csv.reader(open(infile), quotechar='"')
+                reader = csv.reader(open_source(infile, self.sources), quotechar='"')
                 header = reader.next()
                 for items in reader:
-                    player = items[0].lower()
+                    player = intern(items[0].lower())
                     uid = int(items[6])
-                    team = get_team_by_mascot(items[1])
-                    self.stats[(player, uid)]['teams'] = self.stats[(player, uid)].get('teams', []) + [team]
+                    team = get_team_by_alias(items[1], 'fangraphs')
+                    self.add_player_team((player, uid), team, year)
                     if float(items[4]) > 50:
                         for i, stat_val in enumerate([float(x) for x in items[2:6]]):
-                            self.stats[(player, uid)][year][stats[i]][hand] = stat_val
+                            self.store.set((player, uid), year, stats[i], stat_val, hand)
                     else:
                         #print 'Less than 50 TBF for ', player
-                        self.stats[(player, uid)][year][stats[0]][hand] = math.ceil(float(items[2]) + (0.023 * (50 - float(items[4]))))
-                        self.stats[(player, uid)][year][stats[1]][hand] = math.ceil(float(items[3]) + (0.077 * (50 - float(items[4]))))
-                        self.stats[(player, uid)][year][stats[2]][hand] = float(50)
-                        self.stats[(player, uid)][year][stats[3]][hand] = float(.312)
+                        self.store.set((player, uid), year, stats[0], math.ceil(float(items[2]) + (0.023 * (50 - float(items[4])))), hand)
+                        self.store.set((player, uid), year, stats[1], math.ceil(float(items[3]) + (0.077 * (50 - float(items[4])))), hand)
+                        self.store.set((player, uid), year, stats[2], float(50), hand)
+                        self.store.set((player, uid), year, stats[3], float(.312), hand)
 
+    @uses_families('pitcher_vs_hand')
     def get_pitcher_hr_allowed_vs_RHB_LHB(self, year, player, hand):
         """
         Function: get_pitcher_hr_allowed_vs_RHB_LHB
@@ -226,12 +414,13 @@ class PlayerStats:
             batter_points_expected_for_hr
         """
         if hand.lower()=='left':
-            return self.stats[player][year]['hr_allowed']['LHB']
+            return self.store.get(player, year, 'hr_allowed', 'LHB')
         elif hand.lower()=='right':
-            return self.stats[player][year]['hr_allowed']['RHB']
+            return self.store.get(player, year, 'hr_allowed', 'RHB')
         else:
             return None
 
+    @uses_families('pitcher_vs_hand')
     def get_pitcher_bb_allowed_vs_RHB_LHB(self, year, player, hand):
         """
         Function: get_pitcher_bb_allowed_vs_RHB_LHB
@@ -249,12 +438,13 @@ class PlayerStats:
             batter_points_expected_for_walks
         """
         if hand.lower()=='left':
-            return self.stats[player][year]['bb_allowed']['LHB']
+            return self.store.get(player, year, 'bb_allowed', 'LHB')
         elif hand.lower()=='right':
-            return self.stats[player][year]['bb_allowed']['RHB']
+            return self.store.get(player, year, 'bb_allowed', 'RHB')
         else:
             return None
 
+    @uses_families('pitcher_vs_hand')
     def get_pitcher_total_batters_faced_vs_RHB_LHB(self, year, player, hand):
         """
         Function: get_pitcher_total_batters_faced_vs_RHB_LHB
@@ -273,12 +463,13 @@ class PlayerStats:
             batter_points_expected_for_hr
         """
         if hand.lower()=='left':
-            return self.stats[player][year]['tbf']['LHB']
+            return self.store.get(player, year, 'tbf', 'LHB')
         elif hand.lower()=='right':
-            return self.stats[player][year]['tbf']['RHB']
+            return self.store.get(player, year, 'tbf', 'RHB')
         else:
             return None
 
+    @uses_families('pitcher_vs_hand')
     def get_pitcher_woba_allowed_vs_RHB_LHB(self, year, player, hand):
         """
         Function: get_pitcher_woba_allowed_vs_RHB_LHB
@@ -298,13 +489,14 @@ class PlayerStats:
             batter_points_expected_for_hits
         """
         if hand.lower()=='left':
-            return self.stats[player][year]['woba_allowed']['LHB']
+            return self.store.get(player, year, 'woba_allowed', 'LHB')
         elif hand.lower()=='right':
-            return self.stats[player][year]['woba_allowed']['RHB']
+            return self.store.get(player, year, 'woba_allowed', 'RHB')
         else:
             return None
 
-    def read_pitcher_stats_total(self):
+    @timed('PlayerStats')
+    def read_pitcher_stats_total(self, years=None):
         """
         Function: read_pitcher_stats_total
         -----------------
@@ -313,31 +505,32 @@ class PlayerStats:
             (statsDir from _init_)/Pitcher/(YEAR)/(YEAR) Total Pitcher Stats.csv
 
         Parameters:
-            :param none
+            :param years: the seasons to read, every season in self.years by default
 
         :return nothing
         """
         stats = ['gs_total', 'k_pitched_total', 'ip_total', 'g_pitched_total']
-        years = [2014]
+        years = self.years if years is None else years
         for year in years:
             infile = '%s/Pitcher/%d/%d Total Pitcher Stats.csv' %(self.statsDir, year, year)
-            reader = csv.reader(open(infile), quotechar='"')
+            reader = csv.reader(open_source(infile, self.sources), quotechar='"')
             header = reader.next()
             for items in reader:
-                player = items[0].lower()
+                player = intern(items[0].lower())
                 uid = int(items[6])
-                team = get_team_by_mascot(items[1])
-                self.stats[(player, uid)]['teams'] = self.stats[(player, uid)].get('teams', []) + [team]
+                team = get_team_by_alias(items[1], 'fangraphs')
+                self.add_player_team((player, uid), team, year)
                 if float(items[4]) > 15:
                     for i, stat_val in enumerate([float(x) for x in items[2:6]]):
-                        self.stats[(player, uid)][year][stats[i]] = stat_val
+                        self.store.set((player, uid), year, stats[i], stat_val)
                 else:
                     #print 'Less than 20 IP for ', player
-                    self.stats[(player, uid)][year][stats[0]] = float(4)
-                    self.stats[(player, uid)][year][stats[1]] = math.ceil(float(items[3]) + (0.75 * (20 - float(items[4]))))
-                    self.stats[(player, uid)][year][stats[2]] = float(20)
-                    self.stats[(player, uid)][year][stats[3]] = float(4)
+                    self.store.set((player, uid), year, stats[0], float(4))
+                    self.store.set((player, uid), year, stats[1], math.ceil(float(items[3]) + (0.75 * (20 - float(items[4])))))
+                    self.store.set((player, uid), year, stats[2], float(20))
+                    self.store.set((player, uid), year, stats[3], float(4))
 
+    @uses_families('pitcher_total')
     def get_pitcher_total_games_played(self, year, player):
         """
         Function: get_pitcher_total_games_played
@@ -354,8 +547,9 @@ class PlayerStats:
             pitcher_points_expected_for_k
             pitcher_expected_ip
         """
-        return self.stats[player][year]['g_pitched_total']
+        return self.store.get(player, year, 'g_pitched_total')
 
+    @uses_families('pitcher_total')
     def get_pitcher_total_games_started(self, year, player):
         """
         Function: get_pitcher_total_games_started
@@ -372,8 +566,9 @@ class PlayerStats:
             pitcher_points_expected_for_k
             pitcher_expected_ip
         """
-        return self.stats[player][year]['gs_total']
+        return self.store.get(player, year, 'gs_total')
 
+    @uses_families('pitcher_total')
     def get_pitcher_total_k(self, year, player):
         """
         Function: get_pitcher_total_k
@@ -389,8 +584,9 @@ class PlayerStats:
         equations used in:
             pitcher_points_expected_for_k
         """
-        return self.stats[player][year]['k_pitched_total']
+        return self.store.get(player, year, 'k_pitched_total')
 
+    @uses_families('pitcher_total')
     def get_pitcher_total_innings_pitched(self, year, player):
         """
         Function: get_pitcher_total_innings_pitched
@@ -407,9 +603,10 @@ class PlayerStats:
             pitcher_points_expected_for_k
             pitcher_expected_ip
         """
-        return self.stats[player][year]['ip_total']
+        return self.store.get(player, year, 'ip_total')
 
-    def read_catcher_fielding_stats(self):
+    @timed('PlayerStats')
+    def read_catcher_fielding_stats(self, years=None):
         """
         Function: read_catcher_stats
         -----------------
@@ -417,24 +614,26 @@ class PlayerStats:
 
             (statsDir from _init_)/Catcher/(YEAR) Catcher Stats.csv
 
-        Parameters: none
+        Parameters:
+            :param years: the seasons to read, every season in self.years by default
 
         :return nothing
         """
         stats = ['sb_catcher', 'cs_catcher']
-        years = [2014]
+        years = self.years if years is None else years
         for year in years:
             infile = '%s/Catcher/%d Catcher Stats.csv' %(self.statsDir, year)
-            reader = csv.reader(open(infile), quotechar='"')
+            reader = csv.reader(open_source(infile, self.sources), quotechar='"')
             header = reader.next()
             for items in reader:
-                player = items[0].lower()
+                player = intern(items[0].lower())
                 uid = int(items[4])
-                team = get_team_by_mascot(items[1])
-                self.stats[(player, uid)]['teams'] = self.stats[(player, uid)].get('teams', []) + [team]
+                team = get_team_by_alias(items[1], 'fangraphs')
+                self.add_player_team((player, uid), team, year)
                 for i, stat_val in enumerate([float(x) for x in items[2:4]]):
-                    self.stats[(player, uid)][year][stats[i]] = stat_val
+                    self.store.set((player, uid), year, stats[i], stat_val)
 
+    @uses_families('catcher')
     def get_catcher_fielding_stolen_bases_allowed(self, year, player):
         """
         Function: get_catcher_fielding_stolen_bases_allowed
@@ -450,8 +649,9 @@ class PlayerStats:
         equations used in:
             Not used yet. Would be used in batter_points_expected_for_sb
         """
-        return self.stats[player][year]['sb_catcher']
+        return self.store.get(player, year, 'sb_catcher')
 
+    @uses_families('catcher')
     def get_catcher_fielding_caught_stealing(self, year, player):
         """
         Function: get_catcher_fielding_caught_stealing
@@ -467,9 +667,10 @@ class PlayerStats:
         equations used in:
             Not used yet. Would be used in batter_points_expected_for_sb
         """
-        return self.stats[player][year]['cs_catcher']
+        return self.store.get(player, year, 'cs_catcher')
 
-    def read_batter_stats_vs_RHP_LHP(self):
+    @timed('PlayerStats')
+    def read_batter_stats_vs_RHP_LHP(self, years=None):
         """
         Function: read_batter_stats_vs_RHP_LHP
         -----------------
@@ -478,32 +679,33 @@ class PlayerStats:
             (statsDir from _init_)/Batter/(YEAR)/(YEAR) Batter Stats vs (RHP/LHP).csv
 
         Parameters:
-            :param none
+            :param years: the seasons to read, every season in self.years by default
 
         :return nothing
         """
         stats = ['pa', 'hr', 'k', 'woba']
-        years = [2014]
+        years = self.years if years is None else years
         for year in years:
             for hand in ['RHP', 'LHP']:
                 infile = '%s/Batter/%d/%d Batter Stats vs %s.csv' %(self.statsDir, year, year, hand)
-                reader = csv.reader(open(infile), quotechar='"')
+                reader = csv.reader(open_source(infile, self.sources), quotechar='"')
                 header = reader.next()
                 for items in reader:
-                    player = items[0].lower()
+                    player = intern(items[0].lower())
                     uid = int(items[6])
-                    team = get_team_by_mascot(items[1])
-                    self.stats[(player, uid)]['teams'] = self.stats[(player, uid)].get('teams', []) + [team]
+                    team = get_team_by_alias(items[1], 'fangraphs')
+                    self.add_player_team((player, uid), team, year)
                     if float(items [2]) > 50:
                         for i, stat_val in enumerate([float(x) for x in items[2:6]]):
-                            self.stats[(player, uid)][year][stats[i]][hand] = stat_val
+                            self.store.set((player, uid), year, stats[i], stat_val, hand)
                     else:
                         #print 'Less than 50 PA for ', player
-                        self.stats[(player, uid)][year][stats[1]][hand] = math.floor(float(items[3]) + (.023 * (50 - float(items[2]))))
-                        self.stats[(player, uid)][year][stats[2]][hand] = math.ceil(float(items[4]) + (.20 * (50 - float(items[2]))))
-                        self.stats[(player, uid)][year][stats[3]][hand] = ((float(items[5]) * float(items[2])) + (.312 * (50 - float(items[2])))) / 50
-                        self.stats[(player, uid)][year][stats[0]][hand] = float(50)
+                        self.store.set((player, uid), year, stats[1], math.floor(float(items[3]) + (.023 * (50 - float(items[2])))), hand)
+                        self.store.set((player, uid), year, stats[2], math.ceil(float(items[4]) + (.20 * (50 - float(items[2])))), hand)
+                        self.store.set((player, uid), year, stats[3], ((float(items[5]) * float(items[2])) + (.312 * (50 - float(items[2])))) / 50, hand)
+                        self.store.set((player, uid), year, stats[0], float(50), hand)
 
+    @uses_families('batter_vs_hand')
     def get_batter_plate_appearances_vs_RHP_LHP(self, year, player, hand):
         """
         Function: get_batter_plate_appearances_vs_RHP_LHP
@@ -521,12 +723,13 @@ class PlayerStats:
             batter_points_expected_for_hr
         """
         if hand.lower()=='left':
-            return self.stats[player][year]['pa']['LHP']
+            return self.store.get(player, year, 'pa', 'LHP')
         elif hand.lower()=='right':
-            return self.stats[player][year]['pa']['RHP']
+            return self.store.get(player, year, 'pa', 'RHP')
         else:
             return None
 
+    @uses_families('batter_vs_hand')
     def get_batter_hr_vs_RHP_LHP(self, year, player, hand):
         """
         Function: get_batter_hr_vs_RHP_LHP
@@ -544,12 +747,13 @@ class PlayerStats:
             batter_points_expected_for_hr
         """
         if hand.lower()=='left':
-            return self.stats[player][year]['hr']['LHP']
+            return self.store.get(player, year, 'hr', 'LHP')
         elif hand.lower()=='right':
-            return self.stats[player][year]['hr']['RHP']
+            return self.store.get(player, year, 'hr', 'RHP')
         else:
             return None
 
+    @uses_families('batter_vs_hand')
     def get_batter_k_vs_RHP_LHP(self, year, player, hand):
         #TODO: Check to see why this is not used
         """
@@ -568,12 +772,13 @@ class PlayerStats:
             Not used...interesting.
         """
         if hand.lower()=='left':
-            return self.stats[player][year]['k']['LHP']
+            return self.store.get(player, year, 'k', 'LHP')
         elif hand.lower()=='right':
-            return self.stats[player][year]['k']['RHP']
+            return self.store.get(player, year, 'k', 'RHP')
         else:
             return None
 
+    @uses_families('batter_vs_hand')
     def get_batter_woba_vs_RHP_LHP(self, year, player, hand):
         """
         Function: get_batter_woba_vs_RHP_LHP
@@ -593,13 +798,14 @@ class PlayerStats:
             batter_points_expected_for_hits
         """
         if hand.lower()=='left':
-            return self.stats[player][year]['woba']['LHP']
+            return self.store.get(player, year, 'woba', 'LHP')
         elif hand.lower()=='right':
-            return self.stats[player][year]['woba']['RHP']
+            return self.store.get(player, year, 'woba', 'RHP')
         else:
             return None
 
-    def read_batter_stats_total(self):
+    @timed('PlayerStats')
+    def read_batter_stats_total(self, years=None):
         """
         Function:read_batter_stats_total
         -----------------
@@ -608,7 +814,7 @@ class PlayerStats:
             (statsDir from _init_)/Batter/(YEAR)/(YEAR) Total Batter Stats.csv
 
         Parameters:
-            :param none
+            :param years: the seasons to read, every season in self.years by default
 
         :return nothing
         """
@@ -625,37 +831,38 @@ class PlayerStats:
                  'g_total',
                  'sb_total',
                  'cs_total']
-        years = [2014]
+        years = self.years if years is None else years
         for year in years:
             infile = '%s/Batter/%d/%d Total Batter Stats.csv' %(self.statsDir, year, year)
-            reader = csv.reader(open(infile), quotechar='"')
+            reader = csv.reader(open_source(infile, self.sources), quotechar='"')
             header = reader.next()
             for items in reader:
-                player = items[0].lower()
+                player = intern(items[0].lower())
                 uid = int(items[15])
-                team = get_team_by_mascot(items[1])
-                self.stats[(player, uid)]['teams'] = self.stats[(player, uid)].get('teams', []) + [team]
+                team = get_team_by_alias(items[1], 'fangraphs')
+                self.add_player_team((player, uid), team, year)
                 if float(items[9]) > 50:
                     for i, stat_val in enumerate([float(x.rstrip('%')) for x in items[2:15]]):
                         if stats[i]=='bb_percent_total':
                             stat_val/=100.0
-                        self.stats[(player, uid)][year][stats[i]] = stat_val
+                        self.store.set((player, uid), year, stats[i], stat_val)
                 else: #gives average stats to player through 50 AB
                     #print 'Less than 50 Ab for ', player
-                    self.stats[(player, uid)][year][stats[0]] = math.floor(float(items[2]) + (0.17 * (50 - float(items[9]))))
-                    self.stats[(player, uid)][year][stats[1]] = math.floor(float(items[3]) + (0.05 * (50 - float(items[9]))))
-                    self.stats[(player, uid)][year][stats[2]] = math.floor(float(items[4]) + (0.01 * (50 - float(items[9]))))
-                    self.stats[(player, uid)][year][stats[3]] = math.floor(float(items[5]) + (0.25 * (50 - float(items[9]))))
-                    self.stats[(player, uid)][year][stats[4]] = math.floor(float(items[6]) + (0.09 * (50 - float(items[9]))))
-                    self.stats[(player, uid)][year][stats[5]] = .09
-                    self.stats[(player, uid)][year][stats[6]] = math.floor(float(items[8]) + (0.03 * (50 - float(items[9]))))
-                    self.stats[(player, uid)][year][stats[9]] = ((float(items[11]) * float(items[9])) + (.252 * (50 - float(items[9])))) / 50
-                    self.stats[(player, uid)][year][stats[10]] = float(28)
-                    self.stats[(player, uid)][year][stats[11]] = math.floor(float(items[13]) + (0.03 * (50 - float(items[9]))))
-                    self.stats[(player, uid)][year][stats[12]] = math.floor(float(items[14]) + (0.01 * (50 - float(items[9]))))
-                    self.stats[(player, uid)][year][stats[7]] = 50
-                    self.stats[(player, uid)][year][stats[8]] = 55
-
+                    self.store.set((player, uid), year, stats[0], math.floor(float(items[2]) + (0.17 * (50 - float(items[9])))))
+                    self.store.set((player, uid), year, stats[1], math.floor(float(items[3]) + (0.05 * (50 - float(items[9])))))
+                    self.store.set((player, uid), year, stats[2], math.floor(float(items[4]) + (0.01 * (50 - float(items[9])))))
+                    self.store.set((player, uid), year, stats[3], math.floor(float(items[5]) + (0.25 * (50 - float(items[9])))))
+                    self.store.set((player, uid), year, stats[4], math.floor(float(items[6]) + (0.09 * (50 - float(items[9])))))
+                    self.store.set((player, uid), year, stats[5], .09)
+                    self.store.set((player, uid), year, stats[6], math.floor(float(items[8]) + (0.03 * (50 - float(items[9])))))
+                    self.store.set((player, uid), year, stats[9], ((float(items[11]) * float(items[9])) + (.252 * (50 - float(items[9])))) / 50)
+                    self.store.set((player, uid), year, stats[10], float(28))
+                    self.store.set((player, uid), year, stats[11], math.floor(float(items[13]) + (0.03 * (50 - float(items[9])))))
+                    self.store.set((player, uid), year, stats[12], math.floor(float(items[14]) + (0.01 * (50 - float(items[9])))))
+                    self.store.set((player, uid), year, stats[7], 50)
+                    self.store.set((player, uid), year, stats[8], 55)
+
+    @uses_families('batter_total')
     def get_batter_1b_total(self, year, player):
         """
         Function: get_batter_1b_total
@@ -671,8 +878,9 @@ class PlayerStats:
         equations used in:
             batter_points_expected_for_hits
         """
-        return self.stats[player][year]['1b_total']
+        return self.store.get(player, year, '1b_total')
 
+    @uses_families('batter_total')
     def get_batter_2b_total(self, year, player):
         """
         Function: get_batter_2b_total
@@ -688,8 +896,9 @@ class PlayerStats:
         equations used in:
             batter_points_expected_for_hits
         """
-        return self.stats[player][year]['2b_total']
+        return self.store.get(player, year, '2b_total')
 
+    @uses_families('batter_total')
     def get_batter_3b_total(self, year, player):
         """
         Function: get_batter_3b_total
@@ -705,8 +914,9 @@ class PlayerStats:
         equations used in:
             batter_points_expected_for_hits
         """
-        return self.stats[player][year]['3b_total']
+        return self.store.get(player, year, '3b_total')
 
+    @uses_families('batter_total')
     def get_batter_hits_total(self, year, player):
         """
         Function: get_batter_hits_total
@@ -722,8 +932,9 @@ class PlayerStats:
         equations used in:
             batter_points_expected_for_hits
         """
-        return self.stats[player][year]['h_total']
+        return self.store.get(player, year, 'h_total')
 
+    @uses_families('batter_total')
     def get_batter_bb_total(self, year, player):
         """
         Function: get_batter_bb_total
@@ -739,8 +950,9 @@ class PlayerStats:
         equations used in:
             not used...probably because we already have the bb% stat
         """
-        return self.stats[player][year]['bb_total']
+        return self.store.get(player, year, 'bb_total')
 
+    @uses_families('batter_total')
     def get_batter_bb_percent_total(self, year, player):
         """
         Function: get_batter_bb_percent_total
@@ -758,8 +970,9 @@ class PlayerStats:
             batter_points_expected_for_runs
             batter_points_expected_for_rbi
         """
-        return self.stats[player][year]['bb_percent_total']
+        return self.store.get(player, year, 'bb_percent_total')
 
+    @uses_families('batter_total')
     def get_batter_hr_total(self, year, player):
         """
         Function: get_batter_hr_total
@@ -778,8 +991,9 @@ class PlayerStats:
             batter_points_expected_for_runs
             batter_points_expected_for_rbi
         """
-        return self.stats[player][year]['hr_total']
+        return self.store.get(player, year, 'hr_total')
 
+    @uses_families('batter_total')
     def get_batter_ab_total(self, year, player):
         """
         Function: get_batter_ab_total
@@ -799,8 +1013,9 @@ class PlayerStats:
             batter_points_expected_for_runs
             batter_points_expected_for_rbi
         """
-        return self.stats[player][year].get('ab_total', 0)
+        return self.store.get(player, year, 'ab_total', default=0)
 
+    @uses_families('batter_total')
     def get_batter_pa_total(self, year, player):
         """
         Function: get_batter_pa_total
@@ -820,8 +1035,9 @@ class PlayerStats:
             batter_points_expected_for_runs
             batter_points_expected_for_rbi
         """
-        return self.stats[player][year]['pa_total']
+        return self.store.get(player, year, 'pa_total')
 
+    @uses_families('batter_total')
     def get_batter_ba_total(self, year, player):
         """
         Function: get_batter_ba_total
@@ -840,8 +1056,9 @@ class PlayerStats:
             batter_points_expected_for_runs
             batter_points_expected_for_rbi
         """
-        return self.stats[player][year]['ba_total']
+        return self.store.get(player, year, 'ba_total')
 
+    @uses_families('batter_total')
     def get_batter_games_played_total(self, year, player):
         """
         Function: get_batter_games_played_total
@@ -862,8 +1079,9 @@ class PlayerStats:
             batter_points_expected_for_rbi
             batter_points_expected_for_sb
         """
-        return self.stats[player][year]['g_total']
+        return self.store.get(player, year, 'g_total')
 
+    @uses_families('batter_total')
     def get_batter_sb_total(self, year, player):
         """
         Function: get_batter_sb_total
@@ -879,8 +1097,9 @@ class PlayerStats:
         equations used in:
             batter_points_expected_for_sb
         """
-        return self.stats[player][year]['sb_total']
+        return self.store.get(player, year, 'sb_total')
 
+    @uses_families('batter_total')
     def get_batter_cs_total(self, year, player):
         #TODO: determine why we dont use this stat
         """
@@ -897,13 +1116,13 @@ class PlayerStats:
         equations used in:
             not used yet...might not use
         """
-        return self.stats[player][year]['cs_total']
+        return self.store.get(player, year, 'cs_total')
 
     def set_player_fielding_position(self, player, position):
-        self.stats[player]['fielding_position'] = position
+        self.player_info[player]['fielding_position'] = position
 
     def set_player_salary(self, player, salary):
-        self.stats[player]['salary'] = salary
+        self.player_info[player]['salary'] = salary
 
     def get_player_fielding_position(self, player):
         """
@@ -919,7 +1138,7 @@ class PlayerStats:
         equations used in:
            get_score
         """
-        return self.stats[player]['fielding_position']
+        return self.player_info[player]['fielding_position']
 
     def get_player_salary(self, player):
         """
@@ -935,7 +1154,7 @@ class PlayerStats:
         equations used in:
            get_score
         """
-        return self.stats[player]['salary']
+        return self.player_info[player]['salary']
 
     def get_player_starting_status(self, player):
         """
@@ -954,10 +1173,11 @@ class PlayerStats:
         equations used in:
            unknown
         """
-        return self.stats[player]['starting']
+        return self.player_info[player]['starting']
 
     def set_player_throwing_hand(self, player, hand):
-        self.stats[player]['throws'] = hand
+        self.player_info[player]['throws'] = hand
+        self.matchup_version += 1
 
     def get_player_throwing_hand(self, player):
         """
@@ -980,10 +1200,10 @@ class PlayerStats:
            batter_points_expected_for_runs
            batter_points_expected_for_rbi
         """
-        return self.stats[player]['throws']
+        return self.player_info[player]['throws']
 
     def set_player_batting_hand(self, player, hand):
-         self.stats[player]['bats'] = hand
+         self.player_info[player]['bats'] = hand
 
     def get_player_batting_hand(self, player):
         """
@@ -1007,12 +1227,12 @@ class PlayerStats:
            batter_points_expected_for_rbi
         """
         #TODO: Hack for today
-        if self.stats[player]['bats'] == 'switch' or 'both':
+        if self.player_info[player].get('bats') == 'switch' or 'both':
             return 'right'
-        return self.stats[player]['bats']
+        return self.player_info[player].get('bats')
 
     def set_player_team(self, player, team):
-        self.stats[player]['team'] = team
+        self.player_info[player]['team'] = team
 
     def get_player_team(self, player):
         """
@@ -1036,10 +1256,10 @@ class PlayerStats:
             batter_points_expected_for_runs
             batter_points_expected_for_rbi
         """
-        return self.stats[player]['team']
+        return self.player_info[player]['team']
 
     def set_player_batting_position(self, player, order):
-        self.stats[player]['batting_order'] = order
+        self.player_info[player]['batting_order'] = order
 
     def get_player_batting_position(self, player):
         # TODO: not computing position right now
@@ -1059,11 +1279,12 @@ class PlayerStats:
             batter_points_expected_for_runs
             batter_points_expected_for_rbi
         """
-        return self.stats[player]['batting_order']
+        return self.player_info[player]['batting_order']
         #return randint(1, 9)
 
     def set_starting_pitcher(self, team, pitcher):
         self.starting_pitchers[team] = pitcher
+        self.matchup_version += 1
 
     def get_starting_pitcher(self, team):
         """
@@ -1100,14 +1321,15 @@ class PlayerStats:
             find_team.py
         """
         players = []
-        for k, v in self.stats.items():
-            if v['status']==True:
+        for k, v in self.player_info.items():
+            if v.get('status')==True:
                 players.append(k)
         return players
 
     def set_player_active(self, player):
-        self.stats[player]['status'] = True
+        self.player_info[player]['status'] = True
 
+    @timed('PlayerStats')
     def read_batter_stats_7_day(self):
         """
         Function:read_batter_stats_7_day
@@ -1133,17 +1355,17 @@ class PlayerStats:
                  'avg_7_day',
                  'woba_7_day']
         infile = '%s/Batter/2014/7_day Batter Total Stats.csv' %(self.statsDir)
-        reader = csv.reader(open(infile), quotechar='"')
+        reader = csv.reader(open_source(infile, self.sources), quotechar='"')
         header = reader.next()
         for items in reader:
-            player = items[0].lower()
+            player = intern(items[0].lower())
             uid = int(items[13])
-            team = get_team_by_mascot(items[1])
-            self.stats[(player, uid)]['teams'] = self.stats[(player, uid)].get('teams', []) + [team]
+            team = get_team_by_alias(items[1], 'fangraphs')
+            self.add_player_team((player, uid), team, 2014)
             for i, stat_val in enumerate([float(x.rstrip('%')) for x in items[2:13]]):
                 if stats[i]=='bb_percent_7_day':
                     stat_val/=100.0
-                self.stats[(player, uid)]['7_day'][stats[i]] = stat_val
+                self.store.set((player, uid), '7_day', stats[i], stat_val)
 
     def get_batter_ab_7_day(self, player):
         """
@@ -1163,7 +1385,7 @@ class PlayerStats:
             batter_points_expected_for_runs
             batter_points_expected_for_rbi
         """
-        return self.stats[player]['7_day']['ab_7_day']
+        return self.store.get(player, '7_day', 'ab_7_day')
 
     def get_batter_hits_7_day(self, player):
         """
@@ -1179,7 +1401,7 @@ class PlayerStats:
         equations used in:
             batter_points_expected_for_hits
         """
-        return self.stats[player]['7_day']['h_7_day']
+        return self.store.get(player, '7_day', 'h_7_day')
 
     def get_batter_1b_7_day(self, player):
         """
@@ -1195,7 +1417,7 @@ class PlayerStats:
         equations used in:
             batter_points_expected_for_hits
         """
-        return self.stats[player]['7_day']['1b_7_day']
+        return self.store.get(player, '7_day', '1b_7_day')
 
     def get_batter_2b_7_day(self, player):
         """
@@ -1211,7 +1433,7 @@ class PlayerStats:
         equations used in:
             batter_points_expected_for_hits
         """
-        return self.stats[player]['7_day']['2b_7_day']
+        return self.store.get(player, '7_day', '2b_7_day')
 
     def get_batter_3b_7_day(self, player):
         """
@@ -1227,7 +1449,7 @@ class PlayerStats:
         equations used in:
             batter_points_expected_for_hits
         """
-        return self.stats[player]['7_day']['3b_7_day']
+        return self.store.get(player, '7_day', '3b_7_day')
 
     def get_batter_hr_7_day(self, player):
         """
@@ -1246,7 +1468,7 @@ class PlayerStats:
             batter_points_expected_for_runs
             batter_points_expected_for_rbi
         """
-        return self.stats[player]['7_day']['hr_7_day']
+        return self.store.get(player, '7_day', 'hr_7_day')
 
     def get_batter_games_played_7_day(self, player):
         """
@@ -1266,7 +1488,7 @@ class PlayerStats:
             batter_points_expected_for_runs
             batter_points_expected_for_rbi
         """
-        return self.stats[player]['7_day']['g_7_day']
+        return self.store.get(player, '7_day', 'g_7_day')
 
     def get_batter_pa_7_day(self, player):
         """
@@ -1286,7 +1508,7 @@ class PlayerStats:
             batter_points_expected_for_runs
             batter_points_expected_for_rbi
         """
-        return self.stats[player]['7_day']['pa_7_day']
+        return self.store.get(player, '7_day', 'pa_7_day')
 
     def get_batter_bb_percent_7_day(self, player):
         """
@@ -1304,7 +1526,7 @@ class PlayerStats:
             batter_points_expected_for_runs
             batter_points_expected_for_rbi
         """
-        return self.stats[player]['7_day']['bb_percent_7_day']
+        return self.store.get(player, '7_day', 'bb_percent_7_day')
 
     def get_batter_ba_7_day(self, player):
         """
@@ -1323,7 +1545,7 @@ class PlayerStats:
             batter_points_expected_for_runs
             batter_points_expected_for_rbi
         """
-        return self.stats[player]['7_day']['ba_7_day']
+        return self.store.get(player, '7_day', 'ba_7_day')
 
     def get_batter_woba_7_day(self, player):
         """
@@ -1341,27 +1563,33 @@ class PlayerStats:
             batter_points_expected_for_rbi
             batter_points_expected_for_hits
         """
-        return self.stats[player]['7_day']['woba_7_day']
+        return self.store.get(player, '7_day', 'woba_7_day')
 
 
     def get_player_full_name(self, first_initial, last_name, team):
-        for (pname, uid), pstats in self.stats.items():
-            if first_initial.lower() != pname[0].lower():
-                continue
-            if last_name.lower() != pname.split()[-1]:
-                continue
-            if team not in pstats['teams']:
-                continue
-            return (pname, uid)
+        """
+        Function: get_player_full_name
+        -----------------
+        Resolves a lineup name (first initial, last name) to a stats key.
 
+        Parameters:
+            :param first_initial: the first initial of the player
+            :param last_name: the last name of the player
+            :param team: the team the player is listed on
+
+        :return (name, uid) of the first player read with that name on that team in
+                the latest season loaded, else of the first player read with that
+                name, else None
+        """
+        if self.unnamed:
+            self.load_names()
+        candidates = self.name_index.get((first_initial.lower(), last_name.lower()))
+        if not candidates:
+            return None
+        year = max(self.years)
+        for key, teams in candidates.items():
+            if team in teams.get(year, ()):
+                return key
 
         # couldn't find name/team match
-        for (pname, uid), pstats in self.stats.items():
-            if first_initial.lower() != pname[0].lower():
-                continue
-            if last_name.lower() != pname.split()[-1]:
-                continue
-
-            return (pname, uid)
-
-        return None
+        return next(iter(candidates))
@@ -0,0 +1,266 @@
+"""
+Module: snapshot
+Author: Poirel & Jett
+Date: 16 October 2026
+
+Binary snapshots of parsed stats, so the stats CSVs are only parsed once:
+    - (snapshot directory)/(stats directory name)-(hash of its path)/(CLASS NAME).npz
+
+The snapshot directory is stadium_grinders/snapshots in the user cache directory
+($XDG_CACHE_HOME or ~/.cache) unless set_snapshot_dir says otherwise, so nothing
+is written into the stats directory, which is usually a shared, synced folder.
+
+A snapshot holds NumPy arrays plus a JSON header recording the snapshot
+version and the path, mtime and size of every file the parse read. It is only
+loaded while all of those files are unchanged; otherwise the stats are parsed
+again and the snapshot rewritten.
+
+Bump SNAPSHOT_VERSION whenever a parser reads different files or stores its
+stats differently, so older snapshots are ignored.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import zipfile
+
+import numpy as np
+
+SNAPSHOT_VERSION = 2
+
+# where snapshots are written, None for the default (see snapshot_dir)
+_snapshot_dir = None
+
+def user_cache_dir(*parts):
+    """
+    Function: user_cache_dir
+    -----------------
+    A directory in the user cache directory: $XDG_CACHE_HOME, else ~/.cache,
+    else the temp directory when there is no home directory.
+
+    Parameters:
+        :param parts: path components under the cache directory
+
+    :return the path (it may not exist yet)
+    """
+    root = os.environ.get('XDG_CACHE_HOME')
+    if not root:
+        home = os.path.expanduser('~')
+        root = os.path.join(home, '.cache') if home != '~' else tempfile.gettempdir()
+    return os.path.join(root, *parts)
+
+def set_snapshot_dir(directory):
+    """
+    Function: set_snapshot_dir
+    -----------------
+    Sets where snapshots are written and read from.
+
+    Parameters:
+        :param directory: the snapshot directory, or None for the default
+
+    :return nothing
+    """
+    global _snapshot_dir
+    _snapshot_dir = directory
+
+def snapshot_dir():
+    """
+    Function: snapshot_dir
+    -----------------
+    The directory snapshots are written to.
+
+    Parameters:
+        :param none
+
+    :return the set_snapshot_dir directory, else stadium_grinders/snapshots in
+            the user cache directory
+    """
+    if _snapshot_dir is not None:
+        return _snapshot_dir
+    return user_cache_dir('stadium_grinders', 'snapshots')
+
+def open_source(infile, sources):
+    """
+    Function: open_source
+    -----------------
+    Opens a stats file for reading and records it as a source of the snapshot.
+
+    Parameters:
+        :param infile: path of the stats file
+        :param sources: list of source paths of the parser
+
+    :return the open file
+    """
+    sources.append(infile)
+    return open(infile)
+
+def snapshot_path(statsDir, name):
+    """
+    Function: snapshot_path
+    -----------------
+    Path of the snapshot of one parser. Every stats directory gets its own
+    subdirectory of snapshot_dir(), named after the directory and a hash of its
+    absolute path.
+
+    Parameters:
+        :param statsDir: the stats directory
+        :param name: the parser name, ie 'PlayerStats'
+
+    :return path of the .npz file
+    """
+    stats = os.path.abspath(statsDir)
+    key = '%s-%s' % (re.sub(r'[^A-Za-z0-9.-]+', '_', os.path.basename(stats)), hashlib.sha1(stats).hexdigest()[:12])
+    return os.path.join(snapshot_dir(), key, '%s.npz' % name)
+
+def _signature(sources):
+    signature = []
+    for path in sources:
+        st = os.stat(path)
+        signature.append([path, st.st_mtime, st.st_size])
+    return signature
+
+def _to_str(obj):
+    # json decodes every string as unicode; the parsers work with str
+    if isinstance(obj, unicode):
+        return obj.encode('utf-8')
+    if isinstance(obj, list):
+        return [_to_str(x) for x in obj]
+    if isinstance(obj, dict):
+        return dict((_to_str(k), _to_str(v)) for k, v in obj.items())
+    return obj
+
+def load_snapshot(path, arrays=None):
+    """
+    Function: load_snapshot
+    -----------------
+    Loads a snapshot if it exists, has the current version and all of its
+    source files are unchanged.
+
+    Parameters:
+        :param path: path of the snapshot, or None
+        :param arrays: names of the arrays to read, or None for all of them; the
+                       arrays of a snapshot are only read when asked for
+
+    :return dict of the saved arrays plus 'header' (the saved header), or None
+    """
+    if path is None:
+        return None
+    try:
+        data = np.load(path)
+        try:
+            names = data.files if arrays is None else ['header'] + list(arrays)
+            snapshot = dict((name, data[name]) for name in names)
+        finally:
+            data.close()
+        header = _to_str(json.loads(snapshot['header'].item()))
+    except (IOError, OSError, KeyError, ValueError, zipfile.BadZipfile):
+        return None
+
+    if header.get('version') != SNAPSHOT_VERSION:
+        return None
+    for source, mtime, size in header['sources']:
+        try:
+            st = os.stat(source)
+        except OSError:
+            return None
+        if st.st_mtime != mtime or st.st_size != size:
+            return None
+
+    snapshot['header'] = header
+    return snapshot
+
+def save_snapshot(path, sources, header, **arrays):
+    """
+    Function: save_snapshot
+    -----------------
+    Writes a snapshot. The snapshot is only an optimization, so a snapshot that
+    can't be written (ie a read-only stats directory) is skipped.
+
+    Parameters:
+        :param path: path of the snapshot, or None
+        :param sources: the source paths the parse read
+        :param header: dict of JSON-serializable values to save with the snapshot
+        :param arrays: NumPy arrays to save with the snapshot
+
+    :return nothing
+    """
+    if path is None:
+        return
+    try:
+        header = dict(header, version=SNAPSHOT_VERSION, sources=_signature(sources))
+        arrays['header'] = np.array(json.dumps(header))
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        # write next to the snapshot and rename, so a reader never sees half a file
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp, 'wb') as outfile:
+            np.savez(outfile, **arrays)
+        os.rename(tmp, path)
+    except (IOError, OSError, ValueError):
+        return
+
+def flatten_stats(stats):
+    """
+    Function: flatten_stats
+    -----------------
+    Flattens nested stats dicts into records of [key, key, ..., value].
+
+    Parameters:
+        :param stats: the nested dicts
+
+    :return list of records
+    """
+    records = []
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            records.extend([key] + record for record in flatten_stats(value))
+        else:
+            records.append([key, value])
+    return records
+
+def unflatten_stats(records, stats):
+    """
+    Function: unflatten_stats
+    -----------------
+    Fills nested stats dicts (ie nested defaultdicts) from flatten_stats records.
+
+    Parameters:
+        :param records: the records
+        :param stats: the nested dicts to fill
+
+    :return nothing
+    """
+    for record in records:
+        d = stats
+        for key in record[:-2]:
+            d = d[key]
+        d[record[-2]] = record[-1]
+
+def load_or_parse(path, stats, sources, parse, part):
+    """
+    Function: load_or_parse
+    -----------------
+    Fills nested stats dicts with one part of a parser's stats (ie one season)
+    from its snapshot, or else parses that part and writes the snapshot.
+
+    Parameters:
+        :param path: path of the snapshot of the part, or None
+        :param stats: the nested dicts to fill
+        :param sources: list of source paths of the parser
+        :param parse: function that reads the part into stats
+        :param part: function that is True for the flatten_stats records of the part
+
+    :return True if the part came from the snapshot
+    """
+    snapshot = load_snapshot(path)
+    if snapshot is not None:
+        unflatten_stats(snapshot['header']['stats'], stats)
+        sources.extend(source for source, mtime, size in snapshot['header']['sources'])
+        return True
+    start = len(sources)
+    parse()
+    save_snapshot(path, sources[start:], {'stats': [record for record in flatten_stats(stats) if part(record)]})
+    return False
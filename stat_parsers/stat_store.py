@@ -0,0 +1,215 @@
+"""
+Class: ColumnarStatStore
+Author: Poirel & Jett
+Date: 16 October 2026
+
+This class stores numeric stats for many entities (players) column by column:
+    - one row per entity, found through a key -> row index
+    - one contiguous float64 array per (year, stat, split) column
+    - NaN marks a value that was never set
+
+Compared to nested dicts of floats this costs 8 bytes per value, and a whole
+column can be handed to NumPy for vectorized equations.
+"""
+
+import numpy as np
+
+class ColumnarStatStore:
+
+    def __init__(self, initial_rows=1024):
+        """
+        Function: _init_
+        -----------------
+        Creates an empty store.
+
+        Parameters:
+            :param initial_rows: number of rows to allocate up front; columns double
+                                 in size whenever they run out
+
+        :return nothing
+        """
+        self.keys = []
+        self.row_index = {}
+        self.columns = {}
+        self.capacity = initial_rows
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.row_index
+
+    def row(self, key):
+        """
+        Function: row
+        -----------------
+        Returns the row of an entity, adding a new row if it isn't stored yet.
+
+        Parameters:
+            :param key: the entity key, ie (name, uid)
+
+        :return row number
+        """
+        r = self.row_index.get(key)
+        if r is None:
+            r = len(self.keys)
+            if r >= self.capacity:
+                self._grow()
+            self.keys.append(key)
+            self.row_index[key] = r
+        return r
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.full(self.capacity, np.nan)
+            grown[:len(column)] = column
+            self.columns[name] = grown
+
+    def set(self, key, year, stat, value, split=None):
+        """
+        Function: set
+        -----------------
+        Stores a stat value for an entity.
+
+        Parameters:
+            :param key: the entity key
+            :param year: the year of the stat (or another period label, ie '7_day')
+            :param stat: the stat name
+            :param value: the value (converted to float)
+            :param split: optional split of the stat (ie 'LHP', 'home')
+
+        :return nothing
+        """
+        r = self.row(key)
+        column = self.columns.get((year, stat, split))
+        if column is None:
+            column = np.full(self.capacity, np.nan)
+            self.columns[(year, stat, split)] = column
+        column[r] = value
+
+    def get(self, key, year, stat, split=None, default=KeyError):
+        """
+        Function: get
+        -----------------
+        Returns a stat value for an entity.
+
+        Parameters:
+            :param key: the entity key
+            :param year: the year of the stat
+            :param stat: the stat name
+            :param split: optional split of the stat
+            :param default: returned when the value is missing; raises KeyError if not given
+
+        :return the value as a float
+        """
+        r = self.row_index.get(key)
+        column = self.columns.get((year, stat, split))
+        if r is not None and column is not None:
+            value = column[r]
+            if value == value:
+                return float(value)
+        if default is KeyError:
+            raise KeyError((key, year, stat, split))
+        return default
+
+    def rows(self, keys):
+        """
+        Function: rows
+        -----------------
+        Row numbers for many entities, -1 for entities that aren't stored.
+
+        Parameters:
+            :param keys: the entity keys
+
+        :return int array of rows
+
+        equations used in:
+            score_all (through _gather_batters and _gather_pitchers)
+        """
+        return np.array([self.row_index.get(k, -1) for k in keys], dtype=int)
+
+    def take(self, rows, year, stat, split=None):
+        """
+        Function: take
+        -----------------
+        Vectorized get: the values of one column for many rows, NaN for missing
+        values and for rows of -1.
+
+        Parameters:
+            :param rows: int array from rows()
+            :param year: the year of the stat
+            :param stat: the stat name
+            :param split: optional split of the stat
+
+        :return float array aligned with rows
+
+        equations used in:
+            score_all (through _gather_batters and _gather_pitchers)
+        """
+        column = self.columns.get((year, stat, split))
+        if column is None:
+            return np.full(len(rows), np.nan)
+        values = column[rows]
+        values[rows < 0] = np.nan
+        return values
+
+    def entity_stats(self, key):
+        """
+        Function: entity_stats
+        -----------------
+        All stored values of one entity, mostly for printing.
+
+        Parameters:
+            :param key: the entity key
+
+        :return dict of year -> stat -> value (or split -> value)
+        """
+        stats = {}
+        r = self.row_index[key]
+        for (year, stat, split), column in self.columns.items():
+            value = column[r]
+            if value != value:
+                continue
+            if split is None:
+                stats.setdefault(year, {})[stat] = float(value)
+            else:
+                stats.setdefault(year, {}).setdefault(stat, {})[split] = float(value)
+        return stats
+
+    def dump(self, keys, names):
+        """
+        Function: dump
+        -----------------
+        Some of the stored values as one matrix, ie for saving them.
+
+        Parameters:
+            :param keys: the entity keys to dump
+            :param names: the (year, stat, split) columns to dump
+
+        :return float array of one row per column name and one column per key
+        """
+        rows = self.rows(keys)
+        values = np.empty((len(names), len(keys)))
+        for i, name in enumerate(names):
+            values[i] = self.take(rows, *name)
+        return values
+
+    def merge(self, keys, names, values):
+        """
+        Function: merge
+        -----------------
+        Stores the output of dump(), adding rows and columns as needed.
+
+        Parameters:
+            :param keys: the entity keys the matrix columns belong to
+            :param names: the (year, stat, split) names of the matrix rows
+            :param values: float array of one row per column name
+
+        :return nothing
+        """
+        rows = np.array([self.row(key) for key in keys], dtype=int)
+        for name, column in zip(names, values):
+            if name not in self.columns:
+                self.columns[name] = np.full(self.capacity, np.nan)
+            self.columns[name][rows] = column
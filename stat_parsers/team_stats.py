@@ -25,6 +25,8 @@ Source of stats: FanGraphs & FanDuel
 from collections import defaultdict
 import csv
 import json
+from snapshot import open_source, snapshot_path, load_or_parse
+from profiling import registry, timed
 
 TEAM_NAMES = {
     'COL': {'mascot': 'Rockies',
@@ -119,6 +121,64 @@ TEAM_NAMES = {
             'league': 'NL'}
 }
 
+# Other spellings of the teams, per source, keyed by lower case spelling
+TEAM_ALIASES = {
+    'fanduel': {'ari': 'ARI', 'atl': 'ATL', 'bal': 'BAL', 'bos': 'BOS', 'chc': 'CHC',
+                'cws': 'CWS', 'chw': 'CWS', 'cin': 'CIN', 'cle': 'CLE', 'col': 'COL',
+                'det': 'DET', 'hou': 'HOU', 'kan': 'KAN', 'kc': 'KAN', 'laa': 'LAA',
+                'los': 'LOS', 'lad': 'LOS', 'mia': 'MIA', 'mil': 'MIL', 'min': 'MIN',
+                'nym': 'NYM', 'nyy': 'NYY', 'oak': 'OAK', 'phi': 'PHI', 'pit': 'PIT',
+                'sdp': 'SDP', 'sd': 'SDP', 'sfg': 'SFG', 'sf': 'SFG', 'sea': 'SEA',
+                'stl': 'STL', 'tam': 'TAM', 'tb': 'TAM', 'tex': 'TEX', 'tor': 'TOR',
+                'was': 'WAS', 'wsh': 'WAS'},
+    'rotogrinders': {'arizona diamondbacks': 'ARI',
+                     'atlanta braves': 'ATL',
+                     'baltimore orioles': 'BAL',
+                     'boston red sox': 'BOS',
+                     'chicago cubs': 'CHC',
+                     'chicago white sox': 'CWS',
+                     'cincinnati reds': 'CIN',
+                     'cleveland indians': 'CLE',
+                     'colorado rockies': 'COL',
+                     'detroit tigers': 'DET',
+                     'houston astros': 'HOU',
+                     'kansas city royals': 'KAN',
+                     'los angeles angels': 'LAA',
+                     'los angeles dodgers': 'LOS',
+                     'miami marlins': 'MIA',
+                     'milwaukee brewers': 'MIL',
+                     'minnesota twins': 'MIN',
+                     'new york mets': 'NYM',
+                     'new york yankees': 'NYY',
+                     'oakland athletics': 'OAK',
+                     'philadelphia phillies': 'PHI',
+                     'pittsburgh pirates': 'PIT',
+                     'san diego padres': 'SDP',
+                     'san francisco giants': 'SFG',
+                     'seattle mariners': 'SEA',
+                     'st. louis cardinals': 'STL',
+                     'tampa bay rays': 'TAM',
+                     'texas rangers': 'TEX',
+                     'toronto blue jays': 'TOR',
+                     'washington nationals': 'WAS'},
+    'fangraphs': {'d-backs': 'ARI', 'diamondbacks': 'ARI', 'braves': 'ATL', 'orioles': 'BAL',
+                  'red sox': 'BOS', 'cubs': 'CHC', 'white sox': 'CWS', 'reds': 'CIN',
+                  'indians': 'CLE', 'rockies': 'COL', 'tigers': 'DET', 'astros': 'HOU',
+                  'royals': 'KAN', 'angels': 'LAA', 'dodgers': 'LOS', 'marlins': 'MIA',
+                  'brewers': 'MIL', 'twins': 'MIN', 'mets': 'NYM', 'yankees': 'NYY',
+                  'athletics': 'OAK', 'phillies': 'PHI', 'pirates': 'PIT', 'padres': 'SDP',
+                  'giants': 'SFG', 'mariners': 'SEA', 'cardinals': 'STL', 'rays': 'TAM',
+                  'rangers': 'TEX', 'blue jays': 'TOR', 'nationals': 'WAS'}
+}
+
+# Reverse indexes of TEAM_NAMES, built once so a lookup is a single dict hit.
+# Locations shared by two teams keep them in TEAM_NAMES order.
+TEAMS_BY_MASCOT = {}
+TEAMS_BY_LOCATION = {}
+for _team, _names in TEAM_NAMES.items():
+    TEAMS_BY_MASCOT.setdefault(_names['mascot'].lower(), _team)
+    TEAMS_BY_LOCATION.setdefault(_names['location'].lower(), []).append(_team)
+
 def get_teams():
     """
     Function: get_teams
@@ -147,14 +207,9 @@ def get_team_by_mascot(mascot):
     :return team 2 or 3 letter name (ie BAL, ATL, etc)
 
     equations used in:
-        read_team_stats_total
-        read_team_stats_vs_RHP_LHP
-        read_team_stats_fielding
+        not used... (the Fangraphs readers use get_team_by_alias)
     """
-    for k,v in TEAM_NAMES.items():
-        if v['mascot'].lower()==mascot.lower():
-            return k
-    return None
+    return TEAMS_BY_MASCOT.get(mascot.lower())
 
 def get_team_by_location(location):
     """
@@ -165,15 +220,50 @@ def get_team_by_location(location):
     Parameters:
         :param location: team's location (Baltimore, Atlanta, etc)
 
-    :return team 2 or 3 letter name (ie BAL, ATL, etc)
+    :return team 2 or 3 letter name (ie BAL, ATL, etc), the first one for locations
+            with two teams (see get_teams_by_location)
 
     equations used in:
         not used...
     """
-    for k,v in TEAM_NAMES.items():
-        if v['location'].lower()==location.lower():
-            return k
-    return None
+    teams = TEAMS_BY_LOCATION.get(location.lower())
+    return teams[0] if teams else None
+
+def get_teams_by_location(location):
+    """
+    Function: get_teams_by_location
+    -----------------
+    Helper method for get every team (ie LAA, LOS) from TEAM_NAMES by its location (ie Los Angeles)
+
+    Parameters:
+        :param location: team's location (Los Angeles, Atlanta, etc)
+
+    :return list of team 2 or 3 letter names, empty if no team plays there
+    """
+    return list(TEAMS_BY_LOCATION.get(location.lower(), []))
+
+def get_team_by_alias(name, source):
+    """
+    Function: get_team_by_alias
+    -----------------
+    Helper method for get a team (ie BAL, ATL) from the way a source spells it
+    (ie BAL on FanDuel, Baltimore Orioles on RotoGrinders, Orioles on Fangraphs)
+
+    Parameters:
+        :param name: the team as the source spells it
+        :param source: 'fanduel', 'rotogrinders' or 'fangraphs'
+
+    :return team 2 or 3 letter name (ie BAL, ATL, etc)
+
+    equations used in:
+        parseRotoGrinders (from find_team.py)
+        read_daily_matchups
+        read_team_stats_total
+        read_team_stats_vs_RHP_LHP
+        read_team_fielding_stats
+        every read_* of player_stats.py
+    """
+    return TEAM_ALIASES[source].get(name.strip().lower())
 
 def get_team_mascot(team):
     """
@@ -225,7 +315,7 @@ def get_team_league(team):
 
 class TeamStats:
 
-    def __init__(self, statsDir):
+    def __init__(self, statsDir, use_snapshot=True, years=None):
         """
         Function: _init_
         -----------------
@@ -236,19 +326,54 @@ class TeamStats:
         Parameters:
             :param statsDir: Directory in Dropbox with all Stats. Should always be:
                         /Dropbox/MDI Fantasy Sports/Stats
+            :param use_snapshot: load and save a snapshot of every season of the
+                                 parsed stats, and one of the daily matchups
+            :param years: the seasons to read (default: 2014)
 
         :return nothing
         """
         self.statsDir = statsDir.rstrip('/')
+        self.years = list(years) if years else [2014]
+        self.use_snapshot = use_snapshot
         self.stats = defaultdict(lambda: defaultdict( lambda: defaultdict( lambda: defaultdict (dict))))
 
-        self.read_team_stats_total()
-        self.read_team_stats_vs_RHP_LHP()
-        self.read_daily_matchups()
-        self.read_team_fielding_stats()
+        # bumped whenever a daily matchup changes, so cached matchups can be dropped
+        self.matchup_version = 0
+
+        # every stats file the read_* functions opened
+        self.sources = []
+
+        for year in self.years:
+            self.load_season(year)
+        # records are [team, year, ...] for seasons, [team, stat, value] for matchups
+        self._load('matchups', self.read_daily_matchups, lambda record: record[1] not in self.years)
 
         # self.printStats()
 
+    def load_season(self, year):
+        """
+        Function: load_season
+        -----------------
+        Reads one season of team stats from its snapshot, or parses it and writes
+        the snapshot. Past seasons don't change, so adding a season to self.years
+        only parses that season.
+
+        Parameters:
+            :param year: the season
+
+        :return nothing
+        """
+        def parse():
+            self.read_team_stats_total([year])
+            self.read_team_stats_vs_RHP_LHP([year])
+            self.read_team_fielding_stats([year])
+        self._load(str(year), parse, lambda record: record[1] == year)
+
+    def _load(self, name, parse, part):
+        path = snapshot_path(self.statsDir, 'TeamStats-%s' % name) if self.use_snapshot else None
+        loaded = load_or_parse(path, self.stats, self.sources, parse, part)
+        registry.count('TeamStats.snapshot_loads' if loaded else 'TeamStats.csv_parses')
+
 
     def printStats(self):
         """
@@ -263,7 +388,8 @@ class TeamStats:
         """
         print json.dumps(self.stats, indent=4)
 
-    def read_team_stats_total(self):
+    @timed('TeamStats')
+    def read_team_stats_total(self, years=None):
         """
         Function: read_team_stats_total
         -----------------
@@ -272,17 +398,17 @@ class TeamStats:
             (statsDir from _init_)/Team/(YEAR)Team Stats.csv
 
         Parameters:
-            :param none
+            :param years: the seasons to read, every season in self.years by default
 
         :return nothing
         """
-        years = [2014]
+        years = self.years if years is None else years
         for year in years:
             infile = '%s/Team/%d Team Stats.csv' %(self.statsDir, year)
-            reader = csv.reader(open(infile), quotechar='"')
+            reader = csv.reader(open_source(infile, self.sources), quotechar='"')
             header = reader.next()
             for items in reader:
-                team = get_team_by_mascot(items[0])
+                team = get_team_by_alias(items[0], 'fangraphs')
                 self.stats[team][year]['runs_team'] = float(items[1])
 
     def get_team_runs_total(self, year, team):
@@ -303,7 +429,8 @@ class TeamStats:
         """
         return self.stats[team][year]['runs_team']
 
-    def read_team_stats_vs_RHP_LHP(self):
+    @timed('TeamStats')
+    def read_team_stats_vs_RHP_LHP(self, years=None):
         """
         Function: read_team_stats_vs_RHP_LHP
         -----------------
@@ -312,19 +439,19 @@ class TeamStats:
             (statsDir from _init_)/Team/(YEAR)Team Stats vs (RHP/LHP).csv
 
         Parameters:
-            :param none
+            :param years: the seasons to read, every season in self.years by default
 
         :return nothing
         """
         stats = ['so', 'pa', 'woba']
-        years = [2014]
+        years = self.years if years is None else years
         for year in years:
             for hand in ['RHP', 'LHP']:
                 infile = '%s/Team/%d Team Stats vs %s.csv' %(self.statsDir, year, hand)
-                reader = csv.reader(open(infile), quotechar='"')
+                reader = csv.reader(open_source(infile, self.sources), quotechar='"')
                 header = reader.next()
                 for items in reader:
-                    team = get_team_by_mascot(items[0])
+                    team = get_team_by_alias(items[0], 'fangraphs')
                     for i, stat_val in enumerate([float(x) for x in items[1:4]]):
                         self.stats[team][year][stats[i]][hand] = stat_val
 
@@ -399,6 +526,7 @@ class TeamStats:
         else:
             return None
 
+    @timed('TeamStats')
     def read_daily_matchups(self):
         """
         DEPRECATED: USE FOR TESTING ONLY
@@ -416,9 +544,11 @@ class TeamStats:
         :return nothing
         """
         infile = '%s/Test Data/Salaries/2014-06-28-fanduel-salaries.csv' %(self.statsDir)
-        reader = csv.reader(open(infile), quotechar='"')
+        reader = csv.reader(open_source(infile, self.sources), quotechar='"')
         for items in reader:
-            away, home = items[4].split('@')
+            away, home = [get_team_by_alias(team, 'fanduel') for team in items[4].split('@')]
+            if away is None or home is None:
+                continue
             self.stats[home]['home_or_away'] = 'home'
             self.stats[away]['home_or_away'] = 'away'
             self.stats[home]['opponent'] = away
@@ -426,6 +556,7 @@ class TeamStats:
 
     def set_team_home_or_away(self, team, home_or_away):
         self.stats[team]['home_or_away'] = home_or_away
+        self.matchup_version += 1
 
     def get_team_home_or_away(self, team):
         """
@@ -450,6 +581,7 @@ class TeamStats:
     def set_team_opponent(self, team_1, team_2):
         self.stats[team_1]['opponent'] = team_2
         self.stats[team_2]['opponent'] = team_1
+        self.matchup_version += 1
 
     def get_team_opponent(self, team):
         """
@@ -475,7 +607,8 @@ class TeamStats:
         return self.stats[team]['opponent']
 
 
-    def read_team_fielding_stats(self):
+    @timed('TeamStats')
+    def read_team_fielding_stats(self, years=None):
         """
         Function: read_team_fielding_stats
         -----------------
@@ -484,17 +617,17 @@ class TeamStats:
             (statsDir from _init_)/Team/(YEAR) Team Fielding Stats.csv
 
         Parameters:
-            :param none
+            :param years: the seasons to read, every season in self.years by default
 
         :return nothing
         """
-        years = [2014]
+        years = self.years if years is None else years
         for year in years:
             infile = '%s/Team/%d Team Fielding Stats.csv' %(self.statsDir, year)
-            reader = csv.reader(open(infile), quotechar='"')
+            reader = csv.reader(open_source(infile, self.sources), quotechar='"')
             header = reader.next()
             for items in reader:
-                team = get_team_by_mascot(items[0])
+                team = get_team_by_alias(items[0], 'fangraphs')
                 self.stats[team][year]['sb_allowed'] = float(items[1])
                 self.stats[team][year]['cs_fielding'] = float(items[2])
 
@@ -0,0 +1,15 @@
+from itertools import combinations, product
+
+
+def brute_force_teams(names, classes, values, weights, capacity, composition):
+    # every affordable team as (value, cost, sorted names), best first
+    by_class = {}
+    for i, c in enumerate(classes):
+        by_class.setdefault(c, []).append(i)
+    teams = []
+    for picks in product(*[combinations(by_class.get(c, []), count) for c, count in sorted(composition.items())]):
+        team = [i for pick in picks for i in pick]
+        cost = sum(weights[i] for i in team)
+        if cost <= capacity:
+            teams.append((sum(values[i] for i in team), cost, sorted(names[i] for i in team)))
+    return sorted(teams, key=lambda t: -t[0])
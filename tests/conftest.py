@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# the modules live at the top of the repository, the slate builders in benchmarks
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+
+@pytest.fixture(scope='session', autouse=True)
+def snapshots(tmpdir_factory):
+    # snapshots go to a directory of the test session, not the user cache
+    from stat_parsers.snapshot import set_snapshot_dir
+    path = str(tmpdir_factory.mktemp('snapshots'))
+    set_snapshot_dir(path)
+    yield path
+    set_snapshot_dir(None)
+
+
+@pytest.fixture(scope='session')
+def stats_dir(tmpdir_factory):
+    # a synthetic stats directory with two seasons, see benchmarks/make_stats.py
+    from make_stats import make_stats
+    path = str(tmpdir_factory.mktemp('stats'))
+    make_stats(path, scale=1, years=(2013, 2014), seed=0)
+    return path
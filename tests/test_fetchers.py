@@ -0,0 +1,79 @@
+import urllib2
+
+import pytest
+
+import fetchers
+from fetchers import CachedFetcher, FetchResult, default_cache_dir
+
+URL = 'http://rotogrinders.com/lineups/index/Baseball/FanDuel'
+
+
+class StubFetcher(object):
+
+    # answers with queued results (or raises queued exceptions) and records the
+    # etag of every request
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.etags = []
+
+    def fetch(self, url, etag=None):
+        self.etags.append(etag)
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(fetchers.time, 'time', lambda: now[0])
+    return now
+
+
+def test_fresh_pages_skip_the_server(tmpdir, clock):
+    stub = StubFetcher(FetchResult('page 1', '"a"'))
+    cached = CachedFetcher(stub, str(tmpdir), ttl=300)
+    assert cached.fetch(URL) == FetchResult('page 1', '"a"')
+    clock[0] += 299
+    assert cached.fetch(URL) == FetchResult('page 1', '"a"')
+    assert stub.etags == [None]
+
+
+def test_expired_pages_are_revalidated(tmpdir, clock):
+    stub = StubFetcher(FetchResult('page 1', '"a"'), FetchResult(None, '"a"'), FetchResult('page 2', '"b"'))
+    cached = CachedFetcher(stub, str(tmpdir), ttl=300)
+    cached.fetch(URL)
+
+    # 304 Not Modified: the cached body is reused, and fresh for another ttl
+    clock[0] += 300
+    assert cached.fetch(URL) == FetchResult('page 1', '"a"')
+    clock[0] += 299
+    assert cached.fetch(URL) == FetchResult('page 1', '"a"')
+
+    # a changed page replaces the cached one
+    clock[0] += 1
+    assert cached.fetch(URL) == FetchResult('page 2', '"b"')
+    assert stub.etags == [None, '"a"', '"a"']
+    assert CachedFetcher(StubFetcher(), str(tmpdir), ttl=300).fetch(URL) == FetchResult('page 2', '"b"')
+
+
+def test_offline_falls_back_to_the_cache(tmpdir, clock):
+    stub = StubFetcher(FetchResult('page 1', '"a"'), urllib2.URLError('offline'), IOError('reset'))
+    cached = CachedFetcher(stub, str(tmpdir), ttl=300)
+    cached.fetch(URL)
+    clock[0] += 10 ** 6
+    assert cached.fetch(URL) == FetchResult('page 1', '"a"')
+    assert cached.fetch(URL) == FetchResult('page 1', '"a"')
+
+    empty = CachedFetcher(StubFetcher(urllib2.URLError('offline')), str(tmpdir.join('empty')), ttl=300)
+    with pytest.raises(urllib2.URLError):
+        empty.fetch(URL)
+
+
+def test_default_cache_dir(monkeypatch, tmpdir):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmpdir))
+    assert default_cache_dir() == str(tmpdir.join('stadium_grinders', 'lineups'))
+    monkeypatch.delenv('XDG_CACHE_HOME')
+    monkeypatch.setenv('HOME', str(tmpdir.join('home')))
+    assert default_cache_dir() == str(tmpdir.join('home', '.cache', 'stadium_grinders', 'lineups'))
@@ -0,0 +1,81 @@
+import pytest
+
+from slates import candidate_slate
+from knapsack import ModifiedKnapsack
+from brute import brute_force_teams
+
+
+def small_slates():
+    # slates small enough to enumerate every team of, over every salary sampler
+    for salary in ('uniform', 'skewed', 'bimodal'):
+        for seed in range(4):
+            names, classes, values, weights, comp, capacity = candidate_slate(16, 'small', salary, seed)
+            yield names, classes, values, weights, capacity, comp
+
+
+def close(a, b):
+    return abs(a - b) < 1e-9
+
+
+def test_solution_matches_brute_force():
+    for names, classes, values, weights, capacity, comp in small_slates():
+        teams = brute_force_teams(names, classes, values, weights, capacity, comp)
+        solution = ModifiedKnapsack(names, classes, values, weights, capacity, comp).find_solution()
+        if not teams:
+            assert solution is None
+            continue
+        best = teams[0]
+        assert solution.cost <= capacity
+        assert close(solution.value, best[0])
+        assert solution.team == best[2]
+
+
+def test_no_solution_under_a_low_cap():
+    names, classes, values, weights, capacity, comp = next(small_slates())
+    knapsack = ModifiedKnapsack(names, classes, values, weights, 100, comp)
+    assert knapsack.find_solution() is None
+    assert knapsack.find_top_solutions(3) == []
+    assert knapsack.find_split_solutions('P') == []
+
+
+@pytest.mark.parametrize('min_diff', [1, 2, 3])
+def test_top_solutions_match_brute_force(min_diff):
+    for names, classes, values, weights, capacity, comp in small_slates():
+        # the best teams that each differ from every better one kept in min_diff players
+        expected = []
+        for value, cost, team in brute_force_teams(names, classes, values, weights, capacity, comp):
+            if all(len(set(team) & set(kept)) <= len(team) - min_diff for kept in expected):
+                expected.append(team)
+            if len(expected) == 5:
+                break
+        solutions = ModifiedKnapsack(names, classes, values, weights, capacity, comp).find_top_solutions(5, min_diff)
+        assert [s.team for s in solutions] == expected
+        assert all(s.cost <= capacity for s in solutions)
+
+
+def test_split_solutions_match_brute_force():
+    for names, classes, values, weights, capacity, comp in small_slates():
+        teams = brute_force_teams(names, classes, values, weights, capacity, comp)
+        expected = {}
+        for value, cost, team in teams:
+            pitcher = [n for n in team if classes[names.index(n)] == 'P'][0]
+            expected.setdefault(pitcher, value)
+
+        knapsack = ModifiedKnapsack(names, classes, values, weights, capacity, comp)
+        solutions = knapsack.find_split_solutions('P')
+        assert len(solutions) == len(expected)
+        for s in solutions:
+            pitchers = [n for n in s.team if classes[names.index(n)] == 'P']
+            assert len(pitchers) == 1
+            assert s.cost <= capacity
+            assert close(s.value, expected[pitchers[0]])
+        assert [s.value for s in solutions] == sorted([s.value for s in solutions], reverse=True)
+        if teams:
+            assert close(solutions[0].value, knapsack.find_solution().value)
+
+
+def test_split_needs_a_single_slot_class():
+    names, classes, values, weights, capacity, comp = next(small_slates())
+    knapsack = ModifiedKnapsack(names, classes, values, weights, capacity, comp)
+    with pytest.raises(ValueError):
+        knapsack.find_split_solutions('OF')
@@ -0,0 +1,27 @@
+import os
+
+from fetchers import fixture_name
+from find_team import ROTOGRINDERS_URLS, _soupGames
+from lineup_parser import parse_lineup_page
+
+
+def lineup_doc(stats_dir):
+    # the lineup page make_stats writes for the latest season
+    with open(os.path.join(stats_dir, 'Lineups', fixture_name(ROTOGRINDERS_URLS[0]))) as infile:
+        return infile.read()
+
+
+def test_stream_parser_matches_soup(stats_dir):
+    doc = lineup_doc(stats_dir)
+    games = parse_lineup_page(doc)
+    assert len(games) > 1
+    assert games == _soupGames(doc)
+
+
+def test_stream_parser_matches_soup_on_entities_and_void_tags(stats_dir):
+    doc = lineup_doc(stats_dir)
+    doc = doc.replace('<a href="#">', '<a href="#">D&#39;Arnaud &amp; <br>', 3)
+    doc = doc.replace('<div class="time">', '<img src="x.png"><div class="time">&nbsp;', 2)
+    games = parse_lineup_page(doc)
+    assert u"D'Arnaud & " in u''.join(p for lineup in games[0].lineups for p in lineup)
+    assert games == _soupGames(doc)
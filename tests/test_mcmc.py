@@ -0,0 +1,246 @@
+from collections import Counter
+from math import log
+
+import numpy as np
+import pytest
+
+from slates import candidate_slate
+from mcmc import (TeamMCMC, ChainBatch, StopCriteria, NO_STOP, RNG_BLOCK, AnnealingProgress, LinearSchedule,
+                  GeometricSchedule, AdaptiveSchedule, ReheatingSchedule)
+from brute import brute_force_teams
+
+
+def tight_slate(seed):
+    # 14 players for a 4 player roster under a 16000 cap; seeds 3 and 6 give
+    # slates whose cheapest team costs 14200 and 15300
+    names, classes, values, weights, comp, capacity = candidate_slate(14, 'small', 'uniform', seed)
+    return names, classes, values, weights, capacity, comp
+
+
+def assert_valid(mcmc, result, capacity, composition):
+    assert result.cost <= capacity
+    assert Counter(mcmc.classes[n] for n in result.team) == Counter(composition)
+    assert abs(result.value - sum(mcmc.values[n] for n in result.team)) < 1e-9
+
+
+@pytest.mark.parametrize('slate_seed', [3, 6])
+def test_anneal_on_tight_slate(slate_seed):
+    names, classes, values, weights, capacity, comp = tight_slate(slate_seed)
+    mcmc = TeamMCMC(names, classes, values, weights, capacity, comp)
+    for seed in range(10):
+        result = mcmc.anneal(seed)
+        assert_valid(mcmc, result, capacity, comp)
+
+
+def test_enumerate_swap_without_neighbors():
+    names, classes, values, weights, capacity, comp = tight_slate(6)
+    mcmc = TeamMCMC(names, classes, values, weights, capacity, comp)
+    for seed in range(50):
+        mcmc.rng.seed(seed)
+        mcmc.make_random_team()
+        swap = mcmc.enumerate_swap()
+        if swap is None:
+            assert mcmc.sample_swap() is None
+            assert mcmc.get_neighbor() is None
+            return
+    pytest.fail('no team without neighbors on the tight slate')
+
+
+def near_cap_slates():
+    # small slates with the cap at the cheapest team's cost, and one or five
+    # salary steps above it, so every team is at most a swap or two from the cap
+    for slate_seed in range(12):
+        names, classes, values, weights, comp, capacity = candidate_slate(30, 'small', 'uniform', slate_seed)
+        min_fill = TeamMCMC(names, classes, values, weights, capacity, comp).min_fill
+        cheapest = min_fill[tuple(comp[c] for c in sorted(comp))]
+        if cheapest == float('inf'):
+            continue
+        for extra in (0, 100, 500):
+            yield names, classes, values, weights, cheapest + extra, comp
+
+
+def test_anneal_near_cap_finds_optimum():
+    for names, classes, values, weights, capacity, comp in near_cap_slates():
+        mcmc = TeamMCMC(names, classes, values, weights, capacity, comp)
+        best = brute_force_teams(names, classes, values, weights, capacity, comp)[0]
+        results = [mcmc.anneal(seed) for seed in range(3)]
+        for result in results:
+            assert_valid(mcmc, result, capacity, comp)
+        assert abs(max(r.value for r in results) - best[0]) < 1e-9
+
+
+def test_every_search_near_cap():
+    stop = StopCriteria(200, None, None)
+    for names, classes, values, weights, capacity, comp in near_cap_slates():
+        mcmc = TeamMCMC(names, classes, values, weights, capacity, comp)
+        for result in [mcmc.find_simulated_annealing_solution(restarts=2, seed=1, stop=stop),
+                       mcmc.find_chain_annealing_solution(chains=8, seed=1, stop=stop),
+                       mcmc.find_tempering_solution(levels=4, ladders=2, steps=200, seed=1, stop=stop),
+                       mcmc.find_split_annealing_solution(restarts=1, seed=1, stop=stop)]:
+            assert_valid(mcmc, result, capacity, comp)
+
+
+def test_split_search_finds_optimum():
+    for salary in ('uniform', 'skewed', 'bimodal'):
+        for slate_seed in range(4):
+            names, classes, values, weights, comp, capacity = candidate_slate(30, 'small', salary, slate_seed)
+            teams = brute_force_teams(names, classes, values, weights, capacity, comp)
+            if not teams:
+                continue
+            mcmc = TeamMCMC(names, classes, values, weights, capacity, comp)
+            result = mcmc.find_split_annealing_solution(seed=1, stop=StopCriteria(300, None, None))
+            assert_valid(mcmc, result, capacity, comp)
+            assert abs(result.value - teams[0][0]) < 1e-9
+
+
+def test_anneal_under_keeps_the_cap():
+    names, classes, values, weights, capacity, comp = tight_slate(6)
+    mcmc = TeamMCMC(names, classes, values, weights, float('inf'), comp)
+    result = mcmc.anneal_under(capacity, [1, 2])
+    assert_valid(mcmc, result, capacity, comp)
+    assert mcmc.capacity == float('inf')
+
+
+def test_tempering_without_steps():
+    names, classes, values, weights, capacity, comp = tight_slate(3)
+    mcmc = TeamMCMC(names, classes, values, weights, capacity, comp)
+    result = mcmc.find_tempering_solution(levels=4, ladders=2, steps=0, seed=1)
+    assert_valid(mcmc, result, capacity, comp)
+    assert result.steps == 0
+
+    results, stats = ChainBatch(mcmc, 8, 1).temper([1.0, 2.0, 4.0, 8.0], 0, 10, NO_STOP)
+    assert len(results) == 8
+    assert [t.temp for t in stats] == [1.0, 2.0, 4.0, 8.0]
+    assert all(t.acceptance is None and t.mean_value is None for t in stats)
+
+
+def test_random_team_needs_a_feasible_slate():
+    names, classes, values, weights, capacity, comp = tight_slate(3)
+    mcmc = TeamMCMC(names, classes, values, weights, 14100, comp)
+    with pytest.raises(ValueError):
+        mcmc.make_random_team()
+    # a class without enough players can't be filled under any cap
+    short = TeamMCMC(names, classes, values, weights, float('inf'), dict(comp, OF=20))
+    with pytest.raises(ValueError):
+        short.make_random_team()
+
+
+def drive(schedule, improves=lambda k: False, accepts=lambda k: False):
+    # the temperatures a schedule hands out to a restart whose step k improves
+    # the best team or is accepted as the given functions say
+    progress = AnnealingProgress()
+    temps = []
+    for temp in schedule.temperatures(progress):
+        temps.append(temp)
+        progress.steps += 1
+        progress.accepted += accepts(len(temps) - 1)
+        if improves(len(temps) - 1):
+            progress.since_improvement = 0
+        else:
+            progress.since_improvement += 1
+    return temps
+
+
+def test_linear_and_geometric_schedules():
+    assert drive(LinearSchedule(start=10.0, end=0.0, step=2.5)) == [10.0, 7.5, 5.0, 2.5]
+    assert drive(GeometricSchedule(start=8.0, end=1.0, alpha=0.5)) == [8.0, 4.0, 2.0]
+
+
+def test_adaptive_schedule():
+    # a window of 4 at alpha 0.5 cools by 0.5 ** 4 when more swaps than the
+    # target are accepted, by 0.5 otherwise
+    schedule = AdaptiveSchedule(start=1.0, end=0.0, max_steps=12, window=4, target_start=0.5, target_end=0.5, alpha=0.5)
+    assert drive(schedule) == [1.0] * 4 + [0.5] * 4 + [0.25] * 4
+    assert drive(schedule, accepts=lambda k: True) == [1.0] * 4 + [0.0625] * 4 + [0.0625 ** 2] * 4
+    short = AdaptiveSchedule(start=1.0, end=0.3, max_steps=100, window=4, alpha=0.5)
+    assert drive(short) == [1.0] * 4 + [0.5] * 4
+
+
+def test_reheating_schedule():
+    geometric = GeometricSchedule(start=8.0, end=1.0, alpha=0.5)
+    assert drive(ReheatingSchedule(geometric, after=2, times=1)) == [8.0, 4.0, 8.0, 4.0, 2.0]
+    assert drive(ReheatingSchedule(geometric, after=2, times=1), improves=lambda k: k % 2 == 1) == [8.0, 4.0, 2.0]
+
+
+def test_worse_teams_are_accepted_when_hot():
+    names, classes, values, weights, capacity, comp = tight_slate(3)
+    mcmc = TeamMCMC(names, classes, values, weights, capacity, comp, seed=0)
+    assert all(mcmc.should_transition(5.0, 6.0, 0.0) for n in range(100))
+    assert not any(mcmc.should_transition(6.0, 5.0, 1e-9) for n in range(100))
+    # exp(-1 / T) = 1/2
+    accepted = sum(mcmc.should_transition(6.0, 5.0, 1 / log(2)) for n in range(4000))
+    assert 1800 < accepted < 2200
+
+
+@pytest.mark.parametrize('search', ['anneal', 'chains'])
+def test_stop_criteria(search):
+    names, classes, values, weights, comp, capacity = candidate_slate(60, 'fanduel', 'uniform', 0)
+    mcmc = TeamMCMC(names, classes, values, weights, capacity, comp)
+    full = len(list(GeometricSchedule().temperatures(AnnealingProgress())))
+
+    def run(stop):
+        if search == 'anneal':
+            mcmc.stop = stop
+            return mcmc.anneal(1)
+        return max(ChainBatch(mcmc, 4, 1).anneal(GeometricSchedule(), stop), key=lambda r: r.value)
+
+    assert run(NO_STOP).steps == full
+    # checked every 64 steps
+    assert run(StopCriteria(None, 0.0, None)).steps == 64
+    patient = run(StopCriteria(100, None, None))
+    assert 100 <= patient.steps < full
+    # any improvement reaches a target below the starting team
+    target = run(StopCriteria(None, None, float('-inf')))
+    assert target.steps < full
+    reached = run(StopCriteria(None, None, patient.value))
+    assert reached.value >= patient.value and reached.steps < full
+
+
+def test_pool_restarts_match_sequential():
+    names, classes, values, weights, comp, capacity = candidate_slate(60, 'fanduel', 'uniform', 0)
+    mcmc = TeamMCMC(names, classes, values, weights, capacity, comp)
+    stop = StopCriteria(300, None, None)
+    one = mcmc.find_simulated_annealing_solution(restarts=6, workers=1, seed=7, stop=stop)
+    three = mcmc.find_simulated_annealing_solution(restarts=6, workers=3, seed=7, stop=stop)
+    assert one == three
+    assert_valid(mcmc, three, capacity, comp)
+
+
+def test_chain_batch_is_reproducible_and_feasible():
+    names, classes, values, weights, comp, capacity = candidate_slate(60, 'fanduel', 'uniform', 0)
+    mcmc = TeamMCMC(names, classes, values, weights, capacity, comp)
+    stop = StopCriteria(200, None, None)
+    first = ChainBatch(mcmc, 16, 5).anneal(GeometricSchedule(), stop)
+    again = ChainBatch(mcmc, 16, 5).anneal(GeometricSchedule(), stop)
+    assert first == again
+    assert ChainBatch(mcmc, 16, 6).anneal(GeometricSchedule(), stop) != first
+    for result in first:
+        assert_valid(mcmc, result, capacity, comp)
+
+    tempered, stats = ChainBatch(mcmc, 8, 5).temper([0.1, 1.0, 10.0, 100.0], 300, 10, NO_STOP)
+    assert (tempered, stats) == ChainBatch(mcmc, 8, 5).temper([0.1, 1.0, 10.0, 100.0], 300, 10, NO_STOP)
+    for result in tempered:
+        assert_valid(mcmc, result, capacity, comp)
+
+
+def test_block_uniforms_match_the_generator():
+    names, classes, values, weights, capacity, comp = tight_slate(3)
+    mcmc = TeamMCMC(names, classes, values, weights, capacity, comp)
+    mcmc.np_rng.seed(11)
+    drawn = [mcmc.uniform() for n in range(RNG_BLOCK + 10)]
+    assert drawn == np.random.RandomState(11).random_sample(RNG_BLOCK + 10).tolist()
+    assert mcmc.anneal(4) == mcmc.anneal(4)
+
+
+def test_block_acceptance_matches_should_transition():
+    # anneal and ChainBatch test log1p(-u) * temp < delta over a block of u;
+    # should_transition tests one u at a time
+    names, classes, values, weights, capacity, comp = tight_slate(3)
+    mcmc = TeamMCMC(names, classes, values, weights, capacity, comp)
+    u = np.concatenate([[0.0, 0.5, 1 - 1e-12], np.random.RandomState(2).random_sample(200)])
+    for temp in (0.0, 0.01, 1.0, 7.5, 1000.0):
+        for delta in (-50.0, -1.0, -0.01, 0.0, 0.5):
+            block = (delta > 0) | (np.log1p(-u) * temp < delta)
+            mcmc.uniforms, mcmc.next_uniform = u.tolist(), 0
+            scalar = [mcmc.should_transition(0.0, delta, temp) for x in u]
+            assert block.tolist() == scalar
@@ -0,0 +1,40 @@
+from stat_parsers.player_stats import PlayerStats, STAT_FAMILIES
+
+
+def lineup_names(player_stats, count=50):
+    # (first initial, last name, team) as the lineup pages give them
+    names = []
+    for (name, uid), info in sorted(player_stats.player_info.items())[:count]:
+        if name and info.get('teams'):
+            names.append((name[0], name.split()[-1], info['teams'][-1]))
+    return names
+
+
+def test_names_resolve_without_loading_stats(stats_dir):
+    full = PlayerStats(stats_dir)
+    lazy = PlayerStats(stats_dir, lazy=True)
+    names = lineup_names(full)
+    assert names
+    for initial, last, team in names:
+        assert lazy.get_player_full_name(initial, last, team) == full.get_player_full_name(initial, last, team)
+    assert lazy.unloaded == set(STAT_FAMILIES)
+    assert not lazy.unnamed
+
+
+def test_names_resolve_without_snapshots(stats_dir):
+    full = PlayerStats(stats_dir, use_snapshot=False)
+    lazy = PlayerStats(stats_dir, use_snapshot=False, lazy=True)
+    initial, last, team = lineup_names(full)[0]
+    assert lazy.get_player_full_name(initial, last, team) == full.get_player_full_name(initial, last, team)
+    assert not lazy.unloaded
+
+
+def test_names_resolve_to_the_latest_team(stats_dir):
+    # two players share a lineup name; the one on the team in the latest season wins
+    player_stats = PlayerStats(stats_dir, lazy=True, years=[2013, 2014])
+    player_stats.unnamed.clear()
+    player_stats.add_player_team(('john smith', 1), 'NYY', 2013)
+    player_stats.add_player_team(('jake smith', 2), 'BOS', 2013)
+    player_stats.add_player_team(('jake smith', 2), 'NYY', 2014)
+    assert player_stats.get_player_full_name('j', 'smith', 'NYY') == ('jake smith', 2)
+    assert player_stats.get_player_full_name('j', 'smith', 'BOS') == ('john smith', 1)
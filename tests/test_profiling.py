@@ -0,0 +1,45 @@
+from profiling import Registry, registry, timed
+
+
+class Squares(object):
+
+    @timed('Squares')
+    def square(self, x):
+        return x * x
+
+
+@timed('test_profiling')
+def cube(x):
+    return x ** 3
+
+
+def test_timed_functions_are_only_wrapped_while_enabled():
+    plain_square, plain_cube = Squares.__dict__['square'], cube
+    assert plain_square.__name__ == 'square'
+
+    registry.reset()
+    assert Squares().square(3) == 9
+    assert registry.timers == {}
+
+    registry.enable()
+    try:
+        assert Squares.__dict__['square'] is not plain_square
+        assert Squares().square(3) == 9 and Squares().square(4) == 16
+        assert globals()['cube'](2) == 8
+        assert registry.timers['Squares.square'][0] == 2
+        assert registry.timers['test_profiling.cube'][0] == 1
+    finally:
+        registry.disable()
+        registry.reset()
+    assert Squares.__dict__['square'] is plain_square
+    assert globals()['cube'] is plain_cube
+
+
+def test_counters_only_while_enabled():
+    counts = Registry()
+    counts.count('a')
+    assert counts.counters == {}
+    counts.enable()
+    counts.count('a', 2)
+    counts.disable()
+    assert counts.counters == {'a': 2}
@@ -0,0 +1,158 @@
+import os
+
+import numpy as np
+import pytest
+
+from make_stats import make_stats
+from profiling import registry
+from stat_parsers.snapshot import (snapshot_path, snapshot_dir, set_snapshot_dir, load_snapshot, save_snapshot,
+                                   flatten_stats)
+from stat_parsers.player_stats import PlayerStats, STAT_FAMILIES
+from stat_parsers.team_stats import TeamStats
+from stat_parsers.ballpark_stats import BallparkStats
+from stat_parsers.league_stats import LeagueStats
+
+
+@pytest.fixture
+def fresh_stats(tmpdir):
+    # a stats directory of its own, since these tests touch its files
+    path = str(tmpdir.join('stats'))
+    make_stats(path, scale=1, years=(2013, 2014), seed=1)
+    return path
+
+
+@pytest.fixture
+def counters():
+    registry.reset()
+    registry.enable()
+    yield registry.counters
+    registry.disable()
+    registry.reset()
+
+
+def player_state(player_stats):
+    # everything a parse of the player stats leaves behind
+    stats = dict((key, player_stats.store.entity_stats(key)) for key in player_stats.store.keys)
+    teams = dict((key, info.get('teams')) for key, info in player_stats.player_info.items())
+    names = dict((name, dict(candidates)) for name, candidates in player_stats.name_index.items())
+    return stats, teams, names
+
+
+def test_player_stats_round_trip(fresh_stats, counters):
+    parsed = PlayerStats(fresh_stats, years=[2013, 2014])
+    assert counters.get('PlayerStats.csv_parses') == 2 * len(STAT_FAMILIES)
+    loaded = PlayerStats(fresh_stats, years=[2013, 2014])
+    assert counters.get('PlayerStats.snapshot_loads') == 2 * len(STAT_FAMILIES)
+    assert counters.get('PlayerStats.csv_parses') == 2 * len(STAT_FAMILIES)
+    assert player_state(loaded) == player_state(parsed)
+    assert player_state(loaded) == player_state(PlayerStats(fresh_stats, use_snapshot=False, years=[2013, 2014]))
+
+
+@pytest.mark.parametrize('parser', [TeamStats, LeagueStats])
+def test_season_stats_round_trip(fresh_stats, parser):
+    parsed = parser(fresh_stats, years=[2013, 2014])
+    loaded = parser(fresh_stats, years=[2013, 2014])
+    assert sorted(flatten_stats(loaded.stats)) == sorted(flatten_stats(parsed.stats))
+
+
+def test_ballpark_stats_round_trip(fresh_stats):
+    parsed = BallparkStats(fresh_stats)
+    loaded = BallparkStats(fresh_stats)
+    assert sorted(flatten_stats(loaded.stats)) == sorted(flatten_stats(parsed.stats))
+
+
+def test_snapshots_stay_out_of_the_stats_directory(fresh_stats, snapshots, tmpdir, monkeypatch):
+    before = sorted(os.listdir(fresh_stats))
+    PlayerStats(fresh_stats)
+    TeamStats(fresh_stats)
+    assert sorted(os.listdir(fresh_stats)) == before
+    path = snapshot_path(fresh_stats, 'TeamStats-2014')
+    assert path.startswith(snapshots) and os.path.exists(path)
+    assert snapshot_path(str(tmpdir.join('other', 'stats')), 'TeamStats-2014') != path
+
+    set_snapshot_dir(None)
+    try:
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmpdir.join('cache')))
+        assert snapshot_dir() == str(tmpdir.join('cache', 'stadium_grinders', 'snapshots'))
+    finally:
+        set_snapshot_dir(snapshots)
+
+
+def test_changed_source_reparses_its_season(fresh_stats, counters):
+    PlayerStats(fresh_stats, years=[2013, 2014])
+    path = snapshot_path(fresh_stats, 'PlayerStats-batter_total-2014')
+    source = load_snapshot(path)['header']['sources'][0][0]
+
+    # a new mtime alone is enough to reparse
+    st = os.stat(source)
+    os.utime(source, (st.st_atime, st.st_mtime + 10))
+    assert load_snapshot(path) is None
+    counters.clear()
+    PlayerStats(fresh_stats, years=[2013, 2014])
+    assert counters.get('PlayerStats.csv_parses') == 1
+    assert counters.get('PlayerStats.snapshot_loads') == 2 * len(STAT_FAMILIES) - 1
+
+    # the reparse wrote a current snapshot again
+    assert load_snapshot(path) is not None
+    counters.clear()
+    PlayerStats(fresh_stats, years=[2013, 2014])
+    assert counters.get('PlayerStats.csv_parses') is None
+
+
+def test_changed_size_invalidates(fresh_stats):
+    TeamStats(fresh_stats)
+    path = snapshot_path(fresh_stats, 'TeamStats-2014')
+    snapshot = load_snapshot(path)
+    source, mtime, size = snapshot['header']['sources'][0]
+    with open(source, 'a') as outfile:
+        outfile.write('\n')
+    os.utime(source, (mtime, mtime))
+    assert load_snapshot(path) is None
+
+
+def test_missing_or_broken_snapshot(fresh_stats, tmpdir):
+    assert load_snapshot(None) is None
+    assert load_snapshot(str(tmpdir.join('missing.npz'))) is None
+
+    source = str(tmpdir.join('source.csv'))
+    with open(source, 'w') as outfile:
+        outfile.write('a,b\n')
+    path = str(tmpdir.join('snapshots', 'test.npz'))
+    save_snapshot(path, [source], {'note': 'x'}, values=np.arange(3.0))
+    snapshot = load_snapshot(path)
+    assert snapshot['header']['note'] == 'x'
+    assert snapshot['values'].tolist() == [0.0, 1.0, 2.0]
+    assert load_snapshot(path, ['values']).keys() == snapshot.keys()
+    assert load_snapshot(path, ['other']) is None
+
+    with open(path, 'wb') as outfile:
+        outfile.write('not a snapshot')
+    assert load_snapshot(path) is None
+
+    os.remove(source)
+    save_snapshot(path, [], {}, values=np.arange(3.0))
+    assert load_snapshot(path) is not None
+
+
+def test_names_after_a_change_parse_the_family(fresh_stats, counters):
+    PlayerStats(fresh_stats)
+    path = snapshot_path(fresh_stats, 'PlayerStats-catcher-2014')
+    source = load_snapshot(path)['header']['sources'][0][0]
+    st = os.stat(source)
+    os.utime(source, (st.st_atime, st.st_mtime + 10))
+
+    counters.clear()
+    lazy = PlayerStats(fresh_stats, lazy=True)
+    lazy.load_names()
+    assert lazy.unloaded == set(STAT_FAMILIES) - set(['catcher'])
+    assert counters.get('PlayerStats.csv_parses') == 1
+
+
+@pytest.mark.parametrize('parser', [TeamStats, LeagueStats])
+def test_adding_a_season_only_parses_that_season(fresh_stats, counters, parser):
+    name = parser.__name__
+    parser(fresh_stats, years=[2014])
+    parses = counters.get('%s.csv_parses' % name)
+    both = parser(fresh_stats, years=[2013, 2014])
+    assert counters.get('%s.csv_parses' % name) == parses + 1
+    assert sorted(flatten_stats(both.stats)) == sorted(flatten_stats(parser(fresh_stats, use_snapshot=False, years=[2013, 2014]).stats))
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from slates import assign_slate
+from stat_parsers.player_stats import PlayerStats
+from stat_parsers.team_stats import TeamStats
+from stat_parsers.ballpark_stats import BallparkStats
+from stat_parsers.league_stats import LeagueStats
+from stat_equations import StatEquations
+
+
+@pytest.fixture
+def slate(stats_dir):
+    player_stats = PlayerStats(stats_dir, use_snapshot=False)
+    team_stats = TeamStats(stats_dir, use_snapshot=False)
+    players = assign_slate(player_stats, team_stats, seed=0)
+    eq = StatEquations(player_stats, team_stats, BallparkStats(stats_dir, use_snapshot=False),
+                       LeagueStats(stats_dir, use_snapshot=False))
+    return eq, player_stats, players
+
+
+def get_scores(eq, players):
+    scores = []
+    for p in players:
+        try:
+            scores.append(eq.get_score(p))
+        except Exception:
+            scores.append(np.nan)
+    return np.array(scores)
+
+
+def test_score_all_matches_get_score(slate):
+    eq, player_stats, players = slate
+    errors = []
+    scores = eq.score_all(players, errors)
+    assert errors == []
+    assert np.isfinite(scores).all()
+    assert np.allclose(scores, get_scores(eq, players), rtol=1e-12, atol=0)
+
+
+def test_batters_without_at_bats_get_no_score(slate):
+    eq, player_stats, players = slate
+    batter = next(p for p in players if player_stats.get_player_fielding_position(p) != 'P')
+    player_stats.store.set(batter, eq.year, 'ab_total', 0)
+
+    errors = []
+    scores = eq.score_all(players, errors)
+    with pytest.raises(Exception):
+        eq.get_score(batter)
+    assert np.isnan(scores[players.index(batter)])
+    assert [p for p, message in errors] == [batter]
+    others = [i for i, p in enumerate(players) if p != batter]
+    assert np.allclose(scores[others], get_scores(eq, [players[i] for i in others]), rtol=1e-12, atol=0)
+
+
+def test_players_without_stats_are_reported(slate):
+    eq, player_stats, players = slate
+    nobody = ('nobody', -1)
+    player_stats.set_player_fielding_position(nobody, 'P')
+    unknown = ('no position', -2)
+
+    errors = []
+    scores = eq.score_all(players + [nobody, unknown], errors)
+    assert np.isnan(scores[-2:]).all()
+    assert np.isfinite(scores[:-2]).all()
+    assert sorted(p for p, message in errors) == sorted([nobody, unknown])
+
+
+def test_missing_fielding_row_only_fails_sb(slate):
+    eq, player_stats, players = slate
+    batter = next(p for p in players if player_stats.get_player_fielding_position(p) != 'P')
+    opp_team = eq.team_stats.get_team_opponent(player_stats.get_player_team(batter))
+    expected = [eq.batter_points_expected_for_runs(batter),
+                eq.batter_points_expected_for_hits(batter),
+                eq.batter_points_expected_for_rbi(batter),
+                eq.batter_points_expected_for_hr(batter),
+                eq.batter_points_expected_for_walks(batter)]
+    eq.team_stats.stats[opp_team][eq.year].pop('sb_allowed')
+    eq.team_stats.stats[opp_team][eq.year].pop('cs_fielding')
+    eq.matchup_cache = {}
+
+    assert [eq.batter_points_expected_for_runs(batter),
+            eq.batter_points_expected_for_hits(batter),
+            eq.batter_points_expected_for_rbi(batter),
+            eq.batter_points_expected_for_hr(batter),
+            eq.batter_points_expected_for_walks(batter)] == expected
+    with pytest.raises(Exception):
+        eq.batter_points_expected_for_sb(batter)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from stat_parsers.stat_store import ColumnarStatStore
+
+
+def test_get_and_set():
+    store = ColumnarStatStore(initial_rows=2)
+    for i in range(5):
+        store.set(('player %d' % i, i), 2014, 'ab_total', 10.0 * i)
+    store.set(('player 1', 1), 2014, 'woba', 0.3, 'LHP')
+
+    assert len(store) == 5
+    assert ('player 4', 4) in store
+    assert store.get(('player 4', 4), 2014, 'ab_total') == 40.0
+    assert store.get(('player 1', 1), 2014, 'woba', 'LHP') == 0.3
+    assert store.get(('player 2', 2), 2014, 'woba', 'LHP', default=None) is None
+    with pytest.raises(KeyError):
+        store.get(('player 2', 2), 2014, 'woba', 'LHP')
+    with pytest.raises(KeyError):
+        store.get(('nobody', 0), 2014, 'ab_total')
+
+
+def test_rows_and_take_match_get():
+    store = ColumnarStatStore(initial_rows=2)
+    keys = [('player %d' % i, i) for i in range(6)]
+    for i, key in enumerate(keys):
+        store.set(key, 2014, 'hr_total', i)
+        if i % 2:
+            store.set(key, 2014, 'pa', 100 + i, 'RHP')
+
+    wanted = [keys[3], ('nobody', 0), keys[0], keys[5]]
+    rows = store.rows(wanted)
+    assert list(rows[[0, 2, 3]]) == [3, 0, 5]
+    assert rows[1] == -1
+
+    hr = store.take(rows, 2014, 'hr_total')
+    assert hr[0] == 3 and hr[2] == 0 and hr[3] == 5 and np.isnan(hr[1])
+    pa = store.take(rows, 2014, 'pa', 'RHP')
+    assert pa[0] == 103 and pa[3] == 105 and np.isnan(pa[1]) and np.isnan(pa[2])
+    assert np.isnan(store.take(rows, 2013, 'hr_total')).all()
+
+
+def test_dump_and_merge_round_trip():
+    store = ColumnarStatStore()
+    keys = [('player %d' % i, i) for i in range(4)]
+    names = [(2014, 'hr_total', None), (2014, 'woba', 'LHP')]
+    for i, key in enumerate(keys):
+        store.set(key, 2014, 'hr_total', i)
+        if i != 2:
+            store.set(key, 2014, 'woba', 0.1 * i, 'LHP')
+
+    copy = ColumnarStatStore(initial_rows=1)
+    copy.merge(keys, names, store.dump(keys, names))
+    for key in keys:
+        assert copy.entity_stats(key) == store.entity_stats(key)
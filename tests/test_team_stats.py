@@ -0,0 +1,37 @@
+import os
+
+from make_stats import make_stats
+from stat_parsers.player_stats import PlayerStats
+from stat_parsers.team_stats import TeamStats, TEAM_ALIASES, get_team_by_alias, get_teams
+
+
+def test_aliases():
+    assert get_team_by_alias('D-backs', 'fangraphs') == 'ARI'
+    assert get_team_by_alias(' Blue Jays ', 'fangraphs') == 'TOR'
+    assert get_team_by_alias('KC', 'fanduel') == 'KAN'
+    assert get_team_by_alias('St. Louis Cardinals', 'rotogrinders') == 'STL'
+    assert get_team_by_alias('Expos', 'fangraphs') is None
+    # every source spells every team, and only teams of TEAM_NAMES
+    for source, aliases in TEAM_ALIASES.items():
+        assert set(aliases.values()) == set(get_teams())
+
+
+def test_fangraphs_spellings_resolve(tmpdir):
+    # Fangraphs writes the Diamondbacks as D-backs
+    stats = str(tmpdir.join('stats'))
+    make_stats(stats, scale=1, years=(2014,), seed=2)
+    for root, dirs, files in os.walk(stats):
+        for name in files:
+            if name.endswith('.csv'):
+                path = os.path.join(root, name)
+                with open(path) as infile:
+                    text = infile.read()
+                with open(path, 'w') as outfile:
+                    outfile.write(text.replace('Diamondbacks', 'D-backs'))
+
+    player_stats = PlayerStats(stats, use_snapshot=False)
+    teams = set(team for info in player_stats.player_info.values() for team in info.get('teams', []))
+    assert 'ARI' in teams
+    assert None not in teams
+    team_stats = TeamStats(stats, use_snapshot=False)
+    assert team_stats.stats['ARI'][2014]['runs_team'] > 0